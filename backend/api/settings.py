@@ -42,6 +42,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that request timings cover the other middleware
+    'walle.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -56,7 +58,12 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.AllowAny',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'walle.renderers.TimedJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'walle.parsers.TimedJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
 }
 
@@ -131,3 +138,16 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# In-process cache of live games (see walle/cache.py)
+# DURABILITY is 'write-behind' (saved every FLUSH_EVERY turns, on eviction and
+# when a game ends) or 'write-through' (saved every turn, the cached copy being
+# checked against the row on every request). A save never overwrites turns
+# saved by another process, the request plays again on the newer row instead.
+# With write-behind, several processes serving the same game keep dropping
+# each other's unsaved turns: use write-through, or send each game to one process.
+WALLE_GAME_CACHE = {
+    'MAX_GAMES': 128,
+    'FLUSH_EVERY': 10,
+    'DURABILITY': 'write-behind',
+}
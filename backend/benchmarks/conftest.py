@@ -0,0 +1,28 @@
+from walle.game_logic import game_rng, next_turn, rand_list
+
+# (num_agents, num_wastes) from a sparse board up to a board almost full,
+# agents and wastes never sharing a cell on the 32x32 grid
+DENSITIES = [(5, 20), (50, 100), (200, 400), (500, 500), (1000, 20)]
+
+# Turns played before measuring, so that part of the wastes are known
+WARMUP_TURNS = 3
+
+
+def make_state(num_agents, num_wastes, seed=0):
+    """
+    Build a game state as the API stores it, a few turns after its start
+    """
+    rng = game_rng(seed, 0)
+    agents = rand_list(num_agents, third_arg=True, rng=rng)
+    wastes = rand_list(num_wastes, agent_positions=agents, wastes=True, rng=rng)
+
+    waste_positions = [[i, j] for i, j in wastes]
+    agent_positions = [[i, j, w] for i, j, w in agents]
+    known_waste_positions = []
+    waste_collected = 0
+    for turn_number in range(1, WARMUP_TURNS + 1):
+        waste_positions, agent_positions, known_waste_positions, waste_collected = next_turn(
+            waste_positions, agent_positions, [15, 15], known_waste_positions,
+            waste_collected, game_rng(seed, turn_number)
+        )
+    return waste_positions, agent_positions, known_waste_positions, waste_collected
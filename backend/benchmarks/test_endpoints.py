@@ -0,0 +1,143 @@
+import pytest
+
+from walle.cache import game_cache
+from walle.renderers import GameJSONRenderer
+from walle.tests.utils import start_game
+from walle.views import state_data
+
+# Boards served through the API, from the frontend defaults to a crowded one
+DENSITIES = [(5, 20), (200, 400), (500, 500)]
+
+# Rounds of the next-round benchmark, each one plays a turn of the same game
+NEXT_ROUND_ROUNDS = 200
+
+
+def density_id(density):
+    return f"{density[0]}a-{density[1]}w"
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_game_start(benchmark, client, density):
+    benchmark(start_game, client, *density)
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_game_next_round(benchmark, client, density):
+    game = {'id': start_game(client, *density)}
+
+    def setup():
+        # Start over when the previous round finished the game
+        if not client.get(f"/api/games/{game['id']}/stats/").json()['waste_positions']:
+            game['id'] = start_game(client, *density)
+        return (f"/api/games/{game['id']}/next-round/",), {}
+
+    def next_round(url):
+        response = client.post(url)
+        assert response.status_code == 200, response.content
+
+    benchmark.pedantic(next_round, setup=setup, rounds=NEXT_ROUND_ROUNDS)
+
+
+def test_game_next_round_turns(benchmark, client):
+    # Ten turns with their frames per request, as the frontend runs a game
+    game = {'id': start_game(client, 200, 400)}
+
+    def setup():
+        if not client.get(f"/api/games/{game['id']}/stats/").json()['waste_positions']:
+            game['id'] = start_game(client, 200, 400)
+        return (f"/api/games/{game['id']}/next-round/?turns=10&frames=true",), {}
+
+    def next_rounds(url):
+        response = client.post(url)
+        assert response.status_code == 200, response.content
+
+    benchmark.pedantic(next_rounds, setup=setup, rounds=NEXT_ROUND_ROUNDS // 10)
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_game_status(benchmark, client, density):
+    url = f"/api/games/{start_game(client, *density)}/stats/"
+
+    def status():
+        response = client.get(url)
+        assert response.status_code == 200, response.content
+
+    benchmark(status)
+
+
+def test_game_bulk_start(benchmark, client):
+    # A thousand games in one request, four configurations with their own seeds
+    def bulk_start():
+        response = client.post('/api/games/bulk/', {
+            'product': {
+                'num_agents': [5, 10],
+                'num_wastes': [20, 40],
+                'base_position_x': 15,
+                'base_position_y': 15,
+            },
+            'repeat': 250,
+        }, content_type='application/json')
+        assert response.status_code == 201, response.content
+
+    benchmark(bulk_start)
+
+
+def test_replay_seek(benchmark, client):
+    game_id = start_game(client, 200, 400)
+    response = client.post(f"/api/games/{game_id}/run/", {'max_turns': 199}, content_type='application/json')
+    assert response.status_code == 200, response.content
+
+    # The farthest turn from a keyframe, every recorded event of the interval is applied
+    def replay():
+        response = client.get(f"/api/games/{game_id}/replay/199/")
+        assert response.status_code == 200, response.content
+
+    benchmark(replay)
+
+
+def test_job_submit(benchmark, client):
+    # Queuing a game costs the same whatever its size, the workers play it
+    def submit():
+        response = client.post('/api/jobs/', {
+            'num_agents': 500,
+            'num_wastes': 500,
+            'base_position_x': 15,
+            'base_position_y': 15,
+            'seed': 0,
+            'max_turns': 100000,
+        }, content_type='application/json')
+        assert response.status_code == 202, response.content
+
+    benchmark(submit)
+
+
+def test_metrics_scrape(benchmark, client):
+    game_id = start_game(client, 200, 400)
+    response = client.post(f"/api/games/{game_id}/next-round/?timing=1")
+    assert response.status_code == 200, response.content
+    assert 'steps;dur=' in response['Server-Timing']
+
+    # Every phase and view has its series by then, as on a server in use
+    def scrape():
+        response = client.get('/api/metrics/')
+        assert response.status_code == 200, response.content
+
+    benchmark(scrape)
+
+
+def test_render_game_state(benchmark, client):
+    # A 1000 agent state, the size where rendering used to outweigh the turn
+    response = client.post('/api/games/', {
+        'num_agents': 1000,
+        'num_wastes': 2000,
+        'base_position_x': 15,
+        'base_position_y': 15,
+        'grid_width': 100,
+        'grid_height': 100,
+        'seed': 0,
+    }, content_type='application/json')
+    assert response.status_code == 200, response.content
+    live = game_cache.get(response.json()['game_id'])
+    renderer = GameJSONRenderer()
+
+    benchmark(lambda: renderer.render(state_data(live)))
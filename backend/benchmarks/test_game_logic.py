@@ -0,0 +1,179 @@
+import random
+
+import pytest
+
+from walle.assignment import ASSIGNERS
+from walle.board import Board
+from walle.movement import resolve_moves
+from walle.placement import DISTRIBUTIONS, place
+from walle.planner import plan_path
+from walle.game_logic import (
+    closest_waste, find_path, game_rng, next_turn, play_turn, rand_list, try_alternative_moves
+)
+
+from .conftest import DENSITIES, make_state
+
+
+def density_id(density):
+    return f"{density[0]}a-{density[1]}w"
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_next_turn(benchmark, density):
+    waste_positions, agent_positions, known_waste_positions, waste_collected = make_state(*density)
+    rng = random.Random(0)
+
+    # next_turn does not change its arguments, so every round plays the same turn
+    benchmark(
+        next_turn, waste_positions, agent_positions, [15, 15],
+        known_waste_positions, waste_collected, rng
+    )
+
+
+def test_next_turn_large_board(benchmark):
+    # A site sized board, kept in sparse layers
+    width = height = 4096
+    rng = random.Random(0)
+    agents = rand_list(1000, third_arg=True, rng=rng, width=width, height=height)
+    wastes = rand_list(1000, agent_positions=agents, wastes=True, rng=rng, width=width, height=height)
+
+    benchmark.pedantic(
+        next_turn, ([list(pos) for pos in wastes], [list(pos) for pos in agents], [2048, 2048], [], 0,
+                    random.Random(0), width, height),
+        rounds=5
+    )
+
+
+def test_play_turn_explored(benchmark):
+    # A crowd with more agents than wastes, once every cell has been seen
+    rng = random.Random(0)
+    agents = rand_list(900, third_arg=True, rng=rng)
+    wastes = rand_list(100, agent_positions=agents, wastes=True, rng=rng)
+    board = Board([list(pos) for pos in wastes], [list(pos) for pos in agents], [], pathing='planner')
+    turn = {'number': 0, 'collected': 0}
+
+    def play():
+        turn['number'] += 1
+        turn['collected'] = play_turn(board, [15, 15], turn['collected'], game_rng(0, turn['number']))
+
+    while board.unseen_count:
+        play()
+    assert board.planner.explore(board, 0) is None
+
+    benchmark.pedantic(play, rounds=20)
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_reveal_after_step(benchmark, density):
+    waste_positions, agent_positions, known_waste_positions, _ = make_state(*density)
+
+    def setup():
+        # Vision of a long-lived board after every agent that can stepped one cell
+        board = Board(waste_positions, agent_positions, known_waste_positions)
+        board.reveal()
+        rng = random.Random(0)
+        for index, (i, j, _) in enumerate(board.agents):
+            moves = board.free_neighbours(i, j, rng)
+            if moves:
+                board.move(index, *moves[0])
+        return (board,), {}
+
+    benchmark.pedantic(lambda board: board.reveal(), setup=setup, rounds=200)
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_closest_waste(benchmark, density):
+    waste_positions, agent_positions, _, _ = make_state(*density)
+    num_agents = len(agent_positions)
+
+    # Every known waste, half of them already assigned to other agents
+    known = waste_positions
+    assigned_wastes = {index: known[index] for index in range(0, min(num_agents, len(known)), 2)}
+    i, j, _ = agent_positions[-1]
+
+    benchmark(closest_waste, known, (i, j), num_agents - 1, num_agents, assigned_wastes, random.Random(0))
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_closest_waste_indexed(benchmark, density):
+    waste_positions, agent_positions, _, _ = make_state(*density)
+    num_agents = len(agent_positions)
+
+    # Same query as above, through the known waste index of a board
+    board = Board(waste_positions, agent_positions, waste_positions)
+    known = board.known_index
+    for index in range(0, min(num_agents, len(waste_positions)), 2):
+        known.assign(tuple(waste_positions[index]))
+    i, j, _ = agent_positions[-1]
+
+    benchmark(closest_waste, board.known_wastes, (i, j), num_agents - 1, num_agents, None, random.Random(0), known)
+
+
+@pytest.mark.parametrize('strategy', sorted(ASSIGNERS))
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_assignment(benchmark, density, strategy):
+    num_agents, num_wastes = density
+    rng = random.Random(0)
+    agents = [(rng.randrange(32), rng.randrange(32)) for _ in range(num_agents)]
+    wastes = [(rng.randrange(32), rng.randrange(32)) for _ in range(num_wastes)]
+
+    # Matching every agent at once, as on the first turn a whole board is seen
+    benchmark(ASSIGNERS[strategy], agents, wastes)
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_plan_path(benchmark, density):
+    waste_positions, agent_positions, known_waste_positions, _ = make_state(*density)
+    board = Board(waste_positions, agent_positions, known_waste_positions)
+
+    # Across the whole board, around every agent in the way
+    benchmark(plan_path, board, (0, 0), (31, 31))
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_resolve_moves(benchmark, density):
+    waste_positions, agent_positions, known_waste_positions, _ = make_state(*density)
+
+    def setup():
+        # Every agent heads for the base, most of them waiting on the one ahead
+        board = Board(waste_positions, agent_positions, known_waste_positions)
+        intents = {}
+        for index, (i, j, _) in enumerate(board.agents):
+            if i != 15:
+                intents[index] = (i + (1 if i < 15 else -1), j)
+            elif j != 15:
+                intents[index] = (i, j + (1 if j < 15 else -1))
+        return (board, intents, list(range(len(board.agents)))), {}
+
+    benchmark.pedantic(resolve_moves, setup=setup, rounds=200)
+
+
+def test_closest_waste_exploring(benchmark):
+    benchmark(closest_waste, [], (3, 4), 1, 10, {}, random.Random(0))
+
+
+@pytest.mark.parametrize('start, target', [((0, 0), (31, 31)), ((15, 15), (15, 16)), ((4, 20), (20, 4))])
+def test_find_path(benchmark, start, target):
+    benchmark(find_path, start, target, rng=random.Random(0))
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_try_alternative_moves(benchmark, density):
+    _, agent_positions, _, _ = make_state(*density)
+    i, j, _ = agent_positions[0]
+
+    benchmark(try_alternative_moves, (i, j), agent_positions, rng=random.Random(0))
+
+
+@pytest.mark.parametrize('density', DENSITIES, ids=density_id)
+def test_rand_list(benchmark, density):
+    num_agents, num_wastes = density
+    agents = rand_list(num_agents, third_arg=True, rng=random.Random(0))
+
+    benchmark(rand_list, num_wastes, agent_positions=agents, wastes=True, rng=random.Random(0))
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+def test_place_large_board(benchmark, distribution):
+    # Start of a game on the largest board, which is never listed
+    benchmark(place, 1000, 10000, random.Random(0), 4096, 4096, distribution)
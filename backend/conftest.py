@@ -0,0 +1,57 @@
+import os
+from pathlib import Path
+
+import django
+import pytest
+from pytest_benchmark.utils import get_machine_id, parse_compare_fail
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api.settings')
+django.setup()
+
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from walle.cache import game_cache
+
+# Slowdown against the baseline above which a benchmark fails the run
+REGRESSION_THRESHOLD = 'min:25%'
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--fail-on-regression', action='store_true',
+        help=f"fail the run when a benchmark is slower than the last saved baseline ({REGRESSION_THRESHOLD})",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config):
+    """
+    With --fail-on-regression, fail on regressions against the last saved run of this machine
+    Plain runs only report the comparison, so timing noise never fails the tests
+    """
+    if not config.getoption('fail_on_regression') or config.getoption('benchmark_compare_fail'):
+        return
+    storage = Path(config.getoption('benchmark_storage').removeprefix('file://')) / get_machine_id()
+    if any(storage.glob('*.json')):
+        config.option.benchmark_compare_fail = [parse_compare_fail(REGRESSION_THRESHOLD)]
+
+
+@pytest.fixture(scope='session')
+def django_db():
+    """
+    Run the tests against a throwaway in-memory database
+    """
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    yield
+    game_cache.clear()
+    connection.creation.destroy_test_db(old_name, verbosity=0)
+    teardown_test_environment()
+
+
+@pytest.fixture
+def client(django_db):
+    yield Client()
+    game_cache.clear()
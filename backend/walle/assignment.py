@@ -0,0 +1,239 @@
+from collections import deque
+
+# Agents pick the closest known waste again on every turn, in the shuffled
+# movement order (the original behaviour)
+PER_TURN = 'per-turn'
+# Targets are kept until collected, idle agents take the closest free waste in turn
+GREEDY = 'greedy'
+# Idle agents bid for the free wastes, close to the least total distance
+AUCTION = 'auction'
+# Idle agents get the free wastes minimizing the total distance
+HUNGARIAN = 'hungarian'
+STRATEGIES = (PER_TURN, GREEDY, AUCTION, HUNGARIAN)
+
+# Wastes each agent bids for in an auction, the closest ones
+AUCTION_CANDIDATES = 16
+# Minimum raise of a bid, the total distance of an auction is within this
+# much per agent of the least one
+AUCTION_EPSILON = 0.25
+
+# Largest smaller side squared times larger side of a cost matrix solved
+# exactly, about 30 ms in pure Python: larger ones go to an auction
+HUNGARIAN_LIMIT = 2_000_000
+
+
+def distance(pos1, pos2):
+    return abs(pos1[0] - pos2[0]) + abs(pos1[1] - pos2[1])
+
+
+def assign_greedy(agents, wastes):
+    """
+    Give each agent in turn the closest waste left
+    Returns (agent index, waste index) pairs, agents beyond the number of wastes get none
+    """
+    free = dict.fromkeys(range(len(wastes)))
+    pairs = []
+    for agent, pos in enumerate(agents):
+        if not free:
+            break
+        waste = min(free, key=lambda k: distance(pos, wastes[k]))
+        del free[waste]
+        pairs.append((agent, waste))
+    return pairs
+
+
+def _hungarian(cost):
+    """
+    Solve the assignment problem of a rows x columns cost matrix with rows <= columns
+    Returns the column of each row
+    """
+    rows, columns = len(cost), len(cost[0])
+    infinity = float('inf')
+
+    # Potentials of the rows and columns, row matched to each column (1-based, 0 for none)
+    u = [0] * (rows + 1)
+    v = [0] * (columns + 1)
+    match = [0] * (columns + 1)
+    way = [0] * (columns + 1)
+
+    for row in range(1, rows + 1):
+        # Grow a shortest augmenting path from the new row to a free column
+        match[0] = row
+        column = 0
+        shortest = [infinity] * (columns + 1)
+        used = [False] * (columns + 1)
+        while True:
+            used[column] = True
+            current_row = match[column]
+            costs = cost[current_row - 1]
+            offset = u[current_row]
+            delta = infinity
+            next_column = 0
+            for j in range(1, columns + 1):
+                if not used[j]:
+                    reduced = costs[j - 1] - offset - v[j]
+                    if reduced < shortest[j]:
+                        shortest[j] = reduced
+                        way[j] = column
+                    if shortest[j] < delta:
+                        delta = shortest[j]
+                        next_column = j
+            for j in range(columns + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    shortest[j] -= delta
+            column = next_column
+            if not match[column]:
+                break
+
+        # Flip the matches along the path
+        while column:
+            previous = way[column]
+            match[column] = match[previous]
+            column = previous
+
+    assignment = [0] * rows
+    for column in range(1, columns + 1):
+        if match[column]:
+            assignment[match[column] - 1] = column - 1
+    return assignment
+
+
+def assign_hungarian(agents, wastes):
+    """
+    Match agents and wastes so that the total Manhattan distance is the least
+    Returns (agent index, waste index) pairs
+
+    The exact solution takes cubic time, above HUNGARIAN_LIMIT the auction
+    gets close to it much faster.
+    """
+    if not agents or not wastes:
+        return []
+    smaller, larger = sorted((len(agents), len(wastes)))
+    if smaller * smaller * larger > HUNGARIAN_LIMIT:
+        return assign_auction(agents, wastes)
+    if len(agents) <= len(wastes):
+        cost = [[distance(pos, waste) for waste in wastes] for pos in agents]
+        return list(enumerate(_hungarian(cost)))
+
+    # More agents than wastes: match every waste to an agent instead
+    cost = [[distance(pos, waste) for pos in agents] for waste in wastes]
+    return [(agent, waste) for waste, agent in enumerate(_hungarian(cost))]
+
+
+def assign_auction(agents, wastes, candidates=AUCTION_CANDIDATES, epsilon=AUCTION_EPSILON):
+    """
+    Match agents and wastes with a forward auction on the closest candidates
+    Returns (agent index, waste index) pairs
+
+    The smaller side bids for the other one. A bidder whose candidates all
+    got more expensive than any distance on the board drops out unmatched.
+    """
+    if not agents or not wastes:
+        return []
+    swapped = len(agents) > len(wastes)
+    bidders, objects = (wastes, agents) if swapped else (agents, wastes)
+
+    options = []
+    for pos in bidders:
+        costs = sorted((distance(pos, item), k) for k, item in enumerate(objects))
+        options.append(costs[:candidates])
+    price_limit = max(cost for costs in options for cost, _ in costs) + 1
+
+    prices = [0.0] * len(objects)
+    owners = {}
+    waiting = deque(range(len(bidders)))
+    while waiting:
+        bidder = waiting.popleft()
+
+        # Best and second best value of the candidates at their current prices
+        best = second = None
+        best_value = second_value = float('-inf')
+        for cost, item in options[bidder]:
+            value = -cost - prices[item]
+            if value > best_value:
+                second, second_value = best, best_value
+                best, best_value = item, value
+            elif value > second_value:
+                second, second_value = item, value
+
+        raised = prices[best] + epsilon + (
+            best_value - second_value if second is not None else price_limit
+        )
+        if raised > price_limit:
+            if prices[best] + epsilon > price_limit:
+                continue
+            raised = price_limit
+        prices[best] = raised
+
+        outbid = owners.get(best)
+        owners[best] = bidder
+        if outbid is not None:
+            waiting.append(outbid)
+
+    if swapped:
+        return sorted((agent, waste) for agent, waste in owners.items())
+    return sorted((agent, waste) for waste, agent in owners.items())
+
+
+ASSIGNERS = {
+    GREEDY: assign_greedy,
+    AUCTION: assign_auction,
+    HUNGARIAN: assign_hungarian,
+}
+
+
+class Assignments:
+    """
+    Waste targeted by each agent of a board, kept from turn to turn
+
+    The targets are repaired at the start of each turn: those collected or
+    of agents now carrying are dropped, then the idle agents are matched to
+    the free known wastes by the strategy. Targets are mirrored as assigned
+    wastes in the board's known waste index.
+    """
+    def __init__(self, strategy):
+        self.assign = ASSIGNERS[strategy]
+        self.targets = {}
+
+    def repair(self, board):
+        known_index = board.known_index
+        for agent, waste in list(self.targets.items()):
+            if board.agents[agent][2] or waste not in board.known_wastes:
+                del self.targets[agent]
+                known_index.release(waste)
+
+        # Agents standing on a known waste pick it up instead of moving
+        idle = [
+            (agent, (x, y)) for agent, (x, y, w) in enumerate(board.agents)
+            if not w and agent not in self.targets and not board.is_known_waste(x, y)
+        ]
+        if not idle or len(known_index.assigned) == known_index.count:
+            return
+        free = [waste for waste in board.known_wastes if waste not in known_index.assigned]
+
+        for agent, waste in self.assign([pos for _, pos in idle], free):
+            self.set_target(board, idle[agent][0], free[waste])
+
+    def set_target(self, board, agent, waste):
+        self.targets[agent] = waste
+        board.known_index.assign(waste)
+
+    def target(self, board, agent):
+        """
+        Return the waste targeted by an agent, None when it has to explore
+
+        An agent whose target was picked up by another one during the turn,
+        or that got none at the start of it, takes the closest free waste.
+        """
+        waste = self.targets.get(agent)
+        if waste is not None and waste in board.known_wastes:
+            return waste
+
+        x, y, _ = board.agents[agent]
+        waste = board.known_index.nearest((x, y), skip_assigned=True)
+        if waste is not None:
+            self.set_target(board, agent, waste)
+        return waste
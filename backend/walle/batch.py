@@ -0,0 +1,344 @@
+import numpy as np
+
+from .board import VISION_RADIUS
+
+# Keep the (games x agents x wastes) distance block used for targeting under
+# this many elements, so large batches are processed in chunks
+TARGETING_CHUNK = 1 << 23
+
+STEPS = np.array([(1, 0), (-1, 0), (0, 1), (0, -1)])
+
+# Cells within two steps of an agent: the agents on them are the only ones
+# whose moves can change the cells it may step to
+NEARBY = np.array([
+    (dx, dy) for dx in range(-2, 3) for dy in range(-2, 3) if 0 < abs(dx) + abs(dy) <= 2
+])
+
+
+class GameBatch:
+    """
+    State of many independent games stored as NumPy arrays
+
+    Games of a batch share the board size but may differ in their number of
+    agents and wastes: agent slots beyond a game's own count are disabled in
+    `agent_mask`.
+    """
+    def __init__(self, agents, carrying, agent_mask, wastes, known, waste_cells, base, num_wastes, grid_size=32):
+        self.grid_size = grid_size
+        self.agents = agents              # (games, agents, 2) coordinates
+        self.carrying = carrying          # (games, agents) carry flags
+        self.agent_mask = agent_mask      # (games, agents) enabled agent slots
+        self.wastes = wastes              # (games, size, size) remaining wastes
+        self.known = known                # (games, size, size) known wastes
+        self.waste_cells = waste_cells    # (games, wastes, 2) initial waste coordinates
+        self.base = base                  # (games, 2) base positions
+        self.num_wastes = num_wastes      # (games,) wastes to collect
+        self.waste_collected = np.zeros(len(base), dtype=np.int64)
+        self.turn_number = np.zeros(len(base), dtype=np.int64)
+
+    @property
+    def num_games(self):
+        return len(self.base)
+
+    @property
+    def done(self):
+        return self.waste_collected >= self.num_wastes
+
+    def game_state(self, game):
+        """
+        Return one game of the batch in the list format used by next_turn
+        """
+        mask = self.agent_mask[game]
+        agent_positions = [
+            [int(x), int(y), bool(w)]
+            for (x, y), w in zip(self.agents[game][mask], self.carrying[game][mask])
+        ]
+        waste_positions = np.argwhere(self.wastes[game]).tolist()
+        known_waste_positions = np.argwhere(self.known[game]).tolist()
+        return waste_positions, agent_positions, known_waste_positions, int(self.waste_collected[game])
+
+
+def start_batch(configurations, grid_size=32, rng=None):
+    """
+    Create a batch of games from (num_agents, num_wastes, base_x, base_y) tuples
+    """
+    rng = np.random.default_rng(rng)
+    configurations = np.asarray(configurations, dtype=np.int64).reshape(-1, 4)
+    num_games = len(configurations)
+    num_agents = configurations[:, 0]
+    num_wastes = configurations[:, 1]
+    cells = grid_size * grid_size
+
+    if (num_agents + num_wastes > cells).any():
+        raise ValueError("Too many agents or wastes for the board size.")
+
+    max_agents = int(num_agents.max(initial=0))
+    max_wastes = int(num_wastes.max(initial=0))
+
+    # Draw distinct cells for every game at once: agents take the first
+    # num_agents cells of a random permutation, wastes the following ones
+    order = rng.random((num_games, cells)).argsort(axis=1)[:, :max_agents + max_wastes]
+
+    slots = np.arange(max_agents)
+    agent_mask = slots[None, :] < num_agents[:, None]
+    agent_cells = order[:, :max_agents]
+    agents = np.stack((agent_cells // grid_size, agent_cells % grid_size), axis=-1)
+    agents[~agent_mask] = 0
+
+    # Wastes come right after each game's own agents in the permutation.
+    # Padding slots may point past the drawn cells, they are masked anyway
+    waste_slots = np.minimum(num_agents[:, None] + np.arange(max_wastes)[None, :], order.shape[1] - 1)
+    waste_mask = np.arange(max_wastes)[None, :] < num_wastes[:, None]
+    waste_cells = np.take_along_axis(order, waste_slots, axis=1)
+    wastes = np.zeros((num_games, cells), dtype=bool)
+    games = np.broadcast_to(np.arange(num_games)[:, None], waste_cells.shape)
+    wastes[games[waste_mask], waste_cells[waste_mask]] = True
+
+    # Padding slots repeat the first drawn cell of the game, which holds an
+    # agent and never a waste unless the game has no agent at all
+    waste_cells = np.where(waste_mask, waste_cells, order[:, :1])
+
+    return GameBatch(
+        agents=agents.astype(np.int64),
+        carrying=np.zeros((num_games, max_agents), dtype=bool),
+        agent_mask=agent_mask,
+        wastes=wastes.reshape(num_games, grid_size, grid_size),
+        known=np.zeros((num_games, grid_size, grid_size), dtype=bool),
+        waste_cells=np.stack((waste_cells // grid_size, waste_cells % grid_size), axis=-1),
+        base=configurations[:, 2:4].copy(),
+        num_wastes=num_wastes.copy(),
+        grid_size=grid_size,
+    )
+
+
+def _window_sums(grid, radius):
+    """
+    Sum of each (2 * radius + 1) square window of a batch of grids, clipped to the board
+    """
+    num_games, size, _ = grid.shape
+    sums = np.zeros((num_games, size + 1, size + 1), dtype=np.int32)
+    sums[:, 1:, 1:] = grid.cumsum(axis=1).cumsum(axis=2)
+
+    cells = np.arange(size)
+    lo = np.maximum(cells - radius, 0)
+    hi = np.minimum(cells + radius + 1, size)
+    return (
+        sums[:, hi][:, :, hi]
+        - sums[:, lo][:, :, hi]
+        - sums[:, hi][:, :, lo]
+        + sums[:, lo][:, :, lo]
+    )
+
+
+def _closest_known_wastes(batch, x, y, seeking, priority):
+    """
+    Known waste targets of every agent, as two (games, agents) arrays
+
+    As closest_waste does with the wastes assigned during a turn, seeking
+    agents spread over the known wastes: each one gets the closest waste no
+    other agent took, the agent with the lowest random priority winning a
+    waste several agents want, and the losers trying their next closest
+    waste. Agents left over once every known waste is taken, and agents not
+    seeking, head to the Manhattan-closest known waste.
+    """
+    size = batch.grid_size
+    num_games, num_agents = x.shape
+    games = np.arange(num_games)[:, None]
+    waste_x, waste_y = batch.waste_cells[..., 0], batch.waste_cells[..., 1]
+    if not waste_x.shape[1]:
+        return x, y
+
+    # A waste slot is a candidate while its waste is known and not collected,
+    # other slots are pushed out of reach. Distances fit in 16 bits, which
+    # halves the memory traffic of the (games, agents, wastes) block
+    far = 2 * size
+    penalty = np.where(batch.known[games, waste_x, waste_y], 0, far).astype(np.int16)
+    agent_x, agent_y = x.astype(np.int16), y.astype(np.int16)
+    candidate_x, candidate_y = waste_x.astype(np.int16), waste_y.astype(np.int16)
+
+    closest = np.zeros((num_games, num_agents), dtype=np.int64)
+    chunk = max(1, TARGETING_CHUNK // max(1, num_agents * waste_x.shape[1]))
+    for start in range(0, num_games, chunk):
+        stop = start + chunk
+        distance = np.abs(agent_x[start:stop, :, None] - candidate_x[start:stop, None, :])
+        distance += np.abs(agent_y[start:stop, :, None] - candidate_y[start:stop, None, :])
+        distance += penalty[start:stop, None, :]
+        choice = distance.argmin(axis=2)
+        closest[start:stop] = choice
+
+        # Rounds of claims, every waste claimed in a round going to one agent
+        chunk_games = np.broadcast_to(np.arange(len(choice))[:, None], choice.shape)
+        chunk_priority = priority[start:stop]
+        claiming = seeking[start:stop] & (np.take_along_axis(distance, choice[..., None], axis=2)[..., 0] < far)
+        best = np.empty((len(choice), waste_x.shape[1]))
+        while claiming.any():
+            best.fill(np.inf)
+            np.minimum.at(best, (chunk_games[claiming], choice[claiming]), chunk_priority[claiming])
+            won = claiming & (best[chunk_games, choice] == chunk_priority)
+            closest[start:stop][won] = choice[won]
+            distance[chunk_games[won], :, choice[won]] = far
+
+            # The losers move on to their closest waste left
+            claiming &= ~won
+            rows = distance[chunk_games[claiming], np.nonzero(claiming)[1]]
+            choice[claiming] = rows.argmin(axis=1)
+            claiming[claiming] = rows.min(axis=1) < far
+
+    return (
+        np.take_along_axis(waste_x, closest, axis=1),
+        np.take_along_axis(waste_y, closest, axis=1),
+    )
+
+
+def _exploration_targets(batch, rng):
+    """
+    Sector-based exploration targets, as in closest_waste when no waste is known
+    """
+    size = batch.grid_size
+    num_games, num_agents = batch.agent_mask.shape
+    agents_count = np.maximum(batch.agent_mask.sum(axis=1, keepdims=True), 1)
+    sector_size = size // np.minimum(4, agents_count)
+
+    index = np.arange(num_agents)[None, :]
+    sector_x = (index % 2) * sector_size + rng.integers(0, sector_size, size=(num_games, num_agents))
+    sector_y = ((index // 2) % 2) * sector_size + rng.integers(0, sector_size, size=(num_games, num_agents))
+    offset_x = rng.integers(-5, 6, size=(num_games, num_agents))
+    offset_y = rng.integers(-5, 6, size=(num_games, num_agents))
+
+    spread = size // sector_size // 2
+    target_x = np.clip(sector_x * spread + offset_x, 0, size - 1)
+    target_y = np.clip(sector_y * spread + offset_y, 0, size - 1)
+    return target_x, target_y
+
+
+def _move_in_order(batch, games, moving, next_x, next_y, priority, rng):
+    """
+    Move the agents one after the other in priority order, as next_turn does
+
+    An agent steps to its cell when it is free by its turn, otherwise to the
+    first free neighbour in a random order, otherwise stays. Its moves only
+    depend on the agents before it within two cells, so every agent with
+    none of them left to move plays in the same round, the agents of a round
+    being too far apart to get in each other's way.
+    """
+    size = batch.grid_size
+    num_games = len(games)
+    # Grids padded with two cells, occupied so that nobody steps off the board
+    occupancy = np.ones((num_games, size + 4, size + 4), dtype=np.int32)
+    occupancy[:, 2:-2, 2:-2] = 0
+    mask = batch.agent_mask
+    np.add.at(occupancy, (games[mask], batch.agents[..., 0][mask] + 2, batch.agents[..., 1][mask] + 2), 1)
+    # Priority of the agents yet to move, on their cells
+    waiting = np.full((num_games, size + 4, size + 4), np.inf)
+
+    game, agent = np.nonzero(moving)
+    x, y = batch.agents[game, agent, 0] + 2, batch.agents[game, agent, 1] + 2
+    step_x, step_y = next_x[game, agent] + 2, next_y[game, agent] + 2
+    order = priority[game, agent]
+    waiting[game, x, y] = order
+
+    while len(game):
+        before = waiting[game[:, None], x[:, None] + NEARBY[:, 0], y[:, None] + NEARBY[:, 1]].min(axis=1)
+        ready = before > order
+        g, a, i, j = game[ready], agent[ready], x[ready], y[ready]
+
+        free_step = occupancy[g, step_x[ready], step_y[ready]] == 0
+        side_x, side_y = i[:, None] + STEPS[:, 0], j[:, None] + STEPS[:, 1]
+        free_sides = occupancy[g[:, None], side_x, side_y] == 0
+        side = np.where(free_sides, rng.random(free_sides.shape), -1.0).argmax(axis=1)[:, None]
+        stays = ~free_step & ~free_sides.any(axis=1)
+        new_x = np.where(free_step, step_x[ready], np.take_along_axis(side_x, side, axis=1)[:, 0])
+        new_y = np.where(free_step, step_y[ready], np.take_along_axis(side_y, side, axis=1)[:, 0])
+        new_x, new_y = np.where(stays, i, new_x), np.where(stays, j, new_y)
+
+        occupancy[g, i, j] -= 1
+        occupancy[g, new_x, new_y] += 1
+        waiting[g, i, j] = np.inf
+        batch.agents[g, a, 0], batch.agents[g, a, 1] = new_x - 2, new_y - 2
+
+        left = ~ready
+        game, agent, x, y = game[left], agent[left], x[left], y[left]
+        step_x, step_y, order = step_x[left], step_y[left], order[left]
+
+
+def next_turn_batch(batch, rng=None):
+    """
+    Play one turn of every unfinished game of the batch in place
+
+    Vision, targeting and the greedy step of find_path are computed for the
+    whole batch at once, and agents move in a random order as in next_turn,
+    so a batch plays the same games as next_turn with the default options.
+    It does not draw the same random numbers, so a game does not go the same
+    way turn by turn, and the wastes of a turn go to the agents in rounds of
+    claims, see _closest_known_wastes, rather than one agent after the other.
+    """
+    rng = np.random.default_rng(rng)
+    size = batch.grid_size
+    num_games, num_agents = batch.agent_mask.shape
+    if not num_agents:
+        return batch
+
+    games = np.broadcast_to(np.arange(num_games)[:, None], (num_games, num_agents))
+    running = ~batch.done
+    active = batch.agent_mask & running[:, None]
+    x, y = batch.agents[..., 0], batch.agents[..., 1]
+
+    # Occupancy grid of every game, used for vision and collisions
+    occupancy = np.zeros((num_games, size, size), dtype=np.int32)
+    np.add.at(occupancy, (games[batch.agent_mask], x[batch.agent_mask], y[batch.agent_mask]), 1)
+
+    # Update the known waste positions: a cell is seen when an agent stands
+    # in the 11x11 square around it
+    visible = _window_sums(occupancy, VISION_RADIUS) > 0
+    batch.known |= batch.wastes & visible & running[:, None, None]
+
+    # Drop waste if agent is at base
+    at_base = (
+        active & batch.carrying
+        & (x == batch.base[:, 0:1]) & (y == batch.base[:, 1:2])
+    )
+    batch.carrying[at_base] = False
+    batch.waste_collected += at_base.sum(axis=1)
+
+    # If is on waste, collect it
+    on_waste = active & ~batch.carrying & ~at_base & batch.known[games, x, y]
+    batch.carrying[on_waste] = True
+    batch.wastes[games[on_waste], x[on_waste], y[on_waste]] = False
+    batch.known[games[on_waste], x[on_waste], y[on_waste]] = False
+
+    moving = active & ~at_base & ~on_waste
+
+    # Determine target positions: base when carrying, closest known waste
+    # otherwise, or an exploration target when no waste is known
+    # Order in which the agents pick their wastes and move, as the shuffled
+    # priority list of next_turn
+    priority = rng.random((num_games, num_agents))
+    target_x, target_y = _closest_known_wastes(batch, x, y, moving & ~batch.carrying, priority)
+    explore_x, explore_y = _exploration_targets(batch, rng)
+    exploring = ~batch.known.reshape(num_games, -1).any(axis=1)[:, None]
+    target_x = np.where(exploring, explore_x, target_x)
+    target_y = np.where(exploring, explore_y, target_y)
+    target_x = np.where(batch.carrying, batch.base[:, 0:1], target_x)
+    target_y = np.where(batch.carrying, batch.base[:, 1:2], target_y)
+
+    # Greedy step of find_path, with the same per-agent random factors
+    dx, dy = target_x - x, target_y - y
+    random_factor = 0.2 + (np.arange(num_agents) % 5) * 0.05
+    randomised = rng.random((num_games, num_agents)) < random_factor
+    horizontal_first = rng.random((num_games, num_agents)) < 0.5
+    diagonal_pick = rng.random((num_games, num_agents)) < 0.5
+
+    horizontal = np.where(
+        randomised,
+        np.where(horizontal_first, dx != 0, dy == 0),
+        (np.abs(dx) > np.abs(dy)) | ((np.abs(dx) == np.abs(dy)) & diagonal_pick),
+    )
+    next_x = np.clip(x + np.where(horizontal, np.sign(dx), 0), 0, size - 1)
+    next_y = np.clip(y + np.where(horizontal, 0, np.sign(dy)), 0, size - 1)
+
+    # An agent whose step is its own cell stays, without looking for another cell
+    moving &= ~((next_x == x) & (next_y == y))
+    _move_in_order(batch, games, moving, next_x, next_y, priority, rng)
+    batch.turn_number += running
+
+    return batch
@@ -0,0 +1,415 @@
+import random
+
+from .assignment import PER_TURN, Assignments
+from .encoding import decode_plan, encode_plan
+from .movement import RESERVED, SEQUENTIAL
+from .planner import GREEDY, PLANNER, Planner
+
+# Values stored in the waste layer of the board
+NO_WASTE = 0
+HIDDEN_WASTE = 1
+KNOWN_WASTE = 2
+
+# Agents see every cell within this many steps on each axis (11x11 square)
+VISION_RADIUS = 5
+
+DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+# Side of the square areas the known wastes are bucketed by
+BUCKET_SIZE = 4
+
+# Most buckets along a side of the board, larger boards get larger buckets
+MAX_BUCKETS_PER_SIDE = 256
+
+# Bounds of the board sides
+MIN_GRID_SIZE = 4
+MAX_GRID_SIZE = 4096
+
+# Boards with more cells keep their agent and waste layers in dicts, so
+# that their memory grows with the agents and wastes instead of the area
+DENSE_CELL_LIMIT = 1 << 20
+
+
+class SparseLayer(dict):
+    """
+    Layer of a large board that only holds its non-zero cells, indexed like
+    the dense ones
+    """
+    __slots__ = ()
+
+    def __missing__(self, cell):
+        return 0
+
+    def __setitem__(self, cell, value):
+        if value:
+            dict.__setitem__(self, cell, value)
+        else:
+            self.pop(cell, None)
+
+
+class WasteIndex:
+    """
+    Wastes bucketed by square areas of the grid, for nearest-waste queries
+
+    Each waste keeps the rank it was added with, so that ties are broken as
+    a scan of the wastes in insertion order would. Wastes can be marked as
+    assigned to an agent, to be skipped by the queries that ask for it.
+    Only the buckets holding wastes are kept.
+    """
+    def __init__(self, width, height, positions=()):
+        self.bucket_size = max(BUCKET_SIZE, -(-max(width, height) // MAX_BUCKETS_PER_SIDE))
+        self.rows = -(-width // self.bucket_size)
+        self.columns = -(-height // self.bucket_size)
+        self.buckets = {}
+        self.rank = 0
+        self.count = 0
+
+        # Number of agents each waste is assigned to
+        self.assigned = {}
+
+        for pos in positions:
+            self.add(pos)
+
+    def _key(self, pos):
+        return (pos[0] // self.bucket_size) * self.columns + pos[1] // self.bucket_size
+
+    def add(self, pos):
+        self.buckets.setdefault(self._key(pos), {})[pos] = self.rank
+        self.rank += 1
+        self.count += 1
+
+    def remove(self, pos):
+        key = self._key(pos)
+        bucket = self.buckets[key]
+        del bucket[pos]
+        if not bucket:
+            del self.buckets[key]
+        self.assigned.pop(pos, None)
+        self.count -= 1
+
+    def assign(self, pos):
+        """
+        Mark a waste as the target of one more agent, positions that are not wastes are ignored
+        """
+        if pos in self.buckets.get(self._key(pos), ()):
+            self.assigned[pos] = self.assigned.get(pos, 0) + 1
+
+    def release(self, pos):
+        """
+        Undo one assign of a waste
+        """
+        count = self.assigned.get(pos)
+        if count == 1:
+            del self.assigned[pos]
+        elif count:
+            self.assigned[pos] = count - 1
+
+    def clear_assignments(self):
+        self.assigned.clear()
+
+    def nearest(self, pos, skip_assigned=False):
+        """
+        Return the closest waste to a position by Manhattan distance, the first
+        added one on ties, or None when there is none
+
+        Buckets are visited in rings around the position's bucket, until the
+        next ring is farther than the best waste found, or until more buckets
+        were looked at than there are buckets holding wastes, which are then
+        all checked at once.
+        """
+        x, y = pos
+        size = self.bucket_size
+        rows, columns = self.rows, self.columns
+        bucket_x, bucket_y = x // size, y // size
+        skipped = self.assigned if skip_assigned else ()
+        if len(skipped) == self.count:
+            return None
+
+        buckets = self.buckets
+        best = None
+        best_key = None
+        looked_at = 0
+        last_ring = max(bucket_x, rows - 1 - bucket_x, bucket_y, columns - 1 - bucket_y)
+        for ring in range(last_ring + 1):
+            # Every cell of a bucket of this ring is at least that far on one axis
+            if best_key is not None and (ring - 1) * size + 1 > best_key[0]:
+                break
+
+            every_bucket = looked_at > len(buckets)
+            if every_bucket:
+                ring_buckets = buckets.values()
+            else:
+                ring_buckets = []
+                for bx in range(max(0, bucket_x - ring), min(rows, bucket_x + ring + 1)):
+                    # Only the first and last columns of the ring are full, the
+                    # other ones only have their two ends in the ring
+                    if bx in (bucket_x - ring, bucket_x + ring):
+                        ring_columns = range(max(0, bucket_y - ring), min(columns, bucket_y + ring + 1))
+                    else:
+                        ring_columns = [by for by in (bucket_y - ring, bucket_y + ring) if 0 <= by < columns]
+                    looked_at += len(ring_columns)
+                    for by in ring_columns:
+                        bucket = buckets.get(bx * columns + by)
+                        if bucket:
+                            ring_buckets.append(bucket)
+
+            for bucket in ring_buckets:
+                for waste, rank in bucket.items():
+                    if waste in skipped:
+                        continue
+                    key = (abs(waste[0] - x) + abs(waste[1] - y), rank)
+                    if best_key is None or key < best_key:
+                        best, best_key = waste, key
+            if every_bucket:
+                break
+        return best
+
+
+class Board:
+    """
+    Simulation state backed by occupancy layers of the grid
+
+    Cells are indexed by x * height + y. Boards up to DENSE_CELL_LIMIT cells
+    keep their layers in arrays, larger ones in sparse layers.
+    """
+    def __init__(self, waste_positions, agent_positions, known_waste_positions, width=32, height=32,
+                 assignment=PER_TURN, pathing=GREEDY, movement=SEQUENTIAL, plan=b''):
+        self.width = width
+        self.height = height
+        cells = width * height
+        self.sparse = cells > DENSE_CELL_LIMIT
+        layer = SparseLayer if self.sparse else (lambda: bytearray(cells))
+
+        # Agents keep their index, so they are stored as a list of (x, y, carrying)
+        self.agents = [(x, y, bool(w)) for x, y, w in agent_positions]
+
+        # Number of agents standing on each cell
+        self.agent_grid = layer()
+        for x, y, _ in self.agents:
+            self.agent_grid[x * height + y] += 1
+
+        # Agent standing on each occupied cell
+        self.occupants = {(x, y): index for index, (x, y, _) in enumerate(self.agents)}
+
+        # Wastes are kept in insertion-ordered dicts used as ordered sets, so the
+        # lists sent back to the client keep the same order as before
+        self.wastes = dict.fromkeys(tuple(pos) for pos in waste_positions)
+        self.known_wastes = dict.fromkeys(tuple(pos) for pos in known_waste_positions)
+        self.known_index = WasteIndex(width, height, self.known_wastes)
+
+        # Waste layer of the grid: hidden or known waste on each cell
+        self.waste_grid = layer()
+        for x, y in self.wastes:
+            self.waste_grid[x * height + y] = HIDDEN_WASTE
+        for x, y in self.known_wastes:
+            self.waste_grid[x * height + y] = KNOWN_WASTE
+        self.hidden_count = len(self.wastes) - len(self.known_wastes)
+
+        # Position of each agent at its last vision scan, None before the first one
+        self.scanned = [None] * len(self.agents)
+        # Cells in sight of an agent at one of the scans, one bit per cell on sparse boards
+        self.seen = bytearray((cells + 7) // 8 if self.sparse else cells)
+        # Cells that may still hide a waste: never in sight, and none once every waste is known
+        self.unseen_count = cells if self.hidden_count else 0
+
+        # Targets kept across turns, None when they are chosen again every turn
+        self.assignments = None if assignment == PER_TURN else Assignments(assignment)
+
+        # Whether the agents' moves of a turn are resolved all at once
+        self.simultaneous = movement == RESERVED
+
+        # Routing of the agents kept across turns, None for single greedy steps
+        self.planner = Planner(width, height, self.simultaneous) if pathing == PLANNER else None
+
+        # Pick up the targets and paths of a game saved with plan_data
+        if plan:
+            self.load_plan(plan)
+
+    def plan_data(self):
+        """
+        Pack the state kept across turns besides the positions, so that a
+        game saved and loaded again plays the same turns as one that stayed
+        in memory. Empty when the board keeps none
+        """
+        planner = self.planner
+        if self.assignments is None and planner is None:
+            return b''
+        targets = self.assignments.targets if self.assignments is not None else {}
+        if planner is None:
+            return encode_plan(targets, {}, {}, {}, b'')
+        return encode_plan(targets, planner.exploring, planner.blocked, planner.paths, self.seen)
+
+    def load_plan(self, data):
+        targets, exploring, blocked, paths, seen = decode_plan(data)
+        if self.assignments is not None:
+            for agent, waste in targets.items():
+                self.assignments.set_target(self, agent, waste)
+        if self.planner is not None:
+            self.planner.restore(exploring, blocked, paths)
+            if len(seen) == len(self.seen):
+                self.seen = seen
+                if self.hidden_count:
+                    self.unseen_count = (
+                        self.width * self.height - int.from_bytes(seen, 'little').bit_count()
+                        if self.sparse else seen.count(0)
+                    )
+
+    def reveal(self):
+        """
+        Add every hidden waste in sight of an agent to the known wastes
+
+        Wastes never appear, so the cells an agent saw at its last scan hold
+        no hidden waste anymore: after a one-cell step only the strip coming
+        into sight is scanned, and an agent that did not move is skipped.
+        """
+        if not self.hidden_count:
+            # Nothing is left to find, sight is not tracked anymore
+            self.unseen_count = 0
+            return
+
+        width, height = self.width, self.height
+        scanned = self.scanned
+        for index, (i, j, _) in enumerate(self.agents):
+            last = scanned[index]
+            if last == (i, j):
+                continue
+            scanned[index] = (i, j)
+
+            rows = range(max(0, i - VISION_RADIUS), min(width, i + VISION_RADIUS + 1))
+            columns = range(max(0, j - VISION_RADIUS), min(height, j + VISION_RADIUS + 1))
+            if last is not None and abs(i - last[0]) + abs(j - last[1]) == 1:
+                if i != last[0]:
+                    row = i + (i - last[0]) * VISION_RADIUS
+                    rows = range(row, row + 1) if 0 <= row < width else range(0)
+                else:
+                    column = j + (j - last[1]) * VISION_RADIUS
+                    columns = range(column, column + 1) if 0 <= column < height else range(0)
+            self._reveal_cells(rows, columns)
+
+    def _reveal_cells(self, rows, columns):
+        """
+        Reveal the hidden wastes of a block of cells, in row-major order
+        """
+        height = self.height
+        waste_grid = self.waste_grid
+        seen = self.seen
+        block = b'\x01' * len(columns)
+        for ni in rows:
+            row = ni * height
+            if self.sparse:
+                # Most cells of a sparse layer are missing, look them up without the default
+                for nj in columns:
+                    cell = row + nj
+                    bit = 1 << (cell & 7)
+                    if not seen[cell >> 3] & bit:
+                        seen[cell >> 3] |= bit
+                        self.unseen_count -= 1
+                    if waste_grid.get(cell) == HIDDEN_WASTE:
+                        self._reveal_waste(ni, nj)
+                continue
+
+            self.unseen_count -= len(columns) - seen.count(1, row + columns.start, row + columns.stop)
+            seen[row + columns.start:row + columns.stop] = block
+            for nj in columns:
+                if waste_grid[row + nj] == HIDDEN_WASTE:
+                    self._reveal_waste(ni, nj)
+
+    def _reveal_waste(self, x, y):
+        self.waste_grid[x * self.height + y] = KNOWN_WASTE
+        self.known_wastes[(x, y)] = None
+        self.known_index.add((x, y))
+        self.hidden_count -= 1
+
+    def is_seen(self, x, y):
+        """
+        Check whether a cell came into sight of an agent
+        """
+        cell = x * self.height + y
+        if self.sparse:
+            return bool(self.seen[cell >> 3] & (1 << (cell & 7)))
+        return bool(self.seen[cell])
+
+    def is_known_waste(self, x, y):
+        return self.waste_grid[x * self.height + y] == KNOWN_WASTE
+
+    def pick_up(self, index):
+        """
+        Make the agent pick up the known waste it stands on
+        """
+        x, y, _ = self.agents[index]
+        self.agents[index] = (x, y, True)
+        self.waste_grid[x * self.height + y] = NO_WASTE
+        del self.known_wastes[(x, y)]
+        del self.wastes[(x, y)]
+        self.known_index.remove((x, y))
+
+    def drop(self, index):
+        """
+        Make the agent drop the waste it carries
+        """
+        x, y, _ = self.agents[index]
+        self.agents[index] = (x, y, False)
+
+    def is_free(self, x, y, current=None):
+        """
+        Check that no agent stands on a cell, the agent's own cell being always free
+        """
+        if (x, y) == current:
+            return True
+        return not self.agent_grid[x * self.height + y]
+
+    def move(self, index, x, y):
+        """
+        Move an agent to a new cell, keeping the occupancy grid up to date
+        """
+        i, j, w = self.agents[index]
+        height = self.height
+        self.agent_grid[i * height + j] -= 1
+        self.agent_grid[x * height + y] += 1
+        self.agents[index] = (x, y, w)
+
+        # Another agent may already have taken the cell in a swap
+        if self.occupants.get((i, j)) == index:
+            del self.occupants[(i, j)]
+        self.occupants[(x, y)] = index
+
+    def agent_at(self, x, y):
+        """
+        Return the index of an agent standing on a cell, None when it is free
+        """
+        return self.occupants.get((x, y))
+
+    def swap(self, index, x, y):
+        """
+        Make an agent trade places with the agent standing on a neighbouring cell
+        """
+        i, j, _ = self.agents[index]
+        other = self.occupants[(x, y)]
+        self.move(index, x, y)
+        self.move(other, i, j)
+
+    def free_neighbours(self, x, y, rng=None):
+        """
+        Return the free cells next to a position, in a random order
+        """
+        if rng is None:
+            rng = random
+        width, height = self.width, self.height
+        directions = DIRECTIONS[:]
+        rng.shuffle(directions)  # Randomize to avoid patterns
+
+        moves = []
+        for dx, dy in directions:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < width and 0 <= ny < height and not self.agent_grid[nx * height + ny]:
+                moves.append((nx, ny))
+        return moves
+
+    def to_lists(self):
+        """
+        Convert the board back to lists for JSON serialization
+        """
+        waste_positions = [list(pos) for pos in self.wastes]
+        agent_positions = [list(pos) for pos in self.agents]
+        known_waste_positions = [list(pos) for pos in self.known_wastes]
+        return waste_positions, agent_positions, known_waste_positions
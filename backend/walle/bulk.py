@@ -0,0 +1,69 @@
+import itertools
+import random
+
+from django.db import transaction
+
+from .game_logic import game_rng
+from .metrics import timed
+from .models import Configuration, Game
+from .placement import place
+
+# Games a single bulk request may create
+MAX_BULK_GAMES = 10000
+
+
+def product_size(product):
+    """
+    Number of combinations of a cartesian spec, see expand_product
+    """
+    size = 1
+    for values in product.values():
+        size *= len(values) if isinstance(values, list) else 1
+    return size
+
+
+def expand_product(product):
+    """
+    Build the configurations of every combination of a cartesian spec, which
+    maps configuration fields to a value or a list of values
+    """
+    fields = list(product)
+    values = [value if isinstance(value, list) else [value] for value in product.values()]
+    return [dict(zip(fields, combination)) for combination in itertools.product(*values)]
+
+
+def create_games(configurations):
+    """
+    Place and save the new games of validated configuration data, all in one
+    transaction
+
+    Each game is placed as if it was started through the API, a seed being
+    drawn for the configurations without one, so that a seeded game has the
+    same layout either way. The games are not loaded in the game cache.
+    Returns the ids of the games, in the order of the configurations
+    """
+    configs = []
+    games = []
+    with timed("placement"):
+        for data in configurations:
+            seed = data.get('seed')
+            if seed is None:
+                seed = random.getrandbits(32)
+            config = Configuration(**dict(data, seed=seed))
+            agent_positions, waste_positions = place(
+                config.num_agents, config.num_wastes, game_rng(seed, 0),
+                config.grid_width, config.grid_height, config.placement
+            )
+
+            game = Game(configuration=config, waste_collected=0, is_active=True, turn_number=0)
+            game.waste_positions = waste_positions
+            game.agent_positions = agent_positions
+            game.known_waste_positions = []
+            configs.append(config)
+            games.append(game)
+
+    # The games pick up the ids of their configurations once these are inserted
+    with timed("save"), transaction.atomic():
+        Configuration.objects.bulk_create(configs)
+        Game.objects.bulk_create(games)
+    return [game.id for game in games]
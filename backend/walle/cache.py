@@ -0,0 +1,442 @@
+import atexit
+import threading
+from collections import OrderedDict, deque
+
+from django.conf import settings
+from django.db import transaction
+
+from .board import Board
+from .game_logic import game_rng, play_turn
+from .metrics import timed
+from .models import Game
+from .replay import ReplayRecorder
+from .simulation import run_board
+from .state import GameState
+
+WRITE_THROUGH = 'write-through'
+WRITE_BEHIND = 'write-behind'
+DURABILITY_MODES = (WRITE_THROUGH, WRITE_BEHIND)
+
+DEFAULT_SETTINGS = {
+    'MAX_GAMES': 128,
+    'FLUSH_EVERY': 10,
+    'DURABILITY': WRITE_BEHIND,
+}
+
+# Number of recent turns kept in memory to answer delta requests
+DELTA_HISTORY = 64
+
+# Turns a single next-round request may play, so that the changes since
+# the turn before it can still be sent as a delta
+MAX_ROUND_TURNS = DELTA_HISTORY
+
+# Bytes of replay events a long run keeps in memory before saving the game
+REPLAY_BUFFER = 1 << 20
+
+# Game fields written back to the database on flush
+PERSISTED_FIELDS = ['waste_collected', 'is_active', 'turn_number',
+                    '_waste_positions', '_agent_positions', '_known_waste_positions', 'plan']
+
+
+class StaleGame(Exception):
+    """
+    Raised when saving a live game that was evicted from the cache, or whose
+    row was saved by another process since it was loaded: its turns are
+    dropped, get the game from the cache again and play them on it
+    """
+
+
+class LiveGame:
+    """
+    In-memory state of a game, played without going through the database
+
+    Hold `lock` while reading or changing the state, and check `stale`
+    before playing turns on it.
+    """
+    def __init__(self, game):
+        self.game_id = game.id
+        self.configuration_id = game.configuration_id
+        self.board = Board(
+            game.waste_positions, game.agent_positions, game.known_waste_positions,
+            game.configuration.grid_width, game.configuration.grid_height,
+            assignment=game.configuration.assignment,
+            pathing=game.configuration.pathing,
+            movement=game.configuration.movement,
+            plan=game.plan
+        )
+        self.base_position = [game.configuration.base_position_x, game.configuration.base_position_y]
+        self.grid_size = [game.configuration.grid_width, game.configuration.grid_height]
+        self.total_wastes = game.configuration.num_wastes
+        self.seed = game.configuration.seed
+        self.waste_collected = game.waste_collected
+        self.is_active = game.is_active
+        self.turn_number = game.turn_number
+
+        # Turns played since the state was last written to the database
+        self.dirty_turns = 0
+        # Turn of the row when it was last read or written by this copy, which
+        # a save expects to find so that it never overwrites newer turns
+        self.saved_turn = game.turn_number
+        self.deleted = False
+        # Set once the copy must not be played or saved anymore
+        self.stale = False
+        self.lock = threading.RLock()
+
+        # Changes of the last turns as (turn_number, changed agents, removed wastes)
+        self.history = deque(maxlen=DELTA_HISTORY)
+
+        # Turns to append to the replay log on the next flush
+        self.replay = ReplayRecorder(self.game_id, {
+            "grid_width": self.grid_size[0],
+            "grid_height": self.grid_size[1],
+            "base_position_x": self.base_position[0],
+            "base_position_y": self.base_position[1],
+            "total_wastes": self.total_wastes,
+            "seed": self.seed,
+        }, self.turn_number, self.board, self.waste_collected)
+
+    def state(self):
+        """
+        Build the state sent back to the client, sharing the positions of the board
+        """
+        with timed("conversion"):
+            return GameState.of_board(
+                self.board, self.game_id, self.waste_collected, self.total_wastes,
+                self.base_position, self.turn_number
+            )
+
+    def play_turn(self):
+        """
+        Play the next turn on the cached board
+        Must be called while holding the lock, on an active game
+        """
+        previous_agents = self.board.agents[:]
+        rng = None if self.seed is None else game_rng(self.seed, self.turn_number + 1)
+        self.waste_collected = play_turn(self.board, self.base_position, self.waste_collected, rng)
+        self.turn_number += 1
+        self.record_turn(previous_agents)
+        self.replay.record(self.turn_number, self.board, self.waste_collected)
+
+        # Check if game is over
+        if self.waste_collected >= self.total_wastes:
+            self.is_active = False
+
+    def play_turns(self, turns, frames=None):
+        """
+        Play up to turns turns on the cached board, stopping early when the game is over
+        When frames is given, the changes of each turn are appended to it as
+        [turn_number, waste_collected, changed agents, removed wastes]
+        Must be called while holding the lock, on an active game
+        Returns the number of turns played
+        """
+        played = 0
+        while played < turns and self.is_active:
+            self.play_turn()
+            played += 1
+            if frames is not None:
+                turn_number, changed_agents, removed_wastes = self.history[-1]
+                frames.append([
+                    turn_number,
+                    self.waste_collected,
+                    [[index, x, y, w] for index, (x, y, w) in sorted(changed_agents.items())],
+                    removed_wastes
+                ])
+        return played
+
+    def run(self, max_turns):
+        """
+        Play turns on the cached board until the game is over or max_turns turns
+        Must be called while holding the lock, on an active game
+        Returns the summary of the run
+        """
+        start_turn = self.turn_number
+
+        def turn_played(turns, waste_collected):
+            self.turn_number = start_turn + turns
+            self.waste_collected = waste_collected
+            self.replay.record(self.turn_number, self.board, self.waste_collected)
+            # Long runs are saved as they go rather than holding all their events
+            if self.replay.buffered >= REPLAY_BUFFER:
+                self.dirty_turns += 1
+                self.flush()
+
+        self.waste_collected, summary = run_board(
+            self.board,
+            self.base_position,
+            self.waste_collected,
+            self.total_wastes,
+            max_turns=max_turns,
+            seed=self.seed,
+            turn_number=start_turn,
+            progress=turn_played
+        )
+
+        # Turns played in bulk are not recorded, clients need a full state again
+        self.history.clear()
+
+        # Check if game is over
+        if self.waste_collected >= self.total_wastes:
+            self.is_active = False
+        return summary
+
+    def record_turn(self, previous_agents):
+        """
+        Remember what the last turn changed, given the agents as they were before it
+        """
+        changed_agents = {}
+        removed_wastes = []
+        for index, (old, new) in enumerate(zip(previous_agents, self.board.agents)):
+            if old != new:
+                changed_agents[index] = new
+                # An agent that starts carrying has picked up the waste it stands on
+                if new[2] and not old[2]:
+                    removed_wastes.append([new[0], new[1]])
+        self.history.append((self.turn_number, changed_agents, removed_wastes))
+
+    def delta_since(self, turn_number):
+        """
+        Build the changes between a past turn and the current one
+        Returns None when that turn is too old to be rebuilt from the history
+        """
+        if turn_number > self.turn_number:
+            return None
+        if turn_number < self.turn_number and (
+            not self.history or self.history[0][0] > turn_number + 1
+        ):
+            return None
+
+        changed_agents = {}
+        removed_wastes = []
+        for number, agents, wastes in self.history:
+            if number > turn_number:
+                changed_agents.update(agents)
+                removed_wastes.extend(wastes)
+
+        return {
+            "game_id": self.game_id,
+            "since": turn_number,
+            "waste_collected": self.waste_collected,
+            "total_wastes": self.total_wastes,
+            "changed_agents": [[index, x, y, w] for index, (x, y, w) in sorted(changed_agents.items())],
+            "removed_wastes": removed_wastes,
+            "turn_number": self.turn_number
+        }
+
+    def flush(self):
+        """
+        Write the state back to its Game row if it changed since the last flush
+        Raises StaleGame, leaving the row as it is, when the row is not at the
+        turn this copy last saw anymore or the copy is stale
+        """
+        with self.lock:
+            if self.deleted:
+                return
+            if self.stale:
+                raise StaleGame(f"Game {self.game_id} was reloaded since this copy was taken.")
+
+            # The row and the replay log move on together
+            with timed("save"), transaction.atomic():
+                if self.dirty_turns:
+                    # Encode through the model properties so the storage format stays in one
+                    # place, straight from the tuples of the board
+                    game = Game(id=self.game_id, configuration_id=self.configuration_id)
+                    game.waste_positions = self.board.wastes
+                    game.agent_positions = self.board.agents
+                    game.known_waste_positions = self.board.known_wastes
+                    game.plan = self.board.plan_data()
+                    game.waste_collected = self.waste_collected
+                    game.is_active = self.is_active
+                    game.turn_number = self.turn_number
+
+                    # Turn numbers only grow, so the row still being at the saved turn
+                    # means nobody else saved it meanwhile. A deleted row matches nothing
+                    saved = Game.objects.filter(pk=self.game_id, turn_number=self.saved_turn).update(
+                        **{field: getattr(game, field) for field in PERSISTED_FIELDS}
+                    )
+                    if not saved:
+                        self.stale = True
+                        raise StaleGame(f"Game {self.game_id} was saved or deleted by another process.")
+                    self.saved_turn = self.turn_number
+                    self.dirty_turns = 0
+                self.replay.save()
+
+    def evict(self):
+        """
+        Save the game as it leaves the cache, and stop it from being played
+        by the requests still holding it
+        """
+        with self.lock:
+            try:
+                self.flush()
+            except StaleGame:
+                # Newer turns are already saved, they win
+                pass
+            self.stale = True
+
+
+class GameStateCache:
+    """
+    LRU cache of live games with write-behind persistence
+
+    The cache lives in the process. Saves only go through when the row is
+    still at the turn the copy saving it loaded or last saved, so a copy
+    left behind by another process or by an eviction raises StaleGame
+    rather than taking the game back to older turns. In the write-through
+    mode the cache also checks that turn on every access, so that several
+    processes can serve the same game.
+    """
+    def __init__(self, max_games=None, flush_every=None, durability=None):
+        options = dict(DEFAULT_SETTINGS, **getattr(settings, 'WALLE_GAME_CACHE', {}))
+        self.max_games = max_games if max_games is not None else options['MAX_GAMES']
+        self.flush_every = flush_every if flush_every is not None else options['FLUSH_EVERY']
+        self.durability = durability if durability is not None else options['DURABILITY']
+        if self.durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown game cache durability mode: {self.durability}")
+
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id):
+        """
+        Return the live game, loading it from the database on a miss
+        Returns None when the game does not exist
+        """
+        with self._lock:
+            live = self._games.get(game_id)
+            if live is not None:
+                self._games.move_to_end(game_id)
+
+        if live is not None and not live.stale:
+            if self.durability != WRITE_THROUGH:
+                return live
+            # Another process may have played the game since this copy was saved
+            with timed("db_load"):
+                turn_number = Game.objects.filter(pk=game_id).values_list('turn_number', flat=True).first()
+            if turn_number is None:
+                self.forget(live)
+                return None
+            if turn_number == live.saved_turn:
+                return live
+        if live is not None:
+            self.forget(live)
+
+        with timed("db_load"):
+            game = Game.objects.select_related('configuration').filter(pk=game_id).first()
+        if not game:
+            return None
+        return self.add(game)
+
+    def add(self, game):
+        """
+        Put a freshly loaded or created game in the cache
+        """
+        with self._lock:
+            # Another request may have loaded the same game in the meantime
+            live = self._games.get(game.id)
+            if live is None:
+                live = LiveGame(game)
+                self._games[game.id] = live
+            self._games.move_to_end(game.id)
+
+            evicted = []
+            while len(self._games) > self.max_games:
+                evicted.append(self._games.popitem(last=False)[1])
+
+        # Flush outside of the cache lock, evicted games are not reachable anymore
+        for old in evicted:
+            old.evict()
+        return live
+
+    def forget(self, live):
+        """
+        Drop a stale copy of a game from the cache, so the next access reloads its row
+        """
+        live.stale = True
+        with self._lock:
+            if self._games.get(live.game_id) is live:
+                del self._games[live.game_id]
+
+    def pop(self, game_id):
+        """
+        Remove a game from the cache without flushing it, before deleting it
+        Its replay log is kept, with the turns played since the last flush
+        """
+        with self._lock:
+            live = self._games.pop(game_id, None)
+        if live is not None:
+            with live.lock, timed("save"):
+                live.replay.save()
+                live.deleted = True
+        return live
+
+    def flush_game(self, game_id):
+        """
+        Write a game back to the database if it is in the cache
+        """
+        with self._lock:
+            live = self._games.get(game_id)
+        if live is not None:
+            self._flush(live)
+
+    def discard(self, game_id):
+        """
+        Flush a game and remove it from the cache, so the next access reloads its row
+        """
+        with self._lock:
+            live = self._games.pop(game_id, None)
+        if live is not None:
+            live.evict()
+
+    def played(self, live, turns=1):
+        """
+        Record turns played on a live game, flushing it when the durability mode asks for it
+        Must be called while holding the live game's lock
+        Raises StaleGame when the turns could not be saved, see LiveGame.flush
+        """
+        if live.stale:
+            # Evicted while the turns were played, another copy may be ahead already
+            raise StaleGame(f"Game {live.game_id} was reloaded since this copy was taken.")
+        live.dirty_turns += turns
+        if (
+            self.durability == WRITE_THROUGH
+            or live.dirty_turns >= self.flush_every
+            or not live.is_active
+        ):
+            try:
+                live.flush()
+            except StaleGame:
+                self.forget(live)
+                raise
+
+    def _flush(self, live):
+        # Turns that lost to newer ones saved elsewhere have nothing left to save
+        try:
+            live.flush()
+        except StaleGame:
+            self.forget(live)
+
+    def flush_all(self):
+        """
+        Write every dirty game back to the database
+        """
+        with self._lock:
+            games = list(self._games.values())
+        for live in games:
+            self._flush(live)
+
+    def clear(self):
+        """
+        Flush and forget every game
+        """
+        self.flush_all()
+        with self._lock:
+            games = list(self._games.values())
+            self._games.clear()
+        for live in games:
+            live.stale = True
+
+
+game_cache = GameStateCache()
+
+# Do not lose the turns played since the last flush when the server stops
+atexit.register(game_cache.flush_all)
@@ -0,0 +1,189 @@
+import struct
+import sys
+import zlib
+from array import array
+
+# Every packed field starts with the coordinate width in bytes and the number of positions
+HEADER = struct.Struct('<BI')
+
+# Array typecodes by coordinate width: one byte is enough for boards up to 256 cells wide
+TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+
+# Steps between the consecutive cells of a planned path, packed two bits each
+PATH_STEP_CODES = {(1, 0): 0, (-1, 0): 1, (0, 1): 2, (0, -1): 3}
+PATH_STEPS = {code: step for step, code in PATH_STEP_CODES.items()}
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append(value & 0x7f | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, offset):
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _pack_coordinates(count, coordinates):
+    """
+    Pack a flat list of coordinates after the header, in little-endian order
+    """
+    largest = max(coordinates, default=0)
+    width = 1 if largest < 1 << 8 else 2 if largest < 1 << 16 else 4
+    values = array(TYPECODES[width], coordinates)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return HEADER.pack(width, count) + values.tobytes()
+
+
+def _unpack_coordinates(data):
+    """
+    Return the position count, the flat coordinates and the offset of the bytes after them
+    """
+    width, count = HEADER.unpack_from(data)
+    end = HEADER.size + 2 * count * width
+    values = array(TYPECODES[width])
+    values.frombytes(data[HEADER.size:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return count, values.tolist(), end
+
+
+def encode_positions(positions):
+    """
+    Pack [[x, y], ...] positions into bytes, any iterable of pairs such as
+    the tuples of a board will do
+    """
+    coordinates = [value for x, y in positions for value in (x, y)]
+    return _pack_coordinates(len(positions), coordinates)
+
+
+def decode_positions(data):
+    """
+    Unpack bytes made by encode_positions into [[x, y], ...]
+    """
+    if not data:
+        return []
+    _, coordinates, _ = _unpack_coordinates(bytes(data))
+    values = iter(coordinates)
+    return [[x, y] for x, y in zip(values, values)]
+
+
+def encode_agents(agents):
+    """
+    Pack [[x, y, carrying], ...] agents into bytes: their positions followed
+    by a bit array of the carry flags
+    """
+    coordinates = [value for x, y, _ in agents for value in (x, y)]
+    carrying = bytearray((len(agents) + 7) // 8)
+    for index, (_, _, w) in enumerate(agents):
+        if w:
+            carrying[index >> 3] |= 1 << (index & 7)
+    return _pack_coordinates(len(agents), coordinates) + bytes(carrying)
+
+
+def decode_agents(data):
+    """
+    Unpack bytes made by encode_agents into [[x, y, carrying], ...]
+    """
+    if not data:
+        return []
+    data = bytes(data)
+    _, coordinates, end = _unpack_coordinates(data)
+    carrying = data[end:]
+    values = iter(coordinates)
+    return [
+        [x, y, bool(carrying[index >> 3] & (1 << (index & 7)))]
+        for index, (x, y) in enumerate(zip(values, values))
+    ]
+
+
+def encode_plan(targets, exploring, blocked, paths, seen):
+    """
+    Pack what a board keeps from turn to turn besides its positions, see
+    Board.plan_data: the waste targeted and the cell explored by agent
+    index, the turns they spent blocked, their planned paths as (target,
+    cells) and the bytes of the cells seen, compressed
+    """
+    buffer = bytearray()
+    for cells in (targets, exploring):
+        write_varint(buffer, len(cells))
+        for agent, (x, y) in cells.items():
+            for value in (agent, x, y):
+                write_varint(buffer, value)
+
+    write_varint(buffer, len(blocked))
+    for agent, turns in blocked.items():
+        write_varint(buffer, agent)
+        write_varint(buffer, turns)
+
+    write_varint(buffer, len(paths))
+    for agent, ((target_x, target_y), cells) in paths.items():
+        for value in (agent, target_x, target_y, len(cells)):
+            write_varint(buffer, value)
+        if not cells:
+            continue
+        # The first cell, then the step to each next one
+        x, y = cells[0]
+        write_varint(buffer, x)
+        write_varint(buffer, y)
+        steps = bytearray((len(cells) + 2) // 4)
+        for index in range(1, len(cells)):
+            nx, ny = cells[index]
+            steps[(index - 1) >> 2] |= PATH_STEP_CODES[(nx - x, ny - y)] << ((index - 1) & 3) * 2
+            x, y = nx, ny
+        buffer += steps
+
+    # The fastest level, the seen cells come in long runs that compress well anyway
+    return bytes(buffer) + zlib.compress(seen, 1)
+
+
+def decode_plan(data):
+    """
+    Unpack bytes made by encode_plan into (targets, exploring, blocked, paths, seen)
+    """
+    data = bytes(data)
+    offset = 0
+    targets, exploring = {}, {}
+    for cells in (targets, exploring):
+        count, offset = read_varint(data, offset)
+        for _ in range(count):
+            agent, offset = read_varint(data, offset)
+            x, offset = read_varint(data, offset)
+            y, offset = read_varint(data, offset)
+            cells[agent] = (x, y)
+
+    blocked = {}
+    count, offset = read_varint(data, offset)
+    for _ in range(count):
+        agent, offset = read_varint(data, offset)
+        blocked[agent], offset = read_varint(data, offset)
+
+    paths = {}
+    count, offset = read_varint(data, offset)
+    for _ in range(count):
+        agent, offset = read_varint(data, offset)
+        target_x, offset = read_varint(data, offset)
+        target_y, offset = read_varint(data, offset)
+        length, offset = read_varint(data, offset)
+        cells = []
+        if length:
+            x, offset = read_varint(data, offset)
+            y, offset = read_varint(data, offset)
+            cells.append((x, y))
+            for index in range(length - 1):
+                dx, dy = PATH_STEPS[data[offset + (index >> 2)] >> (index & 3) * 2 & 3]
+                x, y = x + dx, y + dy
+                cells.append((x, y))
+            offset += (length + 2) // 4
+        paths[agent] = ((target_x, target_y), cells)
+
+    return targets, exploring, blocked, paths, bytearray(zlib.decompress(data[offset:]))
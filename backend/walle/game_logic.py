@@ -1,21 +1,31 @@
 import random
+from time import perf_counter
 
-def rand_list(n, agent_positions=None, third_arg=False, wastes=False):
+from .board import Board
+from .metrics import observe_turn, timed, timings_requested
+from .movement import priority_order, resolve_moves
+from .placement import sample_free_cells
+
+def game_rng(seed, turn_number):
+    """
+    Random generator of one turn of a seeded game, turn 0 being the placement
+    Deriving it from the seed and the turn makes any turn replayable without
+    storing the generator state, and keeps games from sharing a generator
+    """
+    return random.Random(f"{seed}:{turn_number}")
+
+def rand_list(n, agent_positions=None, third_arg=False, wastes=False, rng=None, width=32, height=32):
     """
     Generate a random list of positions
+    Wastes are kept off the cells of the agents, see walle/placement.py
     """
-    all_pos = [(i, j) for i in range(32) for j in range(32)]
+    if rng is None:
+        rng = random
     
+    taken = []
     if wastes and agent_positions:
-        for position in agent_positions:
-            i, j = position[0], position[1]
-            if (i, j) in all_pos:
-                all_pos.remove((i, j))
-    
-    if len(all_pos) < n:
-        n = len(all_pos)
-    
-    pos = random.sample(all_pos, n)
+        taken = sorted({position[0] * height + position[1] for position in agent_positions})
+    pos = sample_free_cells(rng, n, width, height, taken)
     
     if third_arg:
         return [(i, j, False) for (i, j) in pos]
@@ -34,33 +44,42 @@ def vector_to_pos(pos1, pos2):
     """
     return (pos2[0] - pos1[0], pos2[1] - pos1[1])
 
-def closest_waste(known_waste_positions, pos, agent_index, agents_count, assigned_wastes=None):
+def closest_waste(known_waste_positions, pos, agent_index, agents_count, assigned_wastes=None, rng=None,
+                  waste_index=None, width=32, height=32):
     """
     Find closest waste position to the agent with load balancing
+    When a WasteIndex of the known wastes is given, it is queried instead of
+    scanning them, and keeps track of the assigned wastes itself
     """
+    if rng is None:
+        rng = random
     if not assigned_wastes:
         assigned_wastes = {}
         
     if len(known_waste_positions) == 0:
         # Strategic exploration with sector division
-        grid_size = 32
-        sector_size = grid_size // min(4, agents_count)
+        sector_width = width // min(4, agents_count)
+        sector_height = height // min(4, agents_count)
         
         # Assign sectors based on agent index for better coverage
-        sector_x = (agent_index % 2) * sector_size + random.randint(0, sector_size - 1)
-        sector_y = ((agent_index // 2) % 2) * sector_size + random.randint(0, sector_size - 1)
+        sector_x = (agent_index % 2) * sector_width + rng.randint(0, sector_width - 1)
+        sector_y = ((agent_index // 2) % 2) * sector_height + rng.randint(0, sector_height - 1)
         
         # Add offset to make agents explore different areas
-        offset_x = random.randint(-5, 5)
-        offset_y = random.randint(-5, 5)
+        offset_x = rng.randint(-5, 5)
+        offset_y = rng.randint(-5, 5)
         
-        target_x = min(max(0, sector_x * (grid_size // sector_size // 2) + offset_x), grid_size - 1)
-        target_y = min(max(0, sector_y * (grid_size // sector_size // 2) + offset_y), grid_size - 1)
+        target_x = min(max(0, sector_x * (width // sector_width // 2) + offset_x), width - 1)
+        target_y = min(max(0, sector_y * (height // sector_height // 2) + offset_y), height - 1)
         
         return (target_x, target_y)
     
+    if waste_index is not None:
+        return waste_index.nearest(pos, skip_assigned=True) or waste_index.nearest(pos)
+    
     # Filter out wastes that are already assigned to other agents
-    available_wastes = [w for w in known_waste_positions if tuple(w) not in assigned_wastes.values()]
+    taken = set(map(tuple, assigned_wastes.values()))
+    available_wastes = [w for w in known_waste_positions if tuple(w) not in taken]
     
     # If no available wastes, pick the closest one regardless of assignment
     if not available_wastes:
@@ -75,18 +94,21 @@ def closest_waste(known_waste_positions, pos, agent_index, agents_count, assigne
     # Fallback to original behavior
     return known_waste_positions[0]
 
-def find_path(start, target, grid_size=32, avoid_diagonal=False, random_factor=0.2):
+def find_path(start, target, width=32, height=32, avoid_diagonal=False, random_factor=0.2, rng=None):
     """
     Find next position to move towards target with enhanced pathfinding
     to avoid gridlocks
     """
+    if rng is None:
+        rng = random
+    
     # Calculate direction vector to target
     dx, dy = vector_to_pos(start, target)
     
     # Introduce occasional randomness to break patterns
-    if random.random() < random_factor:
+    if rng.random() < random_factor:
         # Randomly prioritize horizontal or vertical movement to break diagonal gridlocks
-        if random.random() < 0.5:
+        if rng.random() < 0.5:
             # Prioritize horizontal movement
             if dx != 0:
                 next_x = start[0] + (1 if dx > 0 else -1)
@@ -104,7 +126,7 @@ def find_path(start, target, grid_size=32, avoid_diagonal=False, random_factor=0
                 next_pos = (next_x, start[1])
     else:
         # Normal pathfinding logic with better handling of diagonal situations
-        if abs(dx) > abs(dy) or (abs(dx) == abs(dy) and random.random() < 0.5):
+        if abs(dx) > abs(dy) or (abs(dx) == abs(dy) and rng.random() < 0.5):
             # Move horizontally first or random choice when diagonal
             next_x = start[0] + (1 if dx > 0 else -1 if dx < 0 else 0)
             next_pos = (next_x, start[1])
@@ -115,136 +137,224 @@ def find_path(start, target, grid_size=32, avoid_diagonal=False, random_factor=0
     
     # Make sure we stay in bounds
     next_x, next_y = next_pos
-    next_x = max(0, min(next_x, grid_size - 1))
-    next_y = max(0, min(next_y, grid_size - 1))
+    next_x = max(0, min(next_x, width - 1))
+    next_y = max(0, min(next_y, height - 1))
     
     return (next_x, next_y)
 
-def try_alternative_moves(current_pos, agent_positions, grid_size=32):
+def try_alternative_moves(current_pos, agent_positions, width=32, height=32, rng=None):
     """
     Try alternative moves when the primary direction is blocked
     Returns a list of possible positions ordered by priority
     """
+    if rng is None:
+        rng = random
     x, y = current_pos
     possible_moves = []
     
     # Check all four possible directions
     directions = [(1, 0), (-1, 0), (0, 1), (0, -1)]
-    random.shuffle(directions)  # Randomize to avoid patterns
+    rng.shuffle(directions)  # Randomize to avoid patterns
     
     for dx, dy in directions:
         new_x, new_y = x + dx, y + dy
-        if 0 <= new_x < grid_size and 0 <= new_y < grid_size:
+        if 0 <= new_x < width and 0 <= new_y < height:
             if not any((new_x, new_y) == (ax, ay) for ax, ay, _ in agent_positions):
                 possible_moves.append((new_x, new_y))
     
     return possible_moves
 
-def next_turn(waste_positions, agent_positions, base_pos, known_waste_positions, waste_collected):
+def exploration_target(board, index, agents_count, rng=None):
     """
-    Calculate the state for the next turn with agent coordination and improved
-    movement logic to avoid gridlocks
+    Pick where an agent with no waste to collect should go
+    A planned board sends it to unseen cells, and keeps it in place once
+    there is nothing left to explore rather than planning a path to a new
+    random point every turn. Otherwise it heads to a random point of its
+    sector of the grid
     """
-    # Convert positions from lists to tuples for easier processing
-    waste_positions_tuples = [tuple(pos) for pos in waste_positions]
-    agent_positions_tuples = [tuple(pos) for pos in agent_positions]
-    known_waste_positions_tuples = [tuple(pos) for pos in known_waste_positions]
+    i, j, _ = board.agents[index]
+    if board.planner is not None:
+        target = board.planner.explore(board, index)
+        return (i, j) if target is None else target
+    return closest_waste([], (i, j), index, agents_count, rng=rng, width=board.width, height=board.height)
+
+def play_turn(board, base_pos, waste_collected, rng=None):
+    """
+    Play one turn on the board in place and return the updated waste count
+    """
+    if rng is None:
+        rng = random
+    # Time spent in each phase of the turn, see walle/metrics.py. Reading the
+    # clock around the target, step and move of every agent slows the turn
+    # down, so these phases are only timed when the request asked for it
+    detailed = timings_requested()
+    started = perf_counter()
+    targets_time = steps_time = moves_time = 0.0
+
     base_pos_tuple = tuple(base_pos)
-    
-    # Task assignment for agents
+    width, height = board.width, board.height
+    agents = board.agents
+
+    # Task assignment for agents, mirrored in the known waste index
     assigned_wastes = {}
-    agents_count = len(agent_positions_tuples)
-    
+    known_index = board.known_index
+    assignments = board.assignments
+    if assignments is None:
+        known_index.clear_assignments()
+    agents_count = len(agents)
+
     # Update the known waste positions first (for all agents)
-    for index, (i, j, w) in enumerate(agent_positions_tuples):
-        for di in range(-5, 6):
-            for dj in range(-5, 6):
-                ni, nj = i + di, j + dj
-                # Make sure coordinates are within bounds
-                if 0 <= ni < 32 and 0 <= nj < 32:
-                    if (ni, nj) in waste_positions_tuples and (ni, nj) not in known_waste_positions_tuples:
-                        known_waste_positions_tuples.append((ni, nj))
-    
+    board.reveal()
+    revealed = perf_counter()
+
+    # Keep the targets of the previous turns, matching idle agents to the new wastes
+    if assignments is not None:
+        assignments.repair(board)
+    if detailed:
+        targets_time = perf_counter() - revealed
+
     # Random priority order for movement to avoid gridlocks
     # Agents with higher priority get to move first
-    movement_priority = list(range(len(agent_positions_tuples)))
-    random.shuffle(movement_priority)
-    
-    # Keep track of new positions to avoid collisions
-    new_positions = {}
-    
+    movement_priority = list(range(agents_count))
+    rng.shuffle(movement_priority)
+
+    # Cell each agent wants to step to, when moves are resolved all at once
+    simultaneous = board.simultaneous
+    intents = {}
+
     # Move agents in priority order
-    for priority_idx in movement_priority:
-        index = priority_idx
-        i, j, w = agent_positions_tuples[index]
-        
+    for index in movement_priority:
+        i, j, w = agents[index]
+
         # Drop waste if agent is at base
         if (i, j) == base_pos_tuple and w:
-            agent_positions_tuples[index] = (i, j, False)
+            board.drop(index)
             waste_collected += 1
             if index in assigned_wastes:
-                del assigned_wastes[index]
+                known_index.release(assigned_wastes.pop(index))
             continue
 
         # If is on waste, collect it
-        if (i, j) in known_waste_positions_tuples and not w:
-            agent_positions_tuples[index] = (i, j, True)
-            known_waste_positions_tuples.remove((i, j))
-            waste_positions_tuples.remove((i, j))
+        if not w and board.is_known_waste(i, j):
+            board.pick_up(index)
             if index in assigned_wastes:
-                del assigned_wastes[index]
+                known_index.release(assigned_wastes.pop(index))
             continue
-        
+
         # Determine target position
+        if detailed:
+            agent_started = perf_counter()
         if w:
             target_pos = base_pos_tuple  # Return to base if carrying waste
+        elif assignments is not None:
+            target_pos = assignments.target(board, index)
+            if target_pos is None:
+                # No free waste known, explore
+                target_pos = exploration_target(board, index, agents_count, rng)
         else:
-            if index not in assigned_wastes or tuple(assigned_wastes[index]) not in known_waste_positions_tuples:
+            if index not in assigned_wastes or tuple(assigned_wastes[index]) not in board.known_wastes:
                 # Find and assign a new waste target
-                target_waste = closest_waste(known_waste_positions_tuples, (i, j), index, agents_count, assigned_wastes)
+                if board.known_wastes:
+                    target_waste = closest_waste(board.known_wastes, (i, j), index, agents_count, assigned_wastes,
+                                                 rng, known_index, width, height)
+                else:
+                    target_waste = exploration_target(board, index, agents_count, rng)
                 assigned_wastes[index] = target_waste
+                known_index.assign(target_waste)
                 target_pos = target_waste
             else:
                 target_pos = assigned_wastes[index]
-        
+        if detailed:
+            targeted = perf_counter()
+            targets_time += targeted - agent_started
+
+        if board.planner is not None:
+            step = board.planner.next_step(board, index, target_pos, rng)
+            if detailed:
+                steps_time += perf_counter() - targeted
+            if step is None:
+                continue
+            if simultaneous:
+                intents[index] = step
+            elif board.is_free(*step):
+                board.move(index, *step)
+            else:
+                board.swap(index, *step)
+            continue
+
         # Introduce randomness based on agent index to avoid synchronized movement
         random_factor = 0.2 + (index % 5) * 0.05  # Different random factors for different agents
-        
+
         # Find next position using improved pathfinding to reduce gridlocks
-        next_pos = find_path((i, j), target_pos, random_factor=random_factor)
-        next_i, next_j = next_pos
-        
-        # Check if the move is valid and doesn't collide with other agents
-        valid_move = False
-        
-        # First check if the primary move is valid
-        if 0 <= next_i < 32 and 0 <= next_j < 32:
-            # Check for collisions with existing and new agent positions
-            if not any((next_i, next_j) == (x, y) for x, y, _ in agent_positions_tuples if (x, y) != (i, j)):
-                # Also check against new positions of agents that have already moved
-                if not any((next_i, next_j) == new_positions.get(other_idx, (-1, -1)) for other_idx in range(len(agent_positions_tuples)) if other_idx != index and other_idx in new_positions):
-                    valid_move = True
-                    new_positions[index] = (next_i, next_j)
-                    agent_positions_tuples[index] = (next_i, next_j, w)
-        
-        # If primary move is invalid, try alternative moves
-        if not valid_move:
-            alternative_moves = try_alternative_moves((i, j), agent_positions_tuples)
-            for alt_i, alt_j in alternative_moves:
-                # Check if this alternative move is valid
-                if not any((alt_i, alt_j) == new_positions.get(other_idx, (-1, -1)) for other_idx in range(len(agent_positions_tuples)) if other_idx != index and other_idx in new_positions):
-                    new_positions[index] = (alt_i, alt_j)
-                    agent_positions_tuples[index] = (alt_i, alt_j, w)
-                    valid_move = True
-                    break
-            
-            # If still stuck, stay in place (no valid move)
-            if not valid_move:
-                new_positions[index] = (i, j)
-    
-    # Convert tuples back to lists for JSON serialization
-    waste_positions = [list(pos) for pos in waste_positions_tuples]
-    agent_positions = [list(pos) for pos in agent_positions_tuples]
-    known_waste_positions = [list(pos) for pos in known_waste_positions_tuples]
-    
+        next_i, next_j = find_path((i, j), target_pos, width, height, random_factor=random_factor, rng=rng)
+        if detailed:
+            stepped = perf_counter()
+            steps_time += stepped - targeted
+
+        if simultaneous:
+            if (next_i, next_j) != (i, j):
+                intents[index] = (next_i, next_j)
+            continue
+
+        # The occupancy grid tells in O(1) whether another agent holds the cell
+        if 0 <= next_i < width and 0 <= next_j < height and board.is_free(next_i, next_j, (i, j)):
+            board.move(index, next_i, next_j)
+            if detailed:
+                moves_time += perf_counter() - stepped
+            continue
+
+        # If primary move is invalid, take the first free alternative move,
+        # otherwise stay in place
+        alternative_moves = board.free_neighbours(i, j, rng)
+        if alternative_moves:
+            board.move(index, *alternative_moves[0])
+        if detailed:
+            moves_time += perf_counter() - stepped
+
+    if simultaneous:
+        resolving = perf_counter()
+        if board.planner is None:
+            # A cell held by an agent that stays is not worth waiting on, take a free one instead
+            for index in movement_priority:
+                cell = intents.get(index)
+                if cell is None:
+                    continue
+                occupant = board.agent_at(*cell)
+                if occupant is not None and occupant not in intents:
+                    i, j, _ = agents[index]
+                    alternative_moves = board.free_neighbours(i, j, rng)
+                    if alternative_moves:
+                        intents[index] = alternative_moves[0]
+                    else:
+                        del intents[index]
+
+        # Carriers go first, clearing the way to the base
+        stalled = resolve_moves(board, intents, priority_order(board, movement_priority))
+        if board.planner is not None:
+            for index in stalled:
+                board.planner.stalled(index)
+        moves_time += perf_counter() - resolving
+
+    finished = perf_counter()
+    phases = {"vision": revealed - started, "agents": finished - revealed}
+    if detailed:
+        phases.update(targets=targets_time, steps=steps_time, moves=moves_time)
+    observe_turn(finished - started, phases)
+    return waste_collected
+
+def next_turn(waste_positions, agent_positions, base_pos, known_waste_positions, waste_collected, rng=None,
+              width=32, height=32):
+    """
+    Calculate the state for the next turn with agent coordination and improved
+    movement logic to avoid gridlocks
+    Targets are chosen again every turn, as the board does not outlive the call
+    """
+    with timed("conversion"):
+        board = Board(waste_positions, agent_positions, known_waste_positions, width, height)
+    waste_collected = play_turn(board, base_pos, waste_collected, rng)
+
+    # Convert the board back to lists for JSON serialization
+    with timed("conversion"):
+        waste_positions, agent_positions, known_waste_positions = board.to_lists()
+
     return waste_positions, agent_positions, known_waste_positions, waste_collected
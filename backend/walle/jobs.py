@@ -0,0 +1,153 @@
+import os
+import socket
+import time
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .board import Board
+from .game_logic import game_rng
+from .models import DONE, FAILED, QUEUED, RUNNING, SimulationJob
+from .placement import place
+from .simulation import run_board
+
+# Seconds between two progress reports of a running job, which also tell
+# that its worker is alive
+PROGRESS_INTERVAL = 1.0
+
+# Seconds without a progress report after which the worker of a running
+# job is presumed dead and the job is queued again
+STALE_AFTER = 60
+
+# Seconds an idle worker waits before looking at the queue again
+POLL_INTERVAL = 0.5
+
+
+class JobLost(Exception):
+    """
+    Raised in a worker whose job was queued again or removed while it ran it
+    """
+
+
+def worker_name(pid=None):
+    return f"{socket.gethostname()}:{pid or os.getpid()}"
+
+
+def submit_job(configuration, max_turns):
+    """
+    Queue a headless game of a saved configuration, played until every
+    waste is collected or max_turns turns
+    """
+    return SimulationJob.objects.create(configuration=configuration, max_turns=max_turns)
+
+
+def requeue_jobs(jobs):
+    """
+    Queue running jobs again, to be played from the start
+    Returns the number of jobs queued again
+    """
+    return jobs.filter(status=RUNNING).update(
+        status=QUEUED, worker='', turns_played=0, waste_collected=0, started_at=None, heartbeat_at=None
+    )
+
+
+def requeue_stale_jobs():
+    """
+    Queue again the running jobs whose worker stopped reporting
+    """
+    stale = timezone.now() - timedelta(seconds=STALE_AFTER)
+    return requeue_jobs(SimulationJob.objects.filter(heartbeat_at__lt=stale))
+
+
+def claim_job(worker):
+    """
+    Take the oldest queued job for a worker, or return None when there is none
+
+    A job goes to the worker whose update still finds it queued, which keeps
+    two workers from running it without the row locks SQLite does not have.
+    """
+    requeue_stale_jobs()
+    while True:
+        job_id = SimulationJob.objects.filter(status=QUEUED).order_by('id').values_list('id', flat=True).first()
+        if job_id is None:
+            return None
+        now = timezone.now()
+        claimed = SimulationJob.objects.filter(id=job_id, status=QUEUED).update(
+            status=RUNNING, worker=worker, started_at=now, heartbeat_at=now
+        )
+        if claimed:
+            return SimulationJob.objects.select_related('configuration').get(id=job_id)
+
+
+def run_job(job, worker):
+    """
+    Play a claimed job's game in memory and store its result
+
+    The game is placed and played like one started through the API with the
+    same configuration, so a seeded job gives the same result as the game.
+    """
+    configuration = job.configuration
+    # Updates only go through while the job is still this worker's
+    owned = SimulationJob.objects.filter(id=job.id, status=RUNNING, worker=worker)
+
+    last_report = time.monotonic()
+
+    def report(turns, waste_collected):
+        nonlocal last_report
+        now = time.monotonic()
+        if now - last_report < PROGRESS_INTERVAL:
+            return
+        last_report = now
+        if not owned.update(turns_played=turns, waste_collected=waste_collected, heartbeat_at=timezone.now()):
+            raise JobLost()
+
+    started = time.perf_counter()
+    try:
+        width, height = configuration.grid_width, configuration.grid_height
+        agent_positions, waste_positions = place(
+            configuration.num_agents, configuration.num_wastes, game_rng(configuration.seed, 0),
+            width, height, configuration.placement
+        )
+        board = Board(
+            [[i, j] for i, j in waste_positions], [[i, j, w] for i, j, w in agent_positions], [],
+            width, height,
+            assignment=configuration.assignment,
+            pathing=configuration.pathing,
+            movement=configuration.movement
+        )
+        waste_collected, summary = run_board(
+            board, configuration.base_position, 0, configuration.num_wastes,
+            max_turns=job.max_turns,
+            seed=configuration.seed,
+            progress=report
+        )
+    except JobLost:
+        return
+    except Exception as e:
+        owned.update(status=FAILED, error=str(e), finished_at=timezone.now())
+        return
+
+    owned.update(
+        status=DONE,
+        turns_played=summary["turns"],
+        waste_collected=waste_collected,
+        completed=summary["completed"],
+        seconds=round(time.perf_counter() - started, 6),
+        finished_at=timezone.now()
+    )
+
+
+def work(worker=None, poll_interval=POLL_INTERVAL, burst=False):
+    """
+    Run queued jobs one after the other, waiting for new ones when the queue
+    is empty, or returning then in burst mode
+    """
+    worker = worker or worker_name()
+    while True:
+        job = claim_job(worker)
+        if job is None:
+            if burst:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job, worker)
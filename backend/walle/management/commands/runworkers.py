@@ -0,0 +1,68 @@
+import multiprocessing
+import os
+import signal
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+
+# walle.jobs imports the models, so it is only imported once Django is set
+# up: processes started by spawn rather than fork import this module first
+def run_worker(poll_interval, burst):
+    # Ctrl-C reaches every process of the group, the command stops the workers itself
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    django.setup()
+    from walle.jobs import work
+
+    work(poll_interval=poll_interval, burst=burst)
+
+
+def stop(signum, frame):
+    raise KeyboardInterrupt()
+
+
+class Command(BaseCommand):
+    help = "Run queued simulation jobs in worker processes, until interrupted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes, all cores by default")
+        parser.add_argument('--poll', type=float, default=None,
+                            help="Seconds an idle worker waits before looking at the queue again")
+        parser.add_argument('--burst', action='store_true', help="Stop once the queue is empty")
+
+    def handle(self, *args, **options):
+        from walle.jobs import POLL_INTERVAL, requeue_jobs, worker_name
+        from walle.models import SimulationJob
+
+        workers = options['workers'] or os.cpu_count() or 1
+        poll_interval = options['poll'] or POLL_INTERVAL
+
+        # Each worker opens its own connection, forked processes must not share ours
+        connections.close_all()
+
+        self.stdout.write(f"Starting {workers} workers...")
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(poll_interval, options['burst']), daemon=True)
+            for _ in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        # Process managers stop services with SIGTERM, handled as Ctrl-C. Only
+        # set once the workers are started, so that they keep the default
+        signal.signal(signal.SIGTERM, stop)
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
+            # The interrupted jobs go to the next workers rather than waiting to go stale
+            requeued = requeue_jobs(SimulationJob.objects.filter(
+                worker__in=[worker_name(process.pid) for process in processes]
+            ))
+            self.stdout.write(f"Queued {requeued} interrupted jobs again")
+        self.stdout.write(self.style.SUCCESS("Workers stopped"))
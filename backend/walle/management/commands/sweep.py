@@ -0,0 +1,113 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from walle.assignment import HUNGARIAN, STRATEGIES
+from walle.board import MAX_GRID_SIZE, MIN_GRID_SIZE
+from walle.movement import MOVEMENT_MODES, RESERVED
+from walle.placement import DISTRIBUTIONS, UNIFORM
+from walle.planner import PATHING_MODES, PLANNER
+from walle.simulation import DEFAULT_MAX_TURNS
+from walle.sweep import (
+    RESULT_FIELDS, SUMMARY_FIELDS, ResultWriter, run_sweep, summarize, sweep_configurations,
+)
+
+
+def parse_base_position(value):
+    try:
+        x, y = (int(part) for part in value.split(','))
+    except ValueError:
+        raise CommandError(f"Invalid base position '{value}', expected X,Y")
+    return x, y
+
+
+def parse_grid_size(value):
+    try:
+        width, height = (int(part) for part in value.lower().split('x'))
+    except ValueError:
+        raise CommandError(f"Invalid board size '{value}', expected WIDTHxHEIGHT")
+    if not (MIN_GRID_SIZE <= width <= MAX_GRID_SIZE and MIN_GRID_SIZE <= height <= MAX_GRID_SIZE):
+        raise CommandError(f"Board sides must be between {MIN_GRID_SIZE} and {MAX_GRID_SIZE} cells.")
+    return width, height
+
+
+def parse_seeds(values):
+    """
+    Parse seeds given as numbers or inclusive START-END ranges
+    """
+    seeds = []
+    for value in values:
+        try:
+            if '-' in value:
+                start, end = (int(part) for part in value.split('-'))
+                seeds.extend(range(start, end + 1))
+            else:
+                seeds.append(int(value))
+        except ValueError:
+            raise CommandError(f"Invalid seed '{value}', expected a number or START-END")
+    return seeds
+
+
+class Command(BaseCommand):
+    help = "Run headless games over a grid of parameters across all cores and write their results"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--agents', type=int, nargs='+', required=True, help="Numbers of agents")
+        parser.add_argument('--wastes', type=int, nargs='+', required=True, help="Numbers of wastes")
+        parser.add_argument('--grid', nargs='+', default=['32x32'], help="Board sizes as WIDTHxHEIGHT")
+        parser.add_argument('--base', nargs='+', default=['15,15'], help="Base positions as X,Y")
+        parser.add_argument('--seeds', nargs='+', default=['0-9'], help="Seeds, or START-END ranges")
+        parser.add_argument('--assignment', nargs='+', choices=STRATEGIES, default=[HUNGARIAN],
+                            help="Waste assignment strategies")
+        parser.add_argument('--pathing', nargs='+', choices=PATHING_MODES, default=[PLANNER],
+                            help="Pathing modes")
+        parser.add_argument('--movement', nargs='+', choices=MOVEMENT_MODES, default=[RESERVED],
+                            help="Move resolution modes")
+        parser.add_argument('--placement', nargs='+', choices=DISTRIBUTIONS, default=[UNIFORM],
+                            help="Waste distributions at start")
+        parser.add_argument('--max-turns', type=int, default=DEFAULT_MAX_TURNS, help="Turn cap per game")
+        parser.add_argument('--workers', type=int, default=None, help="Worker processes, all cores by default")
+        parser.add_argument('--output', default='sweep.csv', help="Result file, .csv or .jsonl")
+        parser.add_argument('--summary', default=None, help="Per-configuration statistics file, .csv or .jsonl")
+
+    def handle(self, *args, **options):
+        grid_sizes = [parse_grid_size(value) for value in options['grid']]
+        base_positions = [parse_base_position(value) for value in options['base']]
+        seeds = parse_seeds(options['seeds'])
+
+        # Same limits as when starting a game through the API
+        for width, height in grid_sizes:
+            for count in options['agents'] + options['wastes']:
+                if not 0 <= count < width * height:
+                    raise CommandError("Too many agents or wastes for the board size.")
+            for x, y in base_positions:
+                if not (0 <= x < width and 0 <= y < height):
+                    raise CommandError(f"Base position {x},{y} is outside of the board.")
+
+        configurations = sweep_configurations(
+            options['agents'], options['wastes'], base_positions, seeds, options['assignment'],
+            options['pathing'], options['movement'], grid_sizes, options['placement']
+        )
+        self.stdout.write(f"Running {len(configurations)} games...")
+
+        results = []
+        with ResultWriter(options['output'], RESULT_FIELDS) as writer:
+            for result in run_sweep(configurations, options['max_turns'], options['workers']):
+                writer.write(result)
+                results.append(result)
+
+        summary = summarize(results)
+        if options['summary']:
+            with ResultWriter(options['summary'], SUMMARY_FIELDS) as writer:
+                for row in summary:
+                    writer.write(row)
+
+        for row in summary:
+            mean = f"{row['turns_mean']:.1f}" if row['turns_mean'] is not None else '-'
+            self.stdout.write(
+                f"agents={row['num_agents']} wastes={row['num_wastes']} "
+                f"grid={row['grid_width']}x{row['grid_height']} "
+                f"base={row['base_position_x']},{row['base_position_y']} "
+                f"assignment={row['assignment']} pathing={row['pathing']} movement={row['movement']} "
+                f"placement={row['placement']} "
+                f"completed={row['completion_rate']:.0%} mean turns={mean}"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
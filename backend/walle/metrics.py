@@ -0,0 +1,176 @@
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Upper bounds of the histogram buckets, in seconds: turn phases take from
+# microseconds on small boards to a good part of a second on large ones
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Metrics listed by /api/metrics/, in the order they were created
+REGISTRY = []
+
+# Time spent in each phase by the request being served, when it asked for
+# a Server-Timing header
+_request_timings = ContextVar('walle_request_timings', default=None)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metric:
+    """
+    Values of a metric by label values, kept in the process
+
+    Every process of the API has its own values: Prometheus scrapes each
+    one and adds them up.
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[label]) for label in self.labels)
+
+    def _label_text(self, key, **extra):
+        pairs = list(zip(self.labels, key)) + list(extra.items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{label}="{_escape(value)}"' for label, value in pairs) + '}'
+
+    def samples(self):
+        """
+        Lines of the metric in the Prometheus text format, without its header
+        """
+        raise NotImplementedError
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for key, value in values:
+            yield f"{self.name}{self._label_text(key)} {value}"
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Counts by bucket, the last one past every bound, then the sum
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def samples(self):
+        with self._lock:
+            values = sorted((key, counts[:]) for key, counts in self._values.items())
+        for key, counts in values:
+            # Buckets are cumulative in the exposition format
+            total = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                total += count
+                yield f"{self.name}_bucket{self._label_text(key, le=bound)} {total}"
+            yield f"{self.name}_sum{self._label_text(key)} {counts[-1]}"
+            yield f"{self.name}_count{self._label_text(key)} {total}"
+
+
+PHASE_SECONDS = Histogram(
+    'walle_phase_seconds',
+    "Time spent in a phase of a turn or of a request",
+    ['phase']
+)
+TURN_SECONDS = Histogram('walle_turn_seconds', "Time spent playing a turn")
+REQUESTS = Counter('walle_requests_total', "Requests served, by view and status code", ['view', 'status'])
+REQUEST_SECONDS = Histogram('walle_request_seconds', "Time spent serving a request", ['view'])
+
+
+def render():
+    """
+    Every metric in the Prometheus text exposition format
+    """
+    return '\n'.join(metric.render() for metric in REGISTRY) + '\n'
+
+
+def observe_phase(phase, seconds):
+    """
+    Record the time spent in a phase, for the metrics and the Server-Timing
+    header of the request being served
+    """
+    PHASE_SECONDS.observe(seconds, phase=phase)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings[phase] = timings.get(phase, 0.0) + seconds
+
+
+@contextmanager
+def timed(phase):
+    """
+    Time the block as a phase
+    """
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        observe_phase(phase, perf_counter() - started)
+
+
+def observe_turn(seconds, phases):
+    """
+    Record the time spent playing a turn, and in each of its phases
+    """
+    TURN_SECONDS.observe(seconds)
+    for phase, phase_seconds in phases.items():
+        observe_phase(phase, phase_seconds)
+
+
+def timings_requested():
+    """
+    Whether the request being served asked for the time spent in each of its phases
+    """
+    return _request_timings.get() is not None
+
+
+@contextmanager
+def collect_timings(enabled=True):
+    """
+    Gather the time spent in each phase within the block, in the dict it
+    yields, or yield None when not enabled
+    """
+    if not enabled:
+        yield None
+        return
+    timings = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from .metrics import REQUEST_SECONDS, REQUESTS, collect_timings
+
+
+class MetricsMiddleware:
+    """
+    Count and time the requests served by each view
+
+    A request with a 'timing' query parameter gets the time spent in each
+    phase of serving it back in a Server-Timing header, which the network
+    panel of browsers shows.
+    Works both ways, so that the stream view stays asynchronous under ASGI.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = perf_counter()
+        with collect_timings('timing' in request.GET) as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, perf_counter() - started, timings)
+
+    async def __acall__(self, request):
+        started = perf_counter()
+        with collect_timings('timing' in request.GET) as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, perf_counter() - started, timings)
+
+    def finish(self, request, response, elapsed, timings):
+        match = request.resolver_match
+        view = match.url_name if match is not None and match.url_name else 'unmatched'
+        REQUESTS.inc(view=view, status=response.status_code)
+        REQUEST_SECONDS.observe(elapsed, view=view)
+
+        if timings is not None:
+            phases = [f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in timings.items()]
+            phases.append(f"total;dur={elapsed * 1000:.3f}")
+            response['Server-Timing'] = ', '.join(phases)
+        return response
@@ -0,0 +1,145 @@
+import json
+import struct
+import sys
+from array import array
+
+from django.db import migrations, models
+
+# The packing of walle/encoding.py as this migration was written, kept here
+# so that later changes to the module do not change what this migration does
+
+# Every packed field starts with the coordinate width in bytes and the number of positions
+HEADER = struct.Struct('<BI')
+
+# Array typecodes by coordinate width: one byte is enough for boards up to 256 cells wide
+TYPECODES = {1: 'B', 2: 'H', 4: 'I'}
+
+
+def _pack_coordinates(count, coordinates):
+    """
+    Pack a flat list of coordinates after the header, in little-endian order
+    """
+    largest = max(coordinates, default=0)
+    width = 1 if largest < 1 << 8 else 2 if largest < 1 << 16 else 4
+    values = array(TYPECODES[width], coordinates)
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return HEADER.pack(width, count) + values.tobytes()
+
+
+def _unpack_coordinates(data):
+    """
+    Return the position count, the flat coordinates and the offset of the bytes after them
+    """
+    width, count = HEADER.unpack_from(data)
+    end = HEADER.size + 2 * count * width
+    values = array(TYPECODES[width])
+    values.frombytes(data[HEADER.size:end])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return count, values.tolist(), end
+
+
+def encode_positions(positions):
+    """
+    Pack [[x, y], ...] positions into bytes
+    """
+    coordinates = [value for x, y in positions for value in (x, y)]
+    return _pack_coordinates(len(positions), coordinates)
+
+
+def decode_positions(data):
+    """
+    Unpack bytes made by encode_positions into [[x, y], ...]
+    """
+    if not data:
+        return []
+    _, coordinates, _ = _unpack_coordinates(bytes(data))
+    values = iter(coordinates)
+    return [[x, y] for x, y in zip(values, values)]
+
+
+def encode_agents(agents):
+    """
+    Pack [[x, y, carrying], ...] agents into bytes: their positions followed
+    by a bit array of the carry flags
+    """
+    coordinates = [value for x, y, _ in agents for value in (x, y)]
+    carrying = bytearray((len(agents) + 7) // 8)
+    for index, (_, _, w) in enumerate(agents):
+        if w:
+            carrying[index >> 3] |= 1 << (index & 7)
+    return _pack_coordinates(len(agents), coordinates) + bytes(carrying)
+
+
+def decode_agents(data):
+    """
+    Unpack bytes made by encode_agents into [[x, y, carrying], ...]
+    """
+    if not data:
+        return []
+    data = bytes(data)
+    _, coordinates, end = _unpack_coordinates(data)
+    carrying = data[end:]
+    values = iter(coordinates)
+    return [
+        [x, y, bool(carrying[index >> 3] & (1 << (index & 7)))]
+        for index, (x, y) in enumerate(zip(values, values))
+    ]
+
+# (JSON text field, packed binary field, encoder, decoder)
+FIELDS = [
+    ('_waste_positions', '_waste_positions_packed', encode_positions, decode_positions),
+    ('_agent_positions', '_agent_positions_packed', encode_agents, decode_agents),
+    ('_known_waste_positions', '_known_waste_positions_packed', encode_positions, decode_positions),
+]
+
+
+def pack_positions(apps, schema_editor):
+    Game = apps.get_model('walle', 'Game')
+    for game in Game.objects.all().iterator():
+        for text_field, packed_field, encode, _ in FIELDS:
+            setattr(game, packed_field, encode(json.loads(getattr(game, text_field) or '[]')))
+        game.save(update_fields=[packed_field for _, packed_field, _, _ in FIELDS])
+
+
+def unpack_positions(apps, schema_editor):
+    Game = apps.get_model('walle', 'Game')
+    for game in Game.objects.all().iterator():
+        for text_field, packed_field, _, decode in FIELDS:
+            setattr(game, text_field, json.dumps(decode(getattr(game, packed_field))))
+        game.save(update_fields=[text_field for text_field, _, _, _ in FIELDS])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0001_initial'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name='game',
+                name=packed_field,
+                field=models.BinaryField(blank=True, default=b''),
+            )
+            for _, packed_field, _, _ in FIELDS
+        ],
+        migrations.RunPython(pack_positions, unpack_positions),
+        *[
+            migrations.RemoveField(
+                model_name='game',
+                name=text_field,
+            )
+            for text_field, _, _, _ in FIELDS
+        ],
+        *[
+            migrations.RenameField(
+                model_name='game',
+                old_name=packed_field,
+                new_name=text_field,
+            )
+            for text_field, packed_field, _, _ in FIELDS
+        ],
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0002_binary_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuration',
+            name='seed',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
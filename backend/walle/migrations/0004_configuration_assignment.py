@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0003_configuration_seed'),
+    ]
+
+    operations = [
+        # Games started before keep choosing their targets every turn
+        migrations.AddField(
+            model_name='configuration',
+            name='assignment',
+            field=models.CharField(choices=[('per-turn', 'per-turn'), ('greedy', 'greedy'), ('auction', 'auction'), ('hungarian', 'hungarian')], default='per-turn', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='configuration',
+            name='assignment',
+            field=models.CharField(choices=[('per-turn', 'per-turn'), ('greedy', 'greedy'), ('auction', 'auction'), ('hungarian', 'hungarian')], default='hungarian', max_length=16),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0004_configuration_assignment'),
+    ]
+
+    operations = [
+        # Games started before keep taking single greedy steps
+        migrations.AddField(
+            model_name='configuration',
+            name='pathing',
+            field=models.CharField(choices=[('greedy', 'greedy'), ('planner', 'planner')], default='greedy', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='configuration',
+            name='pathing',
+            field=models.CharField(choices=[('greedy', 'greedy'), ('planner', 'planner')], default='planner', max_length=16),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0005_configuration_pathing'),
+    ]
+
+    operations = [
+        # Games started before keep moving their agents one after the other
+        migrations.AddField(
+            model_name='configuration',
+            name='movement',
+            field=models.CharField(choices=[('sequential', 'sequential'), ('reserved', 'reserved')], default='sequential', max_length=16),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='configuration',
+            name='movement',
+            field=models.CharField(choices=[('sequential', 'sequential'), ('reserved', 'reserved')], default='reserved', max_length=16),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:20
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0006_configuration_movement'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuration',
+            name='grid_height',
+            field=models.IntegerField(default=32, validators=[django.core.validators.MinValueValidator(4), django.core.validators.MaxValueValidator(4096)]),
+        ),
+        migrations.AddField(
+            model_name='configuration',
+            name='grid_width',
+            field=models.IntegerField(default=32, validators=[django.core.validators.MinValueValidator(4), django.core.validators.MaxValueValidator(4096)]),
+        ),
+    ]
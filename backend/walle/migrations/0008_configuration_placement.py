@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0007_configuration_grid_size'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='configuration',
+            name='placement',
+            field=models.CharField(choices=[('uniform', 'uniform'), ('clustered', 'clustered'), ('hot-spot', 'hot-spot')], default='uniform', max_length=16),
+        ),
+    ]
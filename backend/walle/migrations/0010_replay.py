@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0009_simulationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Replay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('game_id', models.IntegerField(unique=True)),
+                ('grid_width', models.IntegerField()),
+                ('grid_height', models.IntegerField()),
+                ('base_position_x', models.IntegerField()),
+                ('base_position_y', models.IntegerField()),
+                ('total_wastes', models.IntegerField()),
+                ('seed', models.BigIntegerField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ReplayEvents',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_turn', models.IntegerField()),
+                ('last_turn', models.IntegerField()),
+                ('events', models.BinaryField()),
+                ('replay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='walle.replay')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['replay', 'first_turn'], name='walle_repla_replay__471b44_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplayKeyframe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('turn_number', models.IntegerField()),
+                ('snapshot', models.BinaryField()),
+                ('replay', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='keyframes', to='walle.replay')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('replay', 'turn_number'), name='unique_replay_keyframe')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0010_replay'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='game',
+            name='plan',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+    ]
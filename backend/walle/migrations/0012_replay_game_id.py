@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 20:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('walle', '0011_game_plan'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='replay',
+            name='game_id',
+            field=models.BigIntegerField(unique=True),
+        ),
+    ]
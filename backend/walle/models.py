@@ -1,11 +1,50 @@
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
-import json
+from .assignment import HUNGARIAN, STRATEGIES
+from .board import MAX_GRID_SIZE, MIN_GRID_SIZE
+from .planner import PATHING_MODES, PLANNER
+from .movement import MOVEMENT_MODES, RESERVED
+from .placement import DISTRIBUTIONS, UNIFORM
+from .encoding import encode_positions, decode_positions, encode_agents, decode_agents
 
 class Configuration(models.Model):
     num_agents = models.IntegerField()
     num_wastes = models.IntegerField()
     base_position_x = models.IntegerField()
     base_position_y = models.IntegerField()
+    # Size of the board, cells are indexed from 0 on both axes
+    grid_width = models.IntegerField(
+        default=32, validators=[MinValueValidator(MIN_GRID_SIZE), MaxValueValidator(MAX_GRID_SIZE)]
+    )
+    grid_height = models.IntegerField(
+        default=32, validators=[MinValueValidator(MIN_GRID_SIZE), MaxValueValidator(MAX_GRID_SIZE)]
+    )
+    # Seed of the game random generators, drawn at start when not given
+    seed = models.BigIntegerField(null=True, blank=True)
+    # How agents are matched to the known wastes, see walle/assignment.py
+    assignment = models.CharField(
+        max_length=16,
+        choices=[(strategy, strategy) for strategy in STRATEGIES],
+        default=HUNGARIAN
+    )
+    # How agents find their way, see walle/planner.py
+    pathing = models.CharField(
+        max_length=16,
+        choices=[(mode, mode) for mode in PATHING_MODES],
+        default=PLANNER
+    )
+    # How the agents' moves of a turn are resolved, see walle/movement.py
+    movement = models.CharField(
+        max_length=16,
+        choices=[(mode, mode) for mode in MOVEMENT_MODES],
+        default=RESERVED
+    )
+    # How the wastes are spread over the board at start, see walle/placement.py
+    placement = models.CharField(
+        max_length=16,
+        choices=[(distribution, distribution) for distribution in DISTRIBUTIONS],
+        default=UNIFORM
+    )
     
     @property
     def base_position(self):
@@ -17,35 +56,120 @@ class Game(models.Model):
     is_active = models.BooleanField(default=False)
     turn_number = models.IntegerField(default=-1)
     
-    # Serialized field for waste positions (list of tuples)
-    _waste_positions = models.TextField(blank=True, default='[]')
+    # Packed positions (see walle/encoding.py), decoded once per instance
+    # and value: the lists returned by the properties must not be mutated
+    _waste_positions = models.BinaryField(blank=True, default=b'')
     
-    # Serialized field for agent positions (list of tuples with 3 elements)
-    _agent_positions = models.TextField(blank=True, default='[]')
+    # Packed agent positions with a bit array of their carry flags
+    _agent_positions = models.BinaryField(blank=True, default=b'')
     
-    # Serialized field for known waste positions
-    _known_waste_positions = models.TextField(blank=True, default='[]')
+    # Packed known waste positions
+    _known_waste_positions = models.BinaryField(blank=True, default=b'')
+    
+    # Packed targets, paths and seen cells of the board (see Board.plan_data),
+    # empty until the game is first saved
+    plan = models.BinaryField(blank=True, default=b'')
+    
+    def _decoded(self, field, decode):
+        """
+        Decode a packed field, reusing the last result while the field is unchanged
+        """
+        data = getattr(self, field)
+        cache = self.__dict__.setdefault('_decoded_fields', {})
+        cached = cache.get(field)
+        if cached is not None and cached[0] is data:
+            return cached[1]
+        positions = decode(data)
+        cache[field] = (data, positions)
+        return positions
     
     @property
     def waste_positions(self):
-        return json.loads(self._waste_positions)
+        return self._decoded('_waste_positions', decode_positions)
     
     @waste_positions.setter
     def waste_positions(self, positions):
-        self._waste_positions = json.dumps(positions)
+        self._waste_positions = encode_positions(positions)
     
     @property
     def agent_positions(self):
-        return json.loads(self._agent_positions)
+        return self._decoded('_agent_positions', decode_agents)
     
     @agent_positions.setter
     def agent_positions(self, positions):
-        self._agent_positions = json.dumps(positions)
+        self._agent_positions = encode_agents(positions)
     
     @property
     def known_waste_positions(self):
-        return json.loads(self._known_waste_positions)
+        return self._decoded('_known_waste_positions', decode_positions)
     
     @known_waste_positions.setter
     def known_waste_positions(self, positions):
-        self._known_waste_positions = json.dumps(positions)
+        self._known_waste_positions = encode_positions(positions)
+
+# Lifecycle of a simulation job, see walle/jobs.py
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+JOB_STATUSES = (QUEUED, RUNNING, DONE, FAILED)
+
+class SimulationJob(models.Model):
+    configuration = models.ForeignKey(Configuration, on_delete=models.CASCADE, related_name='jobs')
+    max_turns = models.IntegerField()
+    status = models.CharField(
+        max_length=16,
+        choices=[(status, status) for status in JOB_STATUSES],
+        default=QUEUED,
+        db_index=True
+    )
+    # Worker running the job, as host:pid
+    worker = models.CharField(max_length=64, blank=True, default='')
+    
+    # Progress while running, final counts once done
+    turns_played = models.IntegerField(default=0)
+    waste_collected = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    # Time spent playing, and why the job failed
+    seconds = models.FloatField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Last progress report of the worker, a running job without any for a
+    # while is given to another worker
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+# Append-only log of the turns of a game, see walle/replay.py
+class Replay(models.Model):
+    # Not a foreign key: the log is kept when the game is stopped and deleted.
+    # Sized as the BigAutoField id of the game
+    game_id = models.BigIntegerField(unique=True)
+    grid_width = models.IntegerField()
+    grid_height = models.IntegerField()
+    base_position_x = models.IntegerField()
+    base_position_y = models.IntegerField()
+    total_wastes = models.IntegerField()
+    seed = models.BigIntegerField(null=True, blank=True)
+
+class ReplayKeyframe(models.Model):
+    replay = models.ForeignKey(Replay, on_delete=models.CASCADE, related_name='keyframes')
+    turn_number = models.IntegerField()
+    # Agents, wastes and waste count at that turn
+    snapshot = models.BinaryField()
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['replay', 'turn_number'], name='unique_replay_keyframe'),
+        ]
+
+class ReplayEvents(models.Model):
+    replay = models.ForeignKey(Replay, on_delete=models.CASCADE, related_name='events')
+    # Changes of the agents over consecutive turns, never going past a keyframe
+    first_turn = models.IntegerField()
+    last_turn = models.IntegerField()
+    events = models.BinaryField()
+    
+    class Meta:
+        indexes = [models.Index(fields=['replay', 'first_turn'])]
@@ -0,0 +1,98 @@
+# Agents move one after the other in the shuffled turn order (the original behaviour)
+SEQUENTIAL = 'sequential'
+# Agents say where they want to go, then every move is resolved at once
+RESERVED = 'reserved'
+MOVEMENT_MODES = (SEQUENTIAL, RESERVED)
+
+# Outcome of an agent's intended move
+STAYED = 0
+MOVED = 1
+# Moved to a cell held by an agent carrying nothing, which took its place
+PUSHED = 2
+# Taken to the cell of the agent that pushed it
+DISPLACED = 3
+# Being resolved, meeting it again closes a cycle of moves
+RESOLVING = 4
+
+
+def priority_order(board, order):
+    """
+    Put the carriers first in a turn order, keeping the order of each group
+    """
+    agents = board.agents
+    return [index for index in order if agents[index][2]] + [index for index in order if not agents[index][2]]
+
+
+def resolve_moves(board, intents, priority):
+    """
+    Move agents of a board to the neighbouring cells they intend to, all at once
+
+    Each cell is reserved by the first agent of the priority order that
+    claims it. A claim goes through when the cell is free, when the agent
+    holding it moves away, or when both are part of the same cycle of
+    moves (two agents trading places being the shortest one). A carrier
+    whose claim fails on an agent carrying nothing that stays pushes it to
+    the cell it leaves. Each agent is visited once.
+    Returns the agents whose move did not go through
+    """
+    agents = board.agents
+
+    # Reservation table of the claimed cells
+    reservations = {}
+    for index in priority:
+        cell = intents.get(index)
+        if cell is not None and cell not in reservations:
+            reservations[cell] = index
+
+    states = {}
+    for start in intents:
+        if start in states:
+            continue
+
+        # Follow the chain of agents waiting on the cell of the next one
+        chain = []
+        index = start
+        while True:
+            state = states.get(index)
+            if state is not None:
+                vacated = state in (MOVED, RESOLVING)
+                break
+            cell = intents.get(index)
+            if cell is None or reservations[cell] != index:
+                states[index] = STAYED
+                vacated = False
+                break
+            states[index] = RESOLVING
+            chain.append(index)
+            index = board.agent_at(*cell)
+            if index is None:
+                vacated = True
+                break
+
+        # Each agent of the chain moves if the cell it waits on is vacated
+        for index in reversed(chain):
+            if vacated:
+                states[index] = MOVED
+                continue
+            occupant = board.agent_at(*intents[index])
+            if agents[index][2] and not agents[occupant][2] and states[occupant] == STAYED:
+                states[index] = PUSHED
+                states[occupant] = DISPLACED
+            else:
+                states[index] = STAYED
+
+    stalled = []
+    moves = []
+    for index, state in states.items():
+        if state in (MOVED, PUSHED):
+            i, j, _ = agents[index]
+            moves.append((index, intents[index]))
+            if state == PUSHED:
+                moves.append((board.agent_at(*intents[index]), (i, j)))
+        elif state == STAYED and index in intents:
+            stalled.append(index)
+
+    # The board only counts agents per cell, so the order of the moves does not matter
+    for index, cell in moves:
+        board.move(index, *cell)
+    return stalled
@@ -0,0 +1,11 @@
+from rest_framework.negotiation import DefaultContentNegotiation
+
+
+class FirstRendererNegotiation(DefaultContentNegotiation):
+    """
+    Answer with the first renderer of the view whatever the client accepts,
+    without parsing the Accept header: the game endpoints only speak JSON
+    """
+    def select_renderer(self, request, renderers, format_suffix=None):
+        renderer = renderers[0]
+        return renderer, renderer.media_type
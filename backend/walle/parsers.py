@@ -0,0 +1,12 @@
+from rest_framework.parsers import JSONParser
+
+from .metrics import timed
+
+
+class TimedJSONParser(JSONParser):
+    """
+    JSON parser timing the decoding of request bodies
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        with timed("json_decode"):
+            return super().parse(stream, media_type, parser_context)
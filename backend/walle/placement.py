@@ -0,0 +1,93 @@
+from bisect import bisect_right
+
+# Wastes are spread evenly over the board (the original behaviour)
+UNIFORM = 'uniform'
+# Wastes lie in small clusters scattered over the board
+CLUSTERED = 'clustered'
+# Part of the wastes pile up around a few spots, the rest are spread evenly
+HOT_SPOT = 'hot-spot'
+DISTRIBUTIONS = (UNIFORM, CLUSTERED, HOT_SPOT)
+
+# Wastes per cluster on average, and the standard deviation of their
+# distance to its centre in cells
+CLUSTER_SIZE = 8
+CLUSTER_SPREAD = 2
+
+# Number of hot spots, share of the wastes around them, and the standard
+# deviation of their distance to a spot as a fraction of the shorter side
+HOT_SPOTS = 3
+HOT_SPOT_SHARE = 0.5
+HOT_SPOT_SPREAD = 0.08
+
+# Draws in a row missing a free cell around the centres before placing the
+# rest evenly, so that crowded clusters are not drawn from forever
+MAX_MISSES = 16
+
+
+def sample_free_cells(rng, n, width, height, taken=()):
+    """
+    Draw up to n distinct cells of the board outside of taken, a sorted list
+    of cell indices x * height + y
+
+    Cells are drawn by their rank among the free cells in row-major order,
+    the taken cells before a rank being skipped with a binary search, so
+    the cost depends on n and the taken cells rather than the board area.
+    """
+    # For each taken cell, the number of free cells before it
+    free_before = [cell - rank for rank, cell in enumerate(taken)]
+    free_count = width * height - len(taken)
+    return [
+        divmod(rank + bisect_right(free_before, rank), height)
+        for rank in rng.sample(range(free_count), min(n, free_count))
+    ]
+
+
+def _sample_around(rng, n, centres, spread, width, height, taken):
+    """
+    Draw up to n cells normally distributed around random centres, skipping
+    the taken cell indices and those off the board
+    Drawn cells are added to taken
+    """
+    cells = []
+    misses = 0
+    while len(cells) < n and misses < MAX_MISSES:
+        centre_x, centre_y = rng.choice(centres)
+        x = round(rng.gauss(centre_x, spread))
+        y = round(rng.gauss(centre_y, spread))
+        cell = x * height + y
+        if not (0 <= x < width and 0 <= y < height) or cell in taken:
+            misses += 1
+            continue
+        misses = 0
+        taken.add(cell)
+        cells.append((x, y))
+    return cells
+
+
+def place(num_agents, num_wastes, rng, width=32, height=32, distribution=UNIFORM):
+    """
+    Place the agents and the wastes of a new game in one pass
+
+    Agents are spread evenly, wastes follow the distribution and never
+    share a cell with an agent. Uniform placement draws the same cells as
+    rand_list did for the agents then the wastes, so seeded games keep
+    their layout.
+    Returns the agents as (x, y, False) and the wastes as (x, y)
+    """
+    agents = sample_free_cells(rng, num_agents, width, height)
+    taken = {x * height + y for x, y in agents}
+
+    if distribution == CLUSTERED:
+        centres = sample_free_cells(rng, max(1, round(num_wastes / CLUSTER_SIZE)), width, height)
+        wastes = _sample_around(rng, num_wastes, centres, CLUSTER_SPREAD, width, height, taken)
+    elif distribution == HOT_SPOT:
+        centres = sample_free_cells(rng, HOT_SPOTS, width, height)
+        spread = max(1, HOT_SPOT_SPREAD * min(width, height))
+        wastes = _sample_around(rng, round(num_wastes * HOT_SPOT_SHARE), centres, spread, width, height, taken)
+    else:
+        wastes = []
+
+    # The rest, with whatever did not fit around the centres, is spread evenly
+    wastes += sample_free_cells(rng, num_wastes - len(wastes), width, height, sorted(taken))
+
+    return [(x, y, False) for x, y in agents], wastes
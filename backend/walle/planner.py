@@ -0,0 +1,277 @@
+import heapq
+
+# Single greedy step towards the target with some randomness (the original behaviour)
+GREEDY = 'greedy'
+# Shortest steps to the base for carriers, A* around the other agents for the rest
+PLANNER = 'planner'
+PATHING_MODES = (GREEDY, PLANNER)
+
+# Extra cost of going through a cell held by an agent when planning a path,
+# counted within CROWD_RADIUS steps of the start: farther agents will have
+# moved by the time they are reached
+OCCUPIED_COST = 4
+CROWD_RADIUS = 4
+
+# Turns an agent waits behind another one before stepping aside
+PATIENCE = 2
+
+# Explorers head to cells farther than this from each other's, the vision radius
+EXPLORER_SPACING = 5
+
+# Steps to the neighbours of a cell, in the order they are tried
+NEIGHBOURS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+
+def plan_path(board, start, target):
+    """
+    Find the cheapest path from start to target with A*, cells held by agents
+    near the start costing more to go through
+    Returns the cells to step on, the target last, or None when it cannot be reached
+    """
+    width, height = board.width, board.height
+    agent_grid = board.agent_grid
+    start_x, start_y = start
+    target_x, target_y = target
+
+    costs = {start: 0}
+    came_from = {}
+    # Entries are (estimate, cost, cell), the Manhattan distance never overestimates
+    heap = [(abs(start[0] - target_x) + abs(start[1] - target_y), 0, start)]
+    while heap:
+        _, cost, cell = heapq.heappop(heap)
+        if cell == target:
+            path = []
+            while cell != start:
+                path.append(cell)
+                cell = came_from[cell]
+            path.reverse()
+            return path
+        if cost > costs[cell]:
+            continue
+
+        x, y = cell
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            step = 1
+            if agent_grid[nx * height + ny] and abs(nx - start_x) + abs(ny - start_y) <= CROWD_RADIUS:
+                step += OCCUPIED_COST
+            new_cost = cost + step
+            if new_cost < costs.get((nx, ny), new_cost + 1):
+                costs[(nx, ny)] = new_cost
+                came_from[(nx, ny)] = cell
+                estimate = new_cost + abs(nx - target_x) + abs(ny - target_y)
+                heapq.heappush(heap, (estimate, new_cost, (nx, ny)))
+    return None
+
+
+class Planner:
+    """
+    Deterministic routing of the agents of a board
+
+    Carriers step straight down the distance to the base, trading places
+    with agents that carry nothing when those stand in their way, so that
+    the crowd around the base cannot lock it. Other agents follow an A*
+    path to their target, kept from turn to turn until the target changes
+    or the next cell is taken. An agent blocked for more than PATIENCE
+    turns steps aside to a free cell.
+
+    When moves are resolved all at once, agents also step to cells held by
+    agents that may move away in the same turn, and are told by stalled
+    when they could not.
+    """
+    def __init__(self, width, height, simultaneous=False):
+        self.width = width
+        self.height = height
+        self.simultaneous = simultaneous
+
+        # Remaining cells of each agent's path, next one last, with its target
+        self.paths = {}
+        # Turns each agent spent blocked in a row
+        self.blocked = {}
+        # Cell each exploring agent heads to, and the same by square areas of
+        # EXPLORER_SPACING cells so that only the neighbouring areas are checked
+        self.exploring = {}
+        self.exploring_areas = {}
+
+    def restore(self, exploring, blocked, paths):
+        """
+        Take back the explored cells, blocked turns and paths of a saved board
+        """
+        for agent, target in exploring.items():
+            self._start_exploring(agent, target)
+        self.blocked.update(blocked)
+        self.paths.update(paths)
+
+    def explore(self, board, agent):
+        """
+        Return the cell an agent with nothing to collect should head to, or
+        None once every cell has been seen
+
+        Explorers keep heading to the same cell until it comes into sight,
+        the closest unseen one away from where the others are going.
+        """
+        target = self.exploring.get(agent)
+        if target is not None and not board.is_seen(*target):
+            return target
+        if not board.unseen_count:
+            self._stop_exploring(agent)
+            return None
+
+        x, y, _ = board.agents[agent]
+        target = closest = None
+        for cx, cy in self._cells_by_distance(x, y):
+            if board.is_seen(cx, cy):
+                continue
+            if closest is None:
+                closest = (cx, cy)
+            if self._spaced(agent, cx, cy):
+                target = (cx, cy)
+                break
+
+        target = target or closest
+        self._stop_exploring(agent)
+        if target is not None:
+            self._start_exploring(agent, target)
+        return target
+
+    def _start_exploring(self, agent, target):
+        self.exploring[agent] = target
+        area = (target[0] // EXPLORER_SPACING, target[1] // EXPLORER_SPACING)
+        self.exploring_areas.setdefault(area, {})[agent] = target
+
+    def _spaced(self, agent, x, y):
+        """
+        Check that no other explorer heads to a cell within EXPLORER_SPACING of a cell
+        """
+        area_x, area_y = x // EXPLORER_SPACING, y // EXPLORER_SPACING
+        for ax in (area_x - 1, area_x, area_x + 1):
+            for ay in (area_y - 1, area_y, area_y + 1):
+                for other, (ox, oy) in self.exploring_areas.get((ax, ay), {}).items():
+                    if other != agent and abs(x - ox) + abs(y - oy) <= EXPLORER_SPACING:
+                        return False
+        return True
+
+    def _stop_exploring(self, agent):
+        target = self.exploring.pop(agent, None)
+        if target is not None:
+            area = (target[0] // EXPLORER_SPACING, target[1] // EXPLORER_SPACING)
+            explorers = self.exploring_areas[area]
+            del explorers[agent]
+            if not explorers:
+                del self.exploring_areas[area]
+
+    def _cells_by_distance(self, x, y):
+        """
+        Yield the cells of the board by Manhattan distance to a position, in
+        row-major order at the same distance, so that a large board is only
+        searched as far as needed
+        """
+        width, height = self.width, self.height
+        farthest = max(x, width - 1 - x) + max(y, height - 1 - y)
+        for distance in range(farthest + 1):
+            for cx in range(max(0, x - distance), min(width, x + distance + 1)):
+                rest = distance - abs(cx - x)
+                if y - rest >= 0:
+                    yield cx, y - rest
+                if rest and y + rest < height:
+                    yield cx, y + rest
+
+    def next_step(self, board, agent, target, rng=None):
+        """
+        Return the cell an agent moves to this turn, or None to stay in place
+        A carrier may be sent to a cell held by another agent, to swap with it
+        """
+        x, y, carrying = board.agents[agent]
+        if self.exploring.get(agent) not in (None, target):
+            # Found something to do on the way
+            self._stop_exploring(agent)
+        if (x, y) == target:
+            return None
+
+        if carrying:
+            step = self._downhill(board, x, y, target)
+        else:
+            step = self._follow_path(board, agent, x, y, target)
+
+        if step is not None:
+            if not self.simultaneous or board.is_free(*step):
+                self.blocked.pop(agent, None)
+                return step
+            if self.blocked.get(agent, 0) <= PATIENCE:
+                return step
+        else:
+            blocked = self.blocked.get(agent, 0) + 1
+            if blocked <= PATIENCE:
+                self.blocked[agent] = blocked
+                return None
+
+        # Make room instead of waiting forever, the path is planned again afterwards
+        self.blocked.pop(agent, None)
+        self.paths.pop(agent, None)
+        moves = board.free_neighbours(x, y, rng)
+        return moves[0] if moves else None
+
+    def stalled(self, agent):
+        """
+        Count a turn an agent could not take the step it was given
+        """
+        self.blocked[agent] = self.blocked.get(agent, 0) + 1
+
+    def _downhill(self, board, x, y, target):
+        """
+        Step to a neighbour closer to the target, along the axis with the
+        most way left so that the other one stays open
+
+        Free cells come first, then cells held by an agent carrying nothing,
+        then when moves are resolved all at once cells held by carriers.
+        """
+        width, height = self.width, self.height
+        target_x, target_y = target
+        # The board has no obstacles: the Manhattan distance is the number of steps
+        # left, with nothing to compute or keep per target
+        here = abs(x - target_x) + abs(y - target_y)
+        best = None
+        best_key = None
+        for dx, dy in NEIGHBOURS:
+            nx, ny = x + dx, y + dy
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            if abs(nx - target_x) + abs(ny - target_y) >= here:
+                continue
+            if board.is_free(nx, ny):
+                rank = 2
+            elif not board.agents[board.agent_at(nx, ny)][2]:
+                rank = 1
+            elif self.simultaneous:
+                rank = 0
+            else:
+                continue
+            key = (rank, abs(target_x - x) if dx else abs(target_y - y))
+            if best_key is None or key > best_key:
+                best, best_key = (nx, ny), key
+        return best
+
+    def _follow_path(self, board, agent, x, y, target):
+        path = self.paths.get(agent)
+        if path is not None:
+            path_target, cells = path
+            # The step given last turn was taken
+            if cells and cells[-1] == (x, y):
+                cells.pop()
+            if path_target == target and cells and abs(cells[-1][0] - x) + abs(cells[-1][1] - y) == 1:
+                if board.is_free(*cells[-1]) or (self.simultaneous and not self.blocked.get(agent)):
+                    return cells[-1]
+
+        # No path, a stale one or a blocked one: plan again around the agents as they stand
+        cells = plan_path(board, (x, y), target)
+        if not cells:
+            self.paths.pop(agent, None)
+            return None
+        cells.reverse()
+        self.paths[agent] = (target, cells)
+        if self.simultaneous or board.is_free(*cells[-1]):
+            return cells[-1]
+        return None
+
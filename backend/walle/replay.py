@@ -0,0 +1,230 @@
+import struct
+
+from .encoding import (
+    decode_agents, decode_positions, encode_agents, encode_positions, read_varint, write_varint
+)
+from .models import Replay, ReplayEvents, ReplayKeyframe
+
+# Turns between two keyframes: seeking to a turn applies the events of at
+# most this many turns to the keyframe before it
+KEYFRAME_EVERY = 100
+
+# Changes of an agent in a turn, each stored as a varint of index << 3 | code.
+# Steps to a neighbouring cell come first, with the carry flag unchanged
+STEP_CODES = {(1, 0): 0, (-1, 0): 1, (0, 1): 2, (0, -1): 3}
+STEPS = {code: step for step, code in STEP_CODES.items()}
+# Carry flag changed in place, picking up the waste of the cell or dropping one at the base
+PICK_UP = 4
+DROP = 5
+# Anything else, followed by varints of the new x and y and a byte of the carry flag
+SET = 7
+
+# A snapshot starts with the waste count and the length of the packed agents,
+# followed by the packed agents and wastes (see walle/encoding.py)
+SNAPSHOT_HEADER = struct.Struct('<II')
+
+
+def encode_snapshot(agents, wastes, waste_collected):
+    agent_data = encode_agents(agents)
+    return SNAPSHOT_HEADER.pack(waste_collected, len(agent_data)) + agent_data + encode_positions(wastes)
+
+
+def decode_snapshot(data):
+    """
+    Unpack a snapshot into its agents, wastes and waste count
+    """
+    data = bytes(data)
+    waste_collected, length = SNAPSHOT_HEADER.unpack_from(data)
+    start = SNAPSHOT_HEADER.size
+    agents = decode_agents(data[start:start + length])
+    wastes = decode_positions(data[start + length:])
+    return agents, wastes, waste_collected
+
+
+def encode_turn(buffer, previous, agents):
+    """
+    Append the changes of the agents in a turn to buffer, as their number
+    followed by the change of each agent, and bring previous up to date
+    """
+    changes = bytearray()
+    count = 0
+    for index, (old, new) in enumerate(zip(previous, agents)):
+        if old == new:
+            continue
+        count += 1
+        x0, y0, w0 = old
+        x, y, w = new
+        if (x, y) == (x0, y0):
+            code = PICK_UP if w else DROP
+        elif w == w0:
+            code = STEP_CODES.get((x - x0, y - y0), SET)
+        else:
+            code = SET
+        write_varint(changes, index << 3 | code)
+        if code == SET:
+            write_varint(changes, x)
+            write_varint(changes, y)
+            changes.append(w)
+        previous[index] = new
+    write_varint(buffer, count)
+    buffer += changes
+
+
+class ReplayState:
+    """
+    A game rebuilt from its replay log, optionally tracking what changed
+    after a turn as a delta would
+    """
+    def __init__(self, turn_number, agents, wastes, waste_collected, track_after=None):
+        self.turn_number = turn_number
+        self.agents = agents
+        self.wastes = {(x, y) for x, y in wastes}
+        self.waste_collected = waste_collected
+        self.track_after = track_after
+        self.changed_agents = {}
+        self.removed_wastes = []
+
+    def apply(self, data, first_turn, last_turn):
+        """
+        Apply the turns of an events block, from first_turn up to last_turn
+        """
+        agents = self.agents
+        offset = 0
+        for turn in range(first_turn, last_turn + 1):
+            track = self.track_after is not None and turn > self.track_after
+            count, offset = read_varint(data, offset)
+            for _ in range(count):
+                value, offset = read_varint(data, offset)
+                index, code = value >> 3, value & 7
+                x, y, w = agents[index]
+                if code in STEPS:
+                    dx, dy = STEPS[code]
+                    x, y = x + dx, y + dy
+                    carry = w
+                elif code == SET:
+                    x, offset = read_varint(data, offset)
+                    y, offset = read_varint(data, offset)
+                    carry = bool(data[offset])
+                    offset += 1
+                else:
+                    carry = code == PICK_UP
+
+                # Same bookkeeping as the board: a pick up removes the waste under the agent
+                if carry and not w:
+                    self.wastes.discard((x, y))
+                    if track:
+                        self.removed_wastes.append([x, y])
+                elif w and not carry:
+                    self.waste_collected += 1
+                agents[index] = [x, y, carry]
+                if track:
+                    self.changed_agents[index] = agents[index]
+            self.turn_number = turn
+
+
+def seek(replay, turn_number, since=None):
+    """
+    Rebuild a game at a turn from its replay log, without playing any turn
+
+    The state starts from the last keyframe before the turn, or before since
+    to track the changes made after it. Returns None when the turn was not
+    recorded.
+    """
+    start = since if since is not None and since <= turn_number else turn_number
+    keyframe = replay.keyframes.filter(turn_number__lte=start).order_by('-turn_number').first()
+    if keyframe is None:
+        return None
+
+    agents, wastes, waste_collected = decode_snapshot(keyframe.snapshot)
+    state = ReplayState(keyframe.turn_number, agents, wastes, waste_collected,
+                        start if since is not None else None)
+    blocks = replay.events.filter(
+        first_turn__gt=keyframe.turn_number, first_turn__lte=turn_number
+    ).order_by('first_turn')
+    for block in blocks:
+        if block.first_turn != state.turn_number + 1:
+            break
+        state.apply(bytes(block.events), block.first_turn, min(block.last_turn, turn_number))
+
+    if state.turn_number != turn_number:
+        return None
+    return state
+
+
+class ReplayRecorder:
+    """
+    Turns of a live game not written to its replay log yet
+
+    Starts with a keyframe of the game as it is loaded, and records the
+    changes of every turn played after it, with a keyframe every
+    KEYFRAME_EVERY turns. Blocks of events end at keyframes, so that a
+    seek never reads events from before the keyframe it starts from.
+    """
+    def __init__(self, game_id, details, turn_number, board, waste_collected):
+        self.game_id = game_id
+        # Fields of the Replay row, created on the first save
+        self.details = details
+        self.replay_id = None
+
+        self.agents = list(board.agents)
+        self.turn_number = turn_number
+        self.keyframes = []
+        self.blocks = []
+        self.blocks_size = 0
+        # Events of the turns from first_turn on, since the last keyframe or save
+        self.first_turn = turn_number + 1
+        self.block = bytearray()
+        self.keyframe(board, waste_collected)
+
+    @property
+    def buffered(self):
+        """
+        Size of the events waiting to be saved, in bytes
+        """
+        return self.blocks_size + len(self.block)
+
+    def keyframe(self, board, waste_collected):
+        self.keyframes.append(ReplayKeyframe(
+            turn_number=self.turn_number,
+            snapshot=encode_snapshot(board.agents, board.wastes, waste_collected)
+        ))
+        self._end_block()
+
+    def record(self, turn_number, board, waste_collected):
+        """
+        Record the turn just played on the board
+        """
+        encode_turn(self.block, self.agents, board.agents)
+        self.turn_number = turn_number
+        if turn_number % KEYFRAME_EVERY == 0:
+            self.keyframe(board, waste_collected)
+
+    def _end_block(self):
+        if self.turn_number >= self.first_turn:
+            self.blocks.append(ReplayEvents(
+                first_turn=self.first_turn, last_turn=self.turn_number, events=bytes(self.block)
+            ))
+            self.blocks_size += len(self.block)
+        self.first_turn = self.turn_number + 1
+        self.block = bytearray()
+
+    def save(self):
+        """
+        Append the recorded turns to the replay log
+        """
+        self._end_block()
+        if not self.keyframes and not self.blocks:
+            return
+
+        if self.replay_id is None:
+            replay, _ = Replay.objects.get_or_create(game_id=self.game_id, defaults=self.details)
+            self.replay_id = replay.id
+        for row in self.keyframes + self.blocks:
+            row.replay_id = self.replay_id
+
+        # A game loaded again starts with a keyframe of a turn already logged
+        ReplayKeyframe.objects.bulk_create(self.keyframes, ignore_conflicts=True)
+        ReplayEvents.objects.bulk_create(self.blocks)
+        self.keyframes = []
+        self.blocks = []
+        self.blocks_size = 0
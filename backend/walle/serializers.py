@@ -1,15 +1,76 @@
 from rest_framework import serializers
-from .models import Configuration, Game
+from .bulk import MAX_BULK_GAMES, product_size
+from .cache import MAX_ROUND_TURNS
+from .models import Configuration, Game, SimulationJob
+from .simulation import DEFAULT_MAX_TURNS, JOB_TURNS_LIMIT, MAX_TURNS_LIMIT
+from .streaming import DEFAULT_TICK_RATE, MAX_TICK_RATE, STREAM_MODES, DELTA
 
 class ConfigurationSerializer(serializers.ModelSerializer):
     class Meta:
         model = Configuration
-        fields = ['num_agents', 'num_wastes', 'base_position_x', 'base_position_y']
+        fields = ['num_agents', 'num_wastes', 'base_position_x', 'base_position_y', 'grid_width', 'grid_height',
+                  'seed', 'assignment', 'pathing', 'movement', 'placement']
 
-class GameStateSerializer(serializers.Serializer):
-    waste_collected = serializers.IntegerField()
+class BulkStartRequestSerializer(serializers.Serializer):
+    games = serializers.ListField(child=serializers.DictField(), required=False)
+    product = serializers.DictField(required=False)
+    repeat = serializers.IntegerField(min_value=1, max_value=MAX_BULK_GAMES, default=1)
+
+    def validate(self, data):
+        if ('games' in data) == ('product' in data):
+            raise serializers.ValidationError("Give either 'games' or 'product'.")
+        count = len(data['games']) if 'games' in data else product_size(data['product'])
+        if count * data['repeat'] > MAX_BULK_GAMES:
+            raise serializers.ValidationError(f"At most {MAX_BULK_GAMES} games can be created at once.")
+        return data
+
+class RunRequestSerializer(serializers.Serializer):
+    max_turns = serializers.IntegerField(
+        min_value=1, max_value=MAX_TURNS_LIMIT, default=DEFAULT_MAX_TURNS,
+        error_messages={'max_value': "Ensure this value is less than or equal to {max_value}, "
+                                     "queue longer runs with /jobs/."}
+    )
+
+class JobRequestSerializer(serializers.Serializer):
+    max_turns = serializers.IntegerField(min_value=1, max_value=JOB_TURNS_LIMIT, default=DEFAULT_MAX_TURNS)
+
+class SimulationJobSerializer(serializers.ModelSerializer):
+    job_id = serializers.IntegerField(source='id')
+    total_wastes = serializers.IntegerField(source='configuration.num_wastes')
+    configuration = ConfigurationSerializer()
+
+    class Meta:
+        model = SimulationJob
+        fields = ['job_id', 'status', 'configuration', 'max_turns', 'turns_played', 'waste_collected',
+                  'total_wastes', 'completed', 'seconds', 'error', 'worker', 'created_at', 'started_at',
+                  'finished_at']
+
+class ReplaySerializer(serializers.Serializer):
+    game_id = serializers.IntegerField()
+    first_turn = serializers.IntegerField()
+    last_turn = serializers.IntegerField()
+    keyframe_every = serializers.IntegerField()
     total_wastes = serializers.IntegerField()
-    agent_positions = serializers.ListField()
-    waste_positions = serializers.ListField()
     base_position = serializers.ListField()
+    grid_size = serializers.ListField()
+    seed = serializers.IntegerField(allow_null=True)
+
+class DeltaRequestSerializer(serializers.Serializer):
+    since = serializers.IntegerField(required=False, min_value=-1)
+
+class NextRoundRequestSerializer(DeltaRequestSerializer):
+    turns = serializers.IntegerField(min_value=1, max_value=MAX_ROUND_TURNS, default=1)
+    frames = serializers.BooleanField(default=False)
+
+class GameDeltaSerializer(serializers.Serializer):
+    game_id = serializers.IntegerField()
+    since = serializers.IntegerField()
+    waste_collected = serializers.IntegerField()
+    total_wastes = serializers.IntegerField()
+    changed_agents = serializers.ListField()
+    removed_wastes = serializers.ListField()
     turn_number = serializers.IntegerField()
+
+class StreamRequestSerializer(serializers.Serializer):
+    tick = serializers.FloatField(min_value=0.1, max_value=MAX_TICK_RATE, default=DEFAULT_TICK_RATE)
+    mode = serializers.ChoiceField(choices=STREAM_MODES, default=DELTA)
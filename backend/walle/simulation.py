@@ -0,0 +1,76 @@
+from .assignment import PER_TURN
+from .board import Board
+from .movement import SEQUENTIAL
+from .planner import GREEDY
+from .game_logic import game_rng, play_turn
+
+# Turn cap used when the caller gives none
+DEFAULT_MAX_TURNS = 10000
+
+# Hard limit on the turns a single request may ask for: /run/ plays them in
+# the request, holding the lock of the game, so longer runs go to the jobs
+MAX_TURNS_LIMIT = 50000
+
+# Hard limit on the turns of a job, played by a worker outside of any request
+JOB_TURNS_LIMIT = 1000000
+
+
+def run_board(board, base_pos, waste_collected, num_wastes, max_turns=DEFAULT_MAX_TURNS,
+              seed=None, turn_number=0, progress=None):
+    """
+    Play turns on a board in place until every waste is collected or the turn cap is reached
+
+    With a seed, each turn uses the generator of its number, counted from
+    turn_number, so the run replays identically. progress, when given, is
+    called with the turns played and the waste count after every turn.
+    Returns the updated waste count and a summary of the run.
+    """
+    agent_distances = [0] * len(board.agents)
+    wastes_delivered = [0] * len(board.agents)
+
+    turns = 0
+    while waste_collected < num_wastes and turns < max_turns:
+        previous = board.agents[:]
+        rng = None if seed is None else game_rng(seed, turn_number + turns + 1)
+        waste_collected = play_turn(board, base_pos, waste_collected, rng)
+        turns += 1
+
+        # Every move is a single step, and a drop is the only way to lose a
+        # waste. An agent dropping its waste can still be swapped off the base
+        # by another agent later in the turn
+        for index, ((x0, y0, w0), (x1, y1, w1)) in enumerate(zip(previous, board.agents)):
+            if x0 != x1 or y0 != y1:
+                agent_distances[index] += 1
+            if w0 and not w1:
+                wastes_delivered[index] += 1
+
+        if progress is not None:
+            progress(turns, waste_collected)
+
+    summary = {
+        "turns": turns,
+        "completed": waste_collected >= num_wastes,
+        "agent_distances": agent_distances,
+        "wastes_delivered": wastes_delivered,
+    }
+    return waste_collected, summary
+
+
+def run_to_completion(waste_positions, agent_positions, base_pos, known_waste_positions,
+                      waste_collected, num_wastes, max_turns=DEFAULT_MAX_TURNS,
+                      seed=None, turn_number=0, assignment=PER_TURN, pathing=GREEDY,
+                      movement=SEQUENTIAL, width=32, height=32):
+    """
+    Play turns in memory until every waste is collected or the turn cap is reached
+
+    Returns the final state in the same format as next_turn, followed by a
+    summary of the run.
+    """
+    board = Board(waste_positions, agent_positions, known_waste_positions, width, height,
+                  assignment=assignment, pathing=pathing, movement=movement)
+    waste_collected, summary = run_board(
+        board, base_pos, waste_collected, num_wastes, max_turns, seed, turn_number
+    )
+
+    waste_positions, agent_positions, known_waste_positions = board.to_lists()
+    return waste_positions, agent_positions, known_waste_positions, waste_collected, summary
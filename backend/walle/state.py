@@ -0,0 +1,37 @@
+class GameState:
+    """
+    State of a game at a turn, as sent to the client
+
+    Agents are the (x, y, carrying) tuples of the board and wastes its
+    (x, y) tuples: taking a state copies the lists holding them but not the
+    positions, which the board replaces rather than changes, and the JSON
+    renderer writes the tuples as arrays. The state can so be rendered after
+    the lock of its game is released.
+    """
+    __slots__ = ('game_id', 'waste_collected', 'total_wastes', 'agent_positions', 'waste_positions',
+                 'base_position', 'grid_size', 'turn_number')
+
+    def __init__(self, game_id, waste_collected, total_wastes, agent_positions, waste_positions,
+                 base_position, grid_size, turn_number):
+        self.game_id = game_id
+        self.waste_collected = waste_collected
+        self.total_wastes = total_wastes
+        self.agent_positions = agent_positions
+        self.waste_positions = waste_positions
+        self.base_position = base_position
+        self.grid_size = grid_size
+        self.turn_number = turn_number
+
+    @classmethod
+    def of_board(cls, board, game_id, waste_collected, total_wastes, base_position, turn_number):
+        return cls(
+            game_id, waste_collected, total_wastes,
+            board.agents[:], list(board.wastes),
+            base_position, [board.width, board.height], turn_number
+        )
+
+    def as_dict(self):
+        """
+        The state as the response body, fields in the order the API has always sent them
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
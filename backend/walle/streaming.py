@@ -0,0 +1,189 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+
+from .cache import StaleGame, game_cache
+
+# Turns per second when the client does not ask for a rate, as the frontend auto-run
+DEFAULT_TICK_RATE = 1 / 0.3
+MAX_TICK_RATE = 60
+
+# Messages waiting for a slow subscriber before it is sent a full state instead
+SUBSCRIBER_BUFFER = 32
+
+DELTA = 'delta'
+SNAPSHOT = 'snapshot'
+STREAM_MODES = (DELTA, SNAPSHOT)
+
+# One broadcaster per streamed game, shared by all of its subscribers
+_broadcasters = {}
+
+
+def sse_message(event, data):
+    """
+    Format a Server-Sent Events message
+    """
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class Subscriber:
+    """
+    A client receiving the turns of a streamed game
+    """
+    def __init__(self, mode):
+        self.mode = mode
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_BUFFER)
+
+        # Turn of the last state sent, None until a full state has been sent
+        self.turn_number = None
+        self.closed = False
+
+
+class TurnBroadcaster:
+    """
+    Plays a game at a fixed tick rate and pushes each turn to its subscribers
+
+    The game is simulated once whatever the number of subscribers. Each
+    subscriber gets the changes since the last turn it received, merged by
+    the live game history, or a full state when it asked for snapshots or
+    fell behind.
+    """
+    def __init__(self, live, tick_rate):
+        self.live = live
+        self.tick_rate = tick_rate
+        self.subscribers = set()
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def _play(self, since_turns, with_snapshot):
+        """
+        Play one turn and build the messages for the subscribers, in a worker thread
+        """
+        live = self.live
+        if live.stale:
+            # Evicted, or played by another process: go on with a fresh copy,
+            # sending everyone a full state as its history does not match theirs
+            live = game_cache.get(live.game_id)
+            if live is None:
+                return False, None, None, {}
+            self.live = live
+            since_turns = ()
+            with_snapshot = True
+
+        with live.lock:
+            if live.is_active and not live.deleted and not live.stale:
+                live.play_turn()
+                try:
+                    game_cache.played(live)
+                except StaleGame:
+                    # The turn is dropped and nothing is sent, a fresh copy plays on next tick
+                    return True, None, None, {}
+
+            snapshot = sse_message('state', live.state().as_dict()) if with_snapshot else None
+            deltas = {}
+            for turn_number in since_turns:
+                delta = live.delta_since(turn_number)
+                if delta is not None:
+                    deltas[turn_number] = sse_message('delta', delta)
+            return live.is_active and not live.deleted, live.turn_number, snapshot, deltas
+
+    def publish(self, turn_number, snapshot, deltas):
+        for subscriber in list(self.subscribers):
+            if subscriber.turn_number == turn_number:
+                continue
+
+            message = None
+            if subscriber.mode == DELTA and subscriber.turn_number is not None:
+                message = deltas.get(subscriber.turn_number)
+            if message is None:
+                message = snapshot
+            if message is None:
+                # Joined while the turn was played, served on the next one
+                continue
+
+            try:
+                subscriber.queue.put_nowait(message)
+                subscriber.turn_number = turn_number
+            except asyncio.QueueFull:
+                # Too slow to keep up with deltas, send it a full state once it catches up
+                subscriber.turn_number = None
+
+    async def run(self):
+        try:
+            while self.subscribers:
+                await asyncio.sleep(1 / self.tick_rate)
+
+                since_turns = {
+                    subscriber.turn_number for subscriber in self.subscribers
+                    if subscriber.mode == DELTA and subscriber.turn_number is not None
+                }
+                with_snapshot = any(
+                    subscriber.mode == SNAPSHOT or subscriber.turn_number is None
+                    for subscriber in self.subscribers
+                )
+                active, turn_number, snapshot, deltas = await sync_to_async(self._play)(
+                    since_turns, with_snapshot
+                )
+                self.publish(turn_number, snapshot, deltas)
+
+                if not active:
+                    break
+        finally:
+            if _broadcasters.get(self.live.game_id) is self:
+                del _broadcasters[self.live.game_id]
+
+            # Tell the remaining subscribers that the stream is over
+            for subscriber in self.subscribers:
+                subscriber.closed = True
+                if not subscriber.queue.full():
+                    subscriber.queue.put_nowait(None)
+
+
+async def stream_turns(live, tick_rate=DEFAULT_TICK_RATE, mode=DELTA):
+    """
+    Async generator of the Server-Sent Events of a game, playing it while subscribed
+
+    Subscribers of a game already streamed share its loop and its tick rate.
+    """
+    state = await sync_to_async(_locked_state)(live)
+    active = state.pop('is_active')
+    yield sse_message('state', state)
+    if not active:
+        yield sse_message('end', {"game_id": live.game_id})
+        return
+
+    subscriber = Subscriber(mode)
+    subscriber.turn_number = state['turn_number']
+
+    broadcaster = _broadcasters.get(live.game_id)
+    if broadcaster is None:
+        broadcaster = TurnBroadcaster(live, tick_rate)
+        _broadcasters[live.game_id] = broadcaster
+        broadcaster.subscribers.add(subscriber)
+        broadcaster.start()
+    else:
+        broadcaster.subscribers.add(subscriber)
+
+    try:
+        while True:
+            # A full queue could not take the end marker, so check the flag too
+            if subscriber.closed and subscriber.queue.empty():
+                message = None
+            else:
+                message = await subscriber.queue.get()
+            if message is None:
+                yield sse_message('end', {"game_id": live.game_id})
+                return
+            yield message
+    finally:
+        broadcaster.subscribers.discard(subscriber)
+
+
+def _locked_state(live):
+    with live.lock:
+        state = live.state().as_dict()
+        state['is_active'] = live.is_active and not live.deleted
+        return state
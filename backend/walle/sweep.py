@@ -0,0 +1,181 @@
+import csv
+import itertools
+import json
+import os
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .assignment import HUNGARIAN
+from .planner import PLANNER
+from .movement import RESERVED
+from .game_logic import game_rng
+from .placement import UNIFORM, place
+from .simulation import DEFAULT_MAX_TURNS, run_to_completion
+
+# Columns of a result row, in output order
+RESULT_FIELDS = [
+    'num_agents', 'num_wastes', 'grid_width', 'grid_height', 'base_position_x', 'base_position_y',
+    'assignment', 'pathing', 'movement', 'placement', 'seed', 'turns', 'completed', 'waste_collected',
+    'seconds',
+]
+
+# Columns of a summary row, one per configuration across all its seeds
+SUMMARY_FIELDS = [
+    'num_agents', 'num_wastes', 'grid_width', 'grid_height', 'base_position_x', 'base_position_y',
+    'assignment', 'pathing', 'movement', 'placement', 'runs', 'completion_rate', 'turns_mean', 'turns_median',
+    'turns_stdev', 'turns_min', 'turns_max',
+]
+
+
+def sweep_configurations(num_agents, num_wastes, base_positions, seeds, assignments=(HUNGARIAN,),
+                         pathings=(PLANNER,), movements=(RESERVED,), grid_sizes=((32, 32),),
+                         placements=(UNIFORM,)):
+    """
+    Build every (num_agents, num_wastes, width, height, base_x, base_y, assignment, pathing,
+    movement, placement, seed) combination of the grid
+    """
+    return [
+        (agents, wastes, width, height, base_x, base_y, assignment, pathing, movement, placement, seed)
+        for agents, wastes, (width, height), (base_x, base_y), assignment, pathing, movement, placement, seed
+        in itertools.product(num_agents, num_wastes, grid_sizes, base_positions, assignments, pathings,
+                             movements, placements, seeds)
+    ]
+
+
+def run_configuration(configuration, max_turns=DEFAULT_MAX_TURNS):
+    """
+    Play one headless game to completion, in a worker process
+    """
+    agents, wastes, width, height, base_x, base_y, assignment, pathing, movement, placement, seed = configuration
+
+    started = time.perf_counter()
+
+    # Same generators as a game started through the API with this seed
+    rng = game_rng(seed, 0)
+    agent_positions, waste_positions = place(agents, wastes, rng, width, height, placement)
+    _, _, _, waste_collected, summary = run_to_completion(
+        [[i, j] for i, j in waste_positions],
+        [[i, j, w] for i, j, w in agent_positions],
+        [base_x, base_y],
+        [],
+        0,
+        wastes,
+        max_turns=max_turns,
+        seed=seed,
+        assignment=assignment,
+        pathing=pathing,
+        movement=movement,
+        width=width,
+        height=height
+    )
+
+    return {
+        'num_agents': agents,
+        'num_wastes': wastes,
+        'grid_width': width,
+        'grid_height': height,
+        'base_position_x': base_x,
+        'base_position_y': base_y,
+        'assignment': assignment,
+        'pathing': pathing,
+        'movement': movement,
+        'placement': placement,
+        'seed': seed,
+        'turns': summary['turns'],
+        'completed': summary['completed'],
+        'waste_collected': waste_collected,
+        'seconds': round(time.perf_counter() - started, 6),
+    }
+
+
+def _run_chunk(configurations, max_turns):
+    return [run_configuration(configuration, max_turns) for configuration in configurations]
+
+
+def run_sweep(configurations, max_turns=DEFAULT_MAX_TURNS, workers=None, chunk_size=None):
+    """
+    Run every configuration across a process pool, yielding results in order as they are ready
+    """
+    workers = workers or os.cpu_count() or 1
+    if chunk_size is None:
+        # A few chunks per worker keeps every core busy without much overhead
+        chunk_size = max(1, len(configurations) // (workers * 4))
+
+    chunks = [configurations[i:i + chunk_size] for i in range(0, len(configurations), chunk_size)]
+    if workers == 1:
+        for chunk in chunks:
+            yield from _run_chunk(chunk, max_turns)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for results in executor.map(_run_chunk, chunks, itertools.repeat(max_turns)):
+            yield from results
+
+
+class ResultWriter:
+    """
+    Write result rows as they come, as CSV or JSON Lines depending on the file extension
+    """
+    def __init__(self, path, fields):
+        self.fields = fields
+        self.file = open(path, 'w', newline='')
+        self.json_lines = path.endswith(('.jsonl', '.ndjson'))
+        if not self.json_lines:
+            self.writer = csv.DictWriter(self.file, fieldnames=fields)
+            self.writer.writeheader()
+
+    def write(self, row):
+        if self.json_lines:
+            self.file.write(json.dumps({field: row[field] for field in self.fields}) + '\n')
+        else:
+            self.writer.writerow(row)
+        # Flush each row so the output can be followed while the sweep runs
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def summarize(results):
+    """
+    Aggregate turns-to-completion statistics per configuration across seeds
+    Incomplete runs count towards the completion rate but not the turn statistics
+    """
+    groups = {}
+    for result in results:
+        key = (result['num_agents'], result['num_wastes'], result['grid_width'], result['grid_height'],
+               result['base_position_x'], result['base_position_y'],
+               result['assignment'], result['pathing'], result['movement'], result['placement'])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for key, runs in groups.items():
+        agents, wastes, width, height, base_x, base_y, assignment, pathing, movement, placement = key
+        turns = [run['turns'] for run in runs if run['completed']]
+        summary.append({
+            'num_agents': agents,
+            'num_wastes': wastes,
+            'grid_width': width,
+            'grid_height': height,
+            'base_position_x': base_x,
+            'base_position_y': base_y,
+            'assignment': assignment,
+            'pathing': pathing,
+            'movement': movement,
+            'placement': placement,
+            'runs': len(runs),
+            'completion_rate': len(turns) / len(runs),
+            'turns_mean': statistics.fmean(turns) if turns else None,
+            'turns_median': statistics.median(turns) if turns else None,
+            'turns_stdev': statistics.stdev(turns) if len(turns) > 1 else None,
+            'turns_min': min(turns, default=None),
+            'turns_max': max(turns, default=None),
+        })
+    return summary
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from walle.batch import next_turn_batch, start_batch
+from walle.game_logic import game_rng, next_turn, rand_list
+
+# Boards where batches and next_turn are compared, over this many games.
+# Sparser boards are left out, the time spent looking for their few wastes
+# varying too much from one game to the other
+COMPARED_DENSITIES = [(20, 100), (50, 100), (100, 100)]
+COMPARED_GAMES = 8
+
+# Largest gap allowed between their mean turns to complete a game
+TURNS_TOLERANCE = 0.1
+
+
+def positions(batch, game):
+    return [tuple(cell) for cell in batch.agents[game][batch.agent_mask[game]].tolist()]
+
+
+def test_mixed_batch_places_every_game():
+    # The agents of one game and the wastes of the other add up to more cells than the board has
+    batch = start_batch([(900, 100, 15, 15), (200, 400, 15, 15)], rng=0)
+    for game, (num_agents, num_wastes) in enumerate([(900, 100), (200, 400)]):
+        assert len(set(positions(batch, game))) == num_agents
+        assert batch.wastes[game].sum() == num_wastes
+
+
+def test_agents_move_in_turn():
+    # A line of carriers heading to the base: an agent follows the one ahead
+    # when that one moved first, and otherwise steps aside, possibly to the
+    # cell the one behind left
+    outcomes = set()
+    for seed in range(30):
+        batch = start_batch([(3, 1, 10, 0)], rng=0)
+        batch.agents[0] = [(0, 0), (1, 0), (2, 0)]
+        batch.carrying[0] = True
+        next_turn_batch(batch, rng=seed)
+        tail, middle, head = positions(batch, 0)
+        assert head == (3, 0)
+        assert middle in [(2, 0), (1, 1), (0, 0)] and tail in [(1, 0), (0, 1)]
+        outcomes.add((tail, middle))
+    assert ((1, 0), (2, 0)) in outcomes and ((0, 1), (1, 1)) in outcomes
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_no_two_agents_share_a_cell(seed):
+    batch = start_batch([(600, 50, 15, 15), (200, 400, 0, 0), (20, 100, 31, 31)], rng=seed)
+    rng = np.random.default_rng(seed)
+    for _ in range(40):
+        before = batch.agents.copy()
+        next_turn_batch(batch, rng=rng)
+        for game in range(batch.num_games):
+            after = positions(batch, game)
+            assert len(set(after)) == len(after)
+        # One step at most
+        steps = np.abs(batch.agents - before).sum(axis=-1)
+        assert steps[batch.agent_mask].max() <= 1
+
+
+def next_turn_turns(num_agents, num_wastes, seed):
+    rng = game_rng(seed, 0)
+    agent_positions = rand_list(num_agents, third_arg=True, rng=rng)
+    waste_positions = rand_list(num_wastes, agent_positions=agent_positions, wastes=True, rng=rng)
+    known_waste_positions = []
+    waste_collected = 0
+    turn_number = 0
+    while waste_collected < num_wastes:
+        turn_number += 1
+        waste_positions, agent_positions, known_waste_positions, waste_collected = next_turn(
+            waste_positions, agent_positions, [15, 15], known_waste_positions, waste_collected,
+            game_rng(seed, turn_number)
+        )
+    return turn_number
+
+
+@pytest.mark.parametrize('num_agents, num_wastes', COMPARED_DENSITIES)
+def test_batch_plays_as_next_turn(num_agents, num_wastes):
+    expected = np.mean([next_turn_turns(num_agents, num_wastes, seed) for seed in range(COMPARED_GAMES)])
+    batch = start_batch([(num_agents, num_wastes, 15, 15)] * COMPARED_GAMES, rng=0)
+    rng = np.random.default_rng(0)
+    while not batch.done.all():
+        next_turn_batch(batch, rng=rng)
+    assert abs(batch.turn_number.mean() - expected) <= TURNS_TOLERANCE * expected
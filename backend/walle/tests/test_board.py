@@ -0,0 +1,105 @@
+import random
+
+from walle import board as board_module
+from walle.assignment import AUCTION, PER_TURN
+from walle.board import VISION_RADIUS, Board, WasteIndex
+from walle.encoding import decode_plan
+from walle.game_logic import closest_waste, game_rng, play_turn
+from walle.movement import RESERVED, SEQUENTIAL
+from walle.placement import place
+from walle.planner import GREEDY, PLANNER
+
+
+def in_sight(x, y, width, height):
+    """
+    Every cell of the square an agent standing on a cell sees
+    """
+    return {
+        (i, j)
+        for i in range(max(0, x - VISION_RADIUS), min(width, x + VISION_RADIUS + 1))
+        for j in range(max(0, y - VISION_RADIUS), min(height, y + VISION_RADIUS + 1))
+    }
+
+
+def test_reveal_finds_the_wastes_of_a_full_rescan():
+    width, height = 40, 30
+    rng = random.Random(4)
+    agents, wastes = place(12, 300, rng, width, height)
+    board = Board(wastes, agents, [], width, height)
+
+    seen = set()
+    for _ in range(200):
+        board.reveal()
+        for x, y, _ in board.agents:
+            seen |= in_sight(x, y, width, height)
+        assert set(board.known_wastes) == seen & set(board.wastes)
+        assert board.unseen_count == (width * height - len(seen) if board.hidden_count else 0)
+
+        # Mostly one-cell steps, some agents staying or jumping
+        for index, (x, y, _) in enumerate(board.agents):
+            draw = rng.random()
+            if draw < 0.15:
+                continue
+            if draw < 0.25:
+                board.move(index, rng.randrange(width), rng.randrange(height))
+                continue
+            dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+            if 0 <= x + dx < width and 0 <= y + dy < height:
+                board.move(index, x + dx, y + dy)
+
+
+def test_waste_index_answers_as_a_scan():
+    rng = random.Random(5)
+    for width, height, count in ((32, 32, 200), (50, 20, 15), (2000, 1500, 40)):
+        wastes = {}
+        index = WasteIndex(width, height)
+        for _ in range(400):
+            # Wastes come and go, the scan keeping them in insertion order
+            if len(wastes) < count or rng.random() < 0.5:
+                pos = (rng.randrange(width), rng.randrange(height))
+                if pos not in wastes:
+                    wastes[pos] = None
+                    index.add(pos)
+            else:
+                pos = rng.choice(list(wastes))
+                del wastes[pos]
+                index.remove(pos)
+
+            known = list(wastes)
+            assigned = dict(enumerate(rng.sample(known, min(len(known), rng.choice([0, 1, 5, len(known)])))))
+            index.clear_assignments()
+            for waste in assigned.values():
+                index.assign(waste)
+            for _ in range(5):
+                pos = (rng.randrange(width), rng.randrange(height))
+                expected = closest_waste(known, pos, 0, 4, assigned)
+                assert closest_waste(known, pos, 0, 4, assigned, waste_index=index) == expected
+
+
+def test_sparse_board_plays_as_a_dense_one(monkeypatch):
+    width, height = 48, 40
+    agents, wastes = place(15, 80, game_rng(6, 0), width, height)
+    for options in (
+        {'assignment': PER_TURN, 'pathing': GREEDY, 'movement': SEQUENTIAL},
+        {'assignment': AUCTION, 'pathing': PLANNER, 'movement': RESERVED},
+    ):
+        boards = [Board(wastes, agents, [], width, height, **options)]
+        # Any board above the limit keeps its layers in dicts
+        monkeypatch.setattr(board_module, 'DENSE_CELL_LIMIT', width * height - 1)
+        boards.append(Board(wastes, agents, [], width, height, **options))
+        monkeypatch.undo()
+        assert [board.sparse for board in boards] == [False, True]
+
+        collected = [0, 0]
+        for turn in range(1, 301):
+            collected = [play_turn(board, (20, 20), count, game_rng(6, turn))
+                         for board, count in zip(boards, collected)]
+            assert collected[0] == collected[1]
+            assert boards[0].to_lists() == boards[1].to_lists()
+            assert boards[0].unseen_count == boards[1].unseen_count
+            # Sparse boards keep one bit per seen cell instead of one byte
+            plans = [board.plan_data() for board in boards]
+            assert bool(plans[0]) == bool(plans[1])
+            assert not plans[0] or decode_plan(plans[0])[:4] == decode_plan(plans[1])[:4]
+        assert collected[0] > 0
+        assert all(boards[0].is_seen(x, y) == boards[1].is_seen(x, y) for x in range(width) for y in range(height))
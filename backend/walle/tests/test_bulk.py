@@ -0,0 +1,73 @@
+from django.db import transaction
+
+from walle.models import Configuration, Game
+
+from .utils import start_game
+
+CONFIGURATION = {'num_agents': 10, 'num_wastes': 30, 'base_position_x': 15, 'base_position_y': 15}
+
+
+def bulk_start(client, body):
+    return client.post('/api/games/bulk/', body, content_type='application/json')
+
+
+def layout(client, game_id):
+    data = client.get(f"/api/games/{game_id}/stats/").json()
+    return data['agent_positions'], data['waste_positions'], data['turn_number']
+
+
+def test_seeded_bulk_game_starts_as_a_started_game(client):
+    configurations = [dict(CONFIGURATION, seed=seed, placement=placement)
+                      for seed in (0, 7) for placement in ('uniform', 'clustered')]
+    response = bulk_start(client, {'games': configurations})
+    assert response.status_code == 201, response.content
+    for game_id, configuration in zip(response.json()['game_ids'], configurations):
+        started = start_game(client, **dict(configuration, seed=configuration['seed']))
+        assert layout(client, game_id) == layout(client, started)
+
+
+def test_product_and_repeat_expand_to_every_combination(client):
+    response = bulk_start(client, {
+        'product': dict(CONFIGURATION, num_agents=[5, 10, 15], num_wastes=[20, 40], seed=3),
+        'repeat': 2,
+    })
+    assert response.status_code == 201, response.content
+    game_ids = response.json()['game_ids']
+    games = Game.objects.in_bulk(game_ids)
+    configurations = [
+        (games[game_id].configuration.num_agents, games[game_id].configuration.num_wastes)
+        for game_id in game_ids
+    ]
+    # The last parameter varies fastest, each combination being repeated in place
+    assert configurations == [
+        (num_agents, num_wastes)
+        for num_agents in (5, 10, 15) for num_wastes in (20, 40) for _ in range(2)
+    ]
+    assert all(games[game_id].configuration.seed == 3 for game_id in game_ids)
+    assert all(games[game_id].turn_number == 0 and games[game_id].is_active for game_id in game_ids)
+
+
+def test_unseeded_repeats_get_their_own_seeds(client):
+    response = bulk_start(client, {'games': [CONFIGURATION], 'repeat': 20})
+    game_ids = response.json()['game_ids']
+    seeds = set(Configuration.objects.filter(game__id__in=game_ids).values_list('seed', flat=True))
+    assert len(seeds) == 20 and None not in seeds
+
+
+def test_invalid_configuration_creates_no_game(client, monkeypatch):
+    games, configurations = Game.objects.count(), Configuration.objects.count()
+    for invalid in ({'num_agents': -1}, {'num_agents': 'many'}, {'pathing': 'teleport'}):
+        response = bulk_start(client, {'games': [CONFIGURATION, dict(CONFIGURATION, **invalid)]})
+        assert response.status_code == 400
+        assert response.json()['error'].startswith("Configuration 1")
+    response = bulk_start(client, {'product': dict(CONFIGURATION, num_wastes=[5, 2000])})
+    assert response.status_code == 400
+    assert response.json()['error'].startswith("Configuration 1")
+
+    # A failure while saving rolls back the configurations saved before it
+    def fail(*args, **kwargs):
+        raise transaction.TransactionManagementError("Insert failed.")
+    monkeypatch.setattr(Game.objects, 'bulk_create', fail)
+    response = bulk_start(client, {'games': [CONFIGURATION], 'repeat': 5})
+    assert response.status_code == 500
+    assert (Game.objects.count(), Configuration.objects.count()) == (games, configurations)
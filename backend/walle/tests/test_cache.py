@@ -0,0 +1,86 @@
+import pytest
+
+from walle.cache import WRITE_THROUGH, GameStateCache, StaleGame, game_cache
+from walle.models import Game
+
+from .utils import start_game
+
+
+def play(cache, live, turns=1):
+    with live.lock:
+        live.play_turns(turns)
+        cache.played(live, turns)
+
+
+def test_stale_process_does_not_overwrite(client):
+    # Two processes serving the same game, each with its own cache
+    game_id = start_game(client, 50, 100)
+    first = GameStateCache(durability=WRITE_THROUGH)
+    second = GameStateCache(durability=WRITE_THROUGH)
+    old = first.get(game_id)
+    second_live = second.get(game_id)
+
+    play(second, second_live, 5)
+    with pytest.raises(StaleGame):
+        play(first, old, 1)
+    assert Game.objects.get(pk=game_id).turn_number == 5
+
+    # The next access reloads the row and plays on from it
+    live = first.get(game_id)
+    assert live is not old and live.turn_number == 5
+    play(first, live, 1)
+    assert Game.objects.get(pk=game_id).turn_number == 6
+
+    # The other process sees the new turn on its next access too
+    assert second.get(game_id).turn_number == 6
+
+
+def test_evicted_game_is_not_played(client):
+    cache = GameStateCache(max_games=1)
+    game_id = start_game(client, 50, 100)
+    evicted = cache.get(game_id)
+    play(cache, evicted, 3)
+
+    # Loading another game evicts the first one, which is saved as it leaves
+    cache.get(start_game(client, 50, 100))
+    assert evicted.stale
+    assert Game.objects.get(pk=game_id).turn_number == 3
+
+    live = cache.get(game_id)
+    play(cache, live, 2)
+    with pytest.raises(StaleGame):
+        play(cache, evicted, 1)
+    cache.flush_game(game_id)
+    assert Game.objects.get(pk=game_id).turn_number == 5
+
+
+def test_next_round_reloads_newer_row(client):
+    game_id = start_game(client, 50, 100)
+    response = client.post(f"/api/games/{game_id}/next-round/?turns=4")
+    assert response.json()['turn_number'] == 4
+
+    # Played further by another process, the unsaved turns of the cached copy are dropped
+    Game.objects.filter(pk=game_id).update(turn_number=10)
+    game_cache.discard(game_id)
+    response = client.post(f"/api/games/{game_id}/next-round/")
+    assert response.status_code == 200, response.content
+    assert response.json()['turn_number'] == 11
+
+
+
+@pytest.mark.parametrize('assignment', ['greedy', 'hungarian'])
+def test_reloaded_game_plays_same_turns(client, assignment):
+    # Targets and planned paths are saved with the game, so a seed replays it whatever the cache did
+    def play(reload_at=None):
+        response = client.post('/api/games/', {
+            'num_agents': 200, 'num_wastes': 400, 'base_position_x': 15, 'base_position_y': 15,
+            'seed': 5, 'assignment': assignment,
+        }, content_type='application/json')
+        game_id = response.json()['game_id']
+        for turn in range(1, 41):
+            state = client.post(f"/api/games/{game_id}/next-round/").json()
+            if turn == reload_at:
+                game_cache.clear()
+        return state['agent_positions'], state['waste_positions']
+
+    assert play() == play(reload_at=20)
@@ -0,0 +1,45 @@
+from walle.cache import DELTA_HISTORY, game_cache
+
+from .utils import apply_delta, game_state, start_game
+
+
+def stats(client, game_id, since=None):
+    query = '' if since is None else f"?since={since}"
+    return client.get(f"/api/games/{game_id}/stats/{query}").json()
+
+
+def test_delta_applied_to_an_old_state_gives_the_current_one(client):
+    game_id = start_game(client, 30, 120, seed=6)
+    states = {0: game_state(stats(client, game_id))}
+    for turn_number in range(1, DELTA_HISTORY + 11):
+        data = client.post(f"/api/games/{game_id}/next-round/?since={turn_number - 1}").json()
+        assert data['since'] == turn_number - 1
+        states[turn_number] = apply_delta(states[turn_number - 1], data)
+        assert states[turn_number] == game_state(stats(client, game_id))
+
+        # Any turn still in the history
+        for since in {0, turn_number // 2, turn_number - 3, turn_number - DELTA_HISTORY}:
+            if since < 0 or turn_number - since > DELTA_HISTORY:
+                continue
+            delta = stats(client, game_id, since)
+            assert delta['since'] == since
+            assert apply_delta(states[since], delta) == states[turn_number]
+
+
+def test_delta_falls_back_to_the_full_state(client):
+    game_id = start_game(client, 10, 40, seed=7)
+    client.post(f"/api/games/{game_id}/next-round/?turns={DELTA_HISTORY}")
+    client.post(f"/api/games/{game_id}/next-round/?turns=2")
+    full = stats(client, game_id)
+    turn_number = full['turn_number']
+
+    # Nothing changed since the current turn
+    delta = stats(client, game_id, turn_number)
+    assert (delta['changed_agents'], delta['removed_wastes']) == ([], [])
+
+    # Turns older than the history, turns to come, and games loaded again
+    # from the database without any history
+    for since in (0, turn_number - DELTA_HISTORY - 1, turn_number + 1):
+        assert stats(client, game_id, since) == full
+    game_cache.clear()
+    assert stats(client, game_id, turn_number - 1) == full
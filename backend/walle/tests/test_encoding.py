@@ -0,0 +1,108 @@
+import json
+import random
+
+import pytest
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from walle.encoding import (
+    HEADER, decode_agents, decode_plan, decode_positions, encode_agents, encode_plan, encode_positions
+)
+
+# Largest coordinate of each width, and the first one needing the next width
+COORDINATE_WIDTHS = [(255, 1), (256, 2), (65535, 2), (65536, 4), ((1 << 32) - 1, 4)]
+
+
+@pytest.mark.parametrize('largest, width', COORDINATE_WIDTHS)
+def test_positions_round_trip(largest, width):
+    positions = [[0, 0], [largest, 3], [7, largest], [1, 2]]
+    data = encode_positions(positions)
+    assert HEADER.unpack_from(data) == (width, len(positions))
+    assert decode_positions(data) == positions
+
+
+@pytest.mark.parametrize('largest, width', COORDINATE_WIDTHS)
+def test_agents_round_trip(largest, width):
+    agents = [[largest, 0, True], [0, largest, False], [5, 6, True]]
+    data = encode_agents(agents)
+    assert HEADER.unpack_from(data)[0] == width
+    assert decode_agents(data) == agents
+
+
+@pytest.mark.parametrize('count', [1, 7, 8, 9, 16, 17, 100])
+def test_carry_bits_round_trip(count):
+    # Counts around the bytes of the carry bit array, carrying every agent,
+    # none of them or some of them
+    rng = random.Random(count)
+    for carrying in (lambda i: True, lambda i: False, lambda i: rng.random() < 0.5):
+        agents = [[i % 32, i // 32, carrying(i)] for i in range(count)]
+        data = encode_agents(agents)
+        assert len(data) == HEADER.size + 2 * count + (count + 7) // 8
+        assert decode_agents(data) == agents
+
+
+def test_empty_round_trip():
+    assert decode_positions(encode_positions([])) == []
+    assert decode_agents(encode_agents([])) == []
+    # Rows saved before a game had positions
+    assert decode_positions(b'') == [] and decode_agents(b'') == []
+
+
+def test_board_tuples_encode_as_lists():
+    assert encode_positions([(1, 2), (3, 4)]) == encode_positions([[1, 2], [3, 4]])
+    assert encode_agents([(1, 2, True)]) == encode_agents([[1, 2, True]])
+
+
+@pytest.mark.parametrize('length', range(10))
+def test_plan_round_trip(length):
+    rng = random.Random(length)
+    cells = [(300, 5)]
+    for _ in range(length):
+        dx, dy = rng.choice([(1, 0), (-1, 0), (0, 1), (0, -1)])
+        cells.append((cells[-1][0] + dx, cells[-1][1] + dy))
+    plan = (
+        {0: (3, 4), 200: (4095, 4095)},
+        {1: (70000, 2)},
+        {0: 2, 5: 1},
+        {0: ((3, 4), cells[:length]), 7: ((0, 0), [])},
+        bytearray(b'\x01\x00' * 100),
+    )
+    assert decode_plan(encode_plan(*plan)) == plan
+
+
+def test_binary_positions_migration(django_db):
+    # Back to the JSON text fields, then forwards and backwards over the packing migration
+    before, after = ('walle', '0001_initial'), ('walle', '0002_binary_positions')
+    latest = MigrationExecutor(connection).loader.graph.leaf_nodes('walle')
+    waste_positions = [[1, 2], [300, 4]]
+    agent_positions = [[0, 0, True], [5, 70000, False], [9, 9, True]]
+
+    def migrate(target):
+        executor = MigrationExecutor(connection)
+        executor.migrate([target])
+        return executor.loader.project_state([target]).apps.get_model('walle', 'Game')
+
+    try:
+        Game = migrate(before)
+        Configuration = Game._meta.get_field('configuration').related_model
+        configuration = Configuration.objects.create(num_agents=3, num_wastes=2, base_position_x=0, base_position_y=0)
+        game_id = Game.objects.create(
+            configuration=configuration,
+            _waste_positions=json.dumps(waste_positions),
+            _agent_positions=json.dumps(agent_positions),
+            _known_waste_positions='[]',
+        ).id
+
+        game = migrate(after).objects.get(pk=game_id)
+        assert decode_positions(game._waste_positions) == waste_positions
+        assert decode_agents(game._agent_positions) == agent_positions
+        assert decode_positions(game._known_waste_positions) == []
+
+        game = migrate(before).objects.get(pk=game_id)
+        assert json.loads(game._waste_positions) == waste_positions
+        assert json.loads(game._agent_positions) == agent_positions
+        assert json.loads(game._known_waste_positions) == []
+        configuration.delete()
+    finally:
+        executor = MigrationExecutor(connection)
+        executor.migrate(latest)
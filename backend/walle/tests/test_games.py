@@ -0,0 +1,127 @@
+from walle.models import Configuration, Game, SimulationJob
+from walle.simulation import MAX_TURNS_LIMIT
+
+from .utils import start_game
+
+
+def play(client, game_id, rounds):
+    for _ in range(rounds):
+        response = client.post(f"/api/games/{game_id}/next-round/")
+        assert response.status_code == 200, response.content
+    return client.get(f"/api/games/{game_id}/stats/").json()
+
+
+def board(state):
+    return {key: value for key, value in state.items() if key != 'game_id'}
+
+
+def test_games_are_addressed_by_id(client):
+    first = start_game(client, 10, 20, seed=1)
+    second = start_game(client, 10, 20, seed=2)
+    second_start = client.get(f"/api/games/{second}/stats/").json()
+
+    # Playing one game leaves the other one as it was
+    first_state = play(client, first, 5)
+    assert first_state['turn_number'] == 5
+    assert client.get(f"/api/games/{second}/stats/").json() == second_start
+
+    # Interleaved rounds play the same game as rounds played alone
+    play(client, second, 3)
+    alone = start_game(client, 10, 20, seed=1)
+    assert board(play(client, first, 4)) == board(play(client, alone, 9))
+
+    # The routes without an id act on the game started last
+    assert client.get('/api/stats/').json()['turn_number'] == 9
+    response = client.post('/api/stop/')
+    assert response.status_code == 200, response.content
+    assert client.get(f"/api/games/{alone}/stats/").status_code == 404
+    assert client.get('/api/stats/').json() == client.get(f"/api/games/{second}/stats/").json()
+
+    assert client.get('/api/games/999999/stats/').status_code == 404
+
+
+def test_stop_deletes_finished_game(client):
+    game_id = start_game(client, 10, 5, seed=3)
+    configuration_id = Game.objects.get(pk=game_id).configuration_id
+    response = client.post(f"/api/games/{game_id}/run/", {'max_turns': 5000}, content_type='application/json')
+    assert response.json()['completed']
+
+    response = client.post(f"/api/games/{game_id}/stop/")
+    assert response.status_code == 200, response.content
+    assert response.json()['waste_collected'] == 5
+    assert response.json()['waste_positions'] == []
+    assert not Game.objects.filter(pk=game_id).exists()
+    assert not Configuration.objects.filter(pk=configuration_id).exists()
+
+    assert client.get(f"/api/games/{game_id}/stats/").status_code == 404
+    assert client.post(f"/api/games/{game_id}/stop/").status_code == 404
+
+
+def test_same_seed_plays_the_same_game(client):
+    # An unseeded game draws a seed, which replays it
+    response = client.post('/api/games/', {
+        'num_agents': 20, 'num_wastes': 60, 'base_position_x': 15, 'base_position_y': 15,
+    }, content_type='application/json')
+    first = response.json()['game_id']
+    seed = Game.objects.get(pk=first).configuration.seed
+    second = start_game(client, 20, 60, seed=seed)
+    other = start_game(client, 20, 60, seed=seed + 1)
+
+    assert board(play(client, first, 0)) == board(play(client, second, 0))
+    assert board(play(client, first, 0)) != board(play(client, other, 0))
+    for _ in range(10):
+        assert board(play(client, first, 3)) == board(play(client, second, 3))
+
+
+def run(client, game_id, max_turns):
+    return client.post(f"/api/games/{game_id}/run/", {'max_turns': max_turns}, content_type='application/json')
+
+
+def test_run_summary_counts_the_turns_played(client):
+    game_id = start_game(client, 8, 12, seed=4)
+    stepped = start_game(client, 8, 12, seed=4)
+
+    # The same game played one turn at a time, counting each agent's steps and drops
+    state = play(client, stepped, 0)
+    distances, delivered = [0] * 8, [0] * 8
+    while state['waste_collected'] < 12:
+        previous = state['agent_positions']
+        state = play(client, stepped, 1)
+        for index, ((x0, y0, w0), (x1, y1, w1)) in enumerate(zip(previous, state['agent_positions'])):
+            distances[index] += (x0, y0) != (x1, y1)
+            delivered[index] += w0 and not w1
+
+    assert sum(delivered) == 12
+
+    data = run(client, game_id, 5000).json()
+    assert data == {
+        'game_id': game_id,
+        'turns': state['turn_number'],
+        'completed': True,
+        'waste_collected': 12,
+        'total_wastes': 12,
+        'turn_number': state['turn_number'],
+        'agent_distances': distances,
+        'wastes_delivered': delivered,
+    }
+    assert board(play(client, game_id, 0)) == board(state)
+    assert run(client, game_id, 10).status_code == 400
+
+
+def test_run_stops_at_the_turn_cap(client):
+    game_id = start_game(client, 5, 200, seed=5)
+    data = run(client, game_id, 7).json()
+    assert (data['turns'], data['turn_number'], data['completed']) == (7, 7, False)
+    data = run(client, game_id, 3).json()
+    assert (data['turns'], data['turn_number']) == (3, 10)
+
+    # Runs too long for a request go to the jobs
+    response = run(client, game_id, MAX_TURNS_LIMIT + 1)
+    assert response.status_code == 400
+    assert '/jobs/' in response.json()['max_turns'][0]
+    response = client.post('/api/jobs/', {
+        'num_agents': 5, 'num_wastes': 200, 'base_position_x': 15, 'base_position_y': 15,
+        'max_turns': MAX_TURNS_LIMIT + 1,
+    }, content_type='application/json')
+    assert response.status_code == 202, response.content
+    SimulationJob.objects.filter(id=response.json()['job_id']).delete()
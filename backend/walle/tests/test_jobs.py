@@ -0,0 +1,56 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from walle.jobs import STALE_AFTER, claim_job, run_job, work
+from walle.models import DONE, QUEUED, RUNNING, SimulationJob
+
+from .utils import start_game
+
+CONFIGURATION = {'num_agents': 10, 'num_wastes': 30, 'base_position_x': 15, 'base_position_y': 15}
+
+
+def submit(client, **options):
+    response = client.post('/api/jobs/', {**CONFIGURATION, **options}, content_type='application/json')
+    assert response.status_code == 202, response.content
+    return response.json()['job_id']
+
+
+def job_status(client, job_id):
+    return client.get(f"/api/jobs/{job_id}/").json()
+
+
+def test_job_plays_as_a_run_game(client):
+    for seed, placement in ((0, 'uniform'), (5, 'clustered')):
+        job_id = submit(client, seed=seed, placement=placement, max_turns=3000)
+        assert job_status(client, job_id)['status'] == QUEUED
+        work(worker='test', burst=True)
+        job = job_status(client, job_id)
+
+        game_id = start_game(client, 10, 30, seed=seed, placement=placement)
+        run = client.post(f"/api/games/{game_id}/run/", {'max_turns': 3000}, content_type='application/json').json()
+        assert job['status'] == DONE and job['worker'] == 'test'
+        assert (job['turns_played'], job['waste_collected'], job['completed']) == \
+            (run['turns'], run['waste_collected'], run['completed'])
+
+
+def test_stale_job_is_queued_again(client):
+    job_id = submit(client, seed=1)
+    job = claim_job('dead')
+    assert job.id == job_id
+
+    # A worker still reporting keeps its job
+    assert claim_job('alive') is None
+    assert SimulationJob.objects.get(id=job_id).worker == 'dead'
+
+    stale = timezone.now() - timedelta(seconds=STALE_AFTER + 1)
+    SimulationJob.objects.filter(id=job_id).update(turns_played=100, heartbeat_at=stale)
+    job = claim_job('alive')
+    assert job.id == job_id
+    assert (job.status, job.worker, job.turns_played) == (RUNNING, 'alive', 0)
+
+    # The dead worker's result no longer reaches the job, the new one's does
+    run_job(job, 'dead')
+    assert SimulationJob.objects.get(id=job_id).status == RUNNING
+    run_job(job, 'alive')
+    assert job_status(client, job_id)['status'] == DONE
@@ -0,0 +1,61 @@
+from .utils import start_game
+
+# Phases of a turn, the last three only timed for requests asking for their timings
+TURN_PHASES = ['vision', 'agents']
+DETAILED_PHASES = ['targets', 'steps', 'moves']
+
+
+def scrape(client):
+    response = client.get('/api/metrics/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/plain; version=0.0.4; charset=utf-8'
+    samples = {}
+    for line in response.content.decode().splitlines():
+        if line and not line.startswith('#'):
+            name, value = line.rsplit(' ', 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_turns_and_requests(client):
+    game_id = start_game(client, 20, 40)
+    before = scrape(client)
+    for _ in range(3):
+        client.post(f"/api/games/{game_id}/next-round/")
+    client.post(f"/api/games/{game_id}/next-round/?turns=4")
+    after = scrape(client)
+
+    def added(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert added('walle_turn_seconds_count') == 7
+    assert added('walle_requests_total{view="game-next-round-by-id",status="200"}') == 4
+    assert added('walle_request_seconds_count{view="game-next-round-by-id"}') == 4
+    for phase in TURN_PHASES:
+        assert added(f'walle_phase_seconds_count{{phase="{phase}"}}') == 7
+    for phase in DETAILED_PHASES:
+        assert added(f'walle_phase_seconds_count{{phase="{phase}"}}') == 0
+
+    # Buckets are cumulative, the last one holding every observation
+    buckets = [value for name, value in after.items() if name.startswith('walle_turn_seconds_bucket')]
+    assert buckets == sorted(buckets)
+    assert after['walle_turn_seconds_bucket{le="+Inf"}'] == after['walle_turn_seconds_count']
+
+
+def test_server_timing_header(client):
+    game_id = start_game(client, 20, 40)
+    assert 'Server-Timing' not in client.post(f"/api/games/{game_id}/next-round/")
+
+    before = scrape(client)
+    response = client.post(f"/api/games/{game_id}/next-round/?turns=2&timing=1")
+    assert response.status_code == 200
+    timings = dict(entry.split(';dur=') for entry in response['Server-Timing'].split(', '))
+    assert set(TURN_PHASES + DETAILED_PHASES + ['render', 'total']) <= set(timings)
+    assert all(float(duration) >= 0 for duration in timings.values())
+    assert float(timings['total']) >= float(timings['vision']) + float(timings['agents'])
+
+    # The detailed phases of the request go to the metrics too
+    after = scrape(client)
+    for phase in DETAILED_PHASES:
+        name = f'walle_phase_seconds_count{{phase="{phase}"}}'
+        assert after[name] - before.get(name, 0) == 2
@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from walle.board import Board
+from walle.movement import RESERVED, priority_order, resolve_moves
+
+
+def board_of(*agents, width=8, height=8):
+    return Board([], [list(agent) for agent in agents], [], width, height, movement=RESERVED)
+
+
+def positions(board):
+    return [(x, y) for x, y, _ in board.agents]
+
+
+def test_claims_go_to_the_first_agent():
+    board = board_of((0, 0, False), (2, 0, False))
+    stalled = resolve_moves(board, {0: (1, 0), 1: (1, 0)}, [1, 0])
+    assert positions(board) == [(0, 0), (1, 0)]
+    assert stalled == [0]
+
+
+def test_carriers_claim_first():
+    board = board_of((0, 0, False), (2, 0, True))
+    stalled = resolve_moves(board, {0: (1, 0), 1: (1, 0)}, priority_order(board, [0, 1]))
+    assert positions(board) == [(0, 0), (1, 0)]
+    assert stalled == [0]
+
+
+def test_agents_follow_into_vacated_cells():
+    # Each agent steps into the cell the next one leaves, the head into a free cell
+    board = board_of((0, 0, False), (1, 0, False), (2, 0, False), (3, 0, False))
+    intents = {0: (1, 0), 1: (2, 0), 2: (3, 0), 3: (4, 0)}
+    stalled = resolve_moves(board, intents, [0, 1, 2, 3])
+    assert positions(board) == [(1, 0), (2, 0), (3, 0), (4, 0)]
+    assert stalled == []
+
+
+def test_blocked_chain_stays():
+    # The head waits on an agent that does not move, so nobody behind it can
+    board = board_of((0, 0, False), (1, 0, False), (2, 0, True))
+    stalled = resolve_moves(board, {0: (1, 0), 1: (2, 0)}, [0, 1, 2])
+    assert positions(board) == [(0, 0), (1, 0), (2, 0)]
+    assert sorted(stalled) == [0, 1]
+
+
+def test_agents_swap():
+    board = board_of((0, 0, False), (1, 0, True))
+    stalled = resolve_moves(board, {0: (1, 0), 1: (0, 0)}, [0, 1])
+    assert positions(board) == [(1, 0), (0, 0)]
+    assert stalled == []
+
+
+def test_cycle_moves_together():
+    # Four agents turning around a square, each one on the cell the next one leaves
+    board = board_of((0, 0, False), (1, 0, False), (1, 1, False), (0, 1, False))
+    intents = {0: (1, 0), 1: (1, 1), 2: (0, 1), 3: (0, 0)}
+    stalled = resolve_moves(board, intents, [2, 0, 3, 1])
+    assert positions(board) == [(1, 0), (1, 1), (0, 1), (0, 0)]
+    assert stalled == []
+
+
+def test_carrier_pushes_idle_agent():
+    board = board_of((0, 0, True), (1, 0, False))
+    stalled = resolve_moves(board, {0: (1, 0)}, [0, 1])
+    assert positions(board) == [(1, 0), (0, 0)]
+    assert stalled == []
+
+
+def test_carrier_pushes_stalled_agent():
+    # The agent in the way could not take its own step, it goes back instead
+    board = board_of((0, 0, True), (1, 0, False), (2, 0, True))
+    stalled = resolve_moves(board, {0: (1, 0), 1: (2, 0)}, [0, 1, 2])
+    assert positions(board) == [(1, 0), (0, 0), (2, 0)]
+    assert stalled == []
+
+
+def test_carrier_does_not_push_carrier():
+    board = board_of((0, 0, True), (1, 0, True))
+    stalled = resolve_moves(board, {0: (1, 0)}, [0, 1])
+    assert positions(board) == [(0, 0), (1, 0)]
+    assert stalled == [0]
+
+
+def test_idle_agent_does_not_push():
+    board = board_of((0, 0, False), (1, 0, False))
+    stalled = resolve_moves(board, {0: (1, 0)}, [0, 1])
+    assert positions(board) == [(0, 0), (1, 0)]
+    assert stalled == [0]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_no_two_agents_share_a_cell(seed):
+    rng = random.Random(seed)
+    width = height = 8
+    cells = [(x, y) for x in range(width) for y in range(height)]
+    agents = [(x, y, rng.random() < 0.3) for x, y in rng.sample(cells, 40)]
+    board = board_of(*agents, width=width, height=height)
+
+    # Most agents want a random neighbouring cell, free or not
+    intents = {}
+    for index, (x, y, _) in enumerate(agents):
+        nx, ny = rng.choice([(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)])
+        if rng.random() < 0.8 and 0 <= nx < width and 0 <= ny < height:
+            intents[index] = (nx, ny)
+    order = list(range(len(agents)))
+    rng.shuffle(order)
+    stalled = set(resolve_moves(board, intents, priority_order(board, order)))
+
+    after = positions(board)
+    assert len(set(after)) == len(after)
+    assert sum(board.agent_grid) == len(agents) and max(board.agent_grid) == 1
+    assert all(board.agent_at(*cell) == index for index, cell in enumerate(after))
+    for index, ((x, y, w), cell) in enumerate(zip(agents, after)):
+        # One step at most: to the cell claimed, or back to a pusher's cell
+        assert abs(cell[0] - x) + abs(cell[1] - y) <= 1
+        if index in stalled:
+            assert cell == (x, y)
+        elif index in intents and cell != (x, y):
+            assert cell == intents[index] or not w
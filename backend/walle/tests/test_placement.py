@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from walle.placement import DISTRIBUTIONS, place
+
+# Boards and numbers of agents and wastes, up to a board left with no free cell
+LAYOUTS = [
+    (32, 32, 10, 100),
+    (32, 32, 1, 1),
+    (8, 6, 20, 28),
+    (5, 40, 3, 150),
+    (1000, 700, 500, 5000),
+]
+
+
+@pytest.mark.parametrize('distribution', DISTRIBUTIONS)
+@pytest.mark.parametrize('width, height, num_agents, num_wastes', LAYOUTS)
+def test_placement_draws_distinct_free_cells(distribution, width, height, num_agents, num_wastes):
+    for seed in range(5):
+        agents, wastes = place(num_agents, num_wastes, random.Random(seed), width, height, distribution)
+        assert len(agents) == num_agents and len(wastes) == num_wastes
+        assert all(carrying is False for _, _, carrying in agents)
+
+        agent_cells = {(x, y) for x, y, _ in agents}
+        assert len(agent_cells) == num_agents
+        assert len(set(wastes)) == num_wastes
+        assert not agent_cells & set(wastes)
+        assert all(0 <= x < width and 0 <= y < height for x, y in agent_cells | set(wastes))
@@ -0,0 +1,58 @@
+import datetime
+
+import pytest
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from walle.renderers import GameJSONRenderer
+
+from .utils import start_game
+
+# Strings the json module escapes or keeps as they are
+TEXTS = ["déjà vu", "ascii", "line\u2028separator", "paragraph\u2029separator", "☃ 🚀", "quote \" and \\ and \n\t"]
+
+
+def assert_same_bytes(data):
+    expected = JSONRenderer().render(data)
+    assert GameJSONRenderer().render(data) == expected
+    return expected
+
+
+def test_game_responses_render_as_json(client):
+    game_id = start_game(client, 20, 40, seed=4)
+    url = f"/api/games/{game_id}"
+    responses = [
+        client.post('/api/games/', {'num_agents': 3, 'num_wastes': 5, 'base_position_x': 1, 'base_position_y': 1},
+                    content_type='application/json'),
+        client.get(f"{url}/stats/"),
+        client.post(f"{url}/next-round/"),
+        client.post(f"{url}/next-round/?since=0"),
+        client.post(f"{url}/next-round/?turns=5&frames=true"),
+        client.post(f"{url}/next-round/?turns=5&frames=true&since=3"),
+        client.get(f"{url}/stats/?since=6"),
+        client.post(f"{url}/run/", {'max_turns': 30}, content_type='application/json'),
+        client.post(f"{url}/stop/"),
+        # Errors, a validation error holding ErrorDetail strings
+        client.get(f"{url}/stats/"),
+        client.post('/api/games/999999/next-round/?turns=0'),
+        client.post('/api/games/', {'num_agents': 'many'}, content_type='application/json'),
+    ]
+    for response in responses:
+        assert assert_same_bytes(response.data) == response.content
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_strings_render_as_json(text):
+    assert_same_bytes({"error": text, text: [text, 1, None, True]})
+
+
+@pytest.mark.parametrize('data', [
+    # Values orjson does not encode the json way, left to JSONRenderer
+    {"at": datetime.datetime(2026, 10, 18, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)},
+    {"at": datetime.datetime(2026, 10, 18, 12, 30), "day": datetime.date(2026, 10, 18)},
+    {"counts": {1: 2, 3: 4}},
+    {"big": [1 << 64, -(1 << 70)]},
+    {"lazy": gettext_lazy("Not found.")},
+], ids=['aware-datetime', 'naive-datetime', 'int-keys', 'big-ints', 'lazy-string'])
+def test_other_values_render_as_json(data):
+    assert_same_bytes(data)
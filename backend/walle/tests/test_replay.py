@@ -0,0 +1,54 @@
+from walle.cache import game_cache
+
+from .utils import apply_delta, game_state, start_game
+
+
+def test_replay_matches_live_states(client, monkeypatch):
+    # Long runs save their replay events as they go
+    monkeypatch.setattr('walle.cache.REPLAY_BUFFER', 256)
+    game_id = start_game(client, 20, 300, seed=3)
+    url = f"/api/games/{game_id}"
+    states = {0: game_state(client.get(f"{url}/stats/").json())}
+
+    def next_round(turns=1):
+        data = client.post(f"{url}/next-round/?turns={turns}").json()
+        states[data['turn_number']] = game_state(data)
+
+    for turn in range(40):
+        next_round()
+        if turn == 25:
+            # Saved and loaded again, the replay log goes on from a new keyframe
+            game_cache.clear()
+    for _ in range(6):
+        next_round(10)
+        game_cache.flush_game(game_id)
+
+    response = client.post(f"{url}/run/", {'max_turns': 60}, content_type='application/json')
+    assert response.status_code == 200, response.content
+    states[response.json()['turn_number']] = game_state(client.get(f"{url}/stats/").json())
+
+    # Across the keyframe of turn 200, reloaded right after it
+    for turn in range(50):
+        next_round()
+        if turn == 45:
+            game_cache.clear()
+    live_delta = client.get(f"{url}/stats/?since={max(states) - 3}").json()
+    assert apply_delta(states[max(states) - 3], live_delta) == states[max(states)]
+    assert max(states) == 210
+
+    for turn_number, state in states.items():
+        response = client.get(f"{url}/replay/{turn_number}/")
+        assert response.status_code == 200, response.content
+        assert game_state(response.json()) == state, turn_number
+
+    # Scrubbing forward, to the next turn or further and across keyframes
+    turns = sorted(states)
+    pairs = list(zip(turns, turns[1:])) + list(zip(turns, turns[7:])) + [(turns[-1], turns[0])]
+    for since, turn_number in pairs:
+        data = client.get(f"{url}/replay/{turn_number}/?since={since}").json()
+        if 'since' in data:
+            assert data['since'] == since
+            replayed = apply_delta(states[since], data)
+        else:
+            replayed = game_state(data)
+        assert replayed == states[turn_number], (since, turn_number)
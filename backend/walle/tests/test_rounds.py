@@ -0,0 +1,61 @@
+from .utils import apply_delta, game_state, start_game
+
+
+def apply_frames(state, frames):
+    for turn_number, waste_collected, changed_agents, removed_wastes in frames:
+        state = apply_delta(state, {
+            'turn_number': turn_number,
+            'waste_collected': waste_collected,
+            'changed_agents': changed_agents,
+            'removed_wastes': removed_wastes,
+        })
+    return state
+
+
+def stats(client, game_id):
+    return game_state(client.get(f"/api/games/{game_id}/stats/").json())
+
+
+def test_frames_replay_the_round(client):
+    game_id = start_game(client, 20, 100, seed=1)
+    state = stats(client, game_id)
+    for _ in range(5):
+        data = client.post(f"/api/games/{game_id}/next-round/?turns=10&frames=true").json()
+        assert [frame[0] for frame in data['frames']] == list(range(state[0] + 1, state[0] + 11))
+        state = apply_frames(state, data['frames'])
+        assert state == stats(client, game_id) == game_state(data)
+
+
+def test_round_stops_when_the_game_is_over(client):
+    game_id = start_game(client, 10, 3, seed=2)
+    state = stats(client, game_id)
+    while True:
+        data = client.post(f"/api/games/{game_id}/next-round/?turns=64&frames=true").json()
+        state = apply_frames(state, data['frames'])
+        assert state == stats(client, game_id)
+        if len(data['frames']) < 64:
+            break
+
+    # The round ends on the turn collecting the last waste
+    collected = [frame[1] for frame in data['frames']]
+    assert collected[-1] == 3 and collected.count(3) == 1
+    assert data['waste_collected'] == 3 and data['turn_number'] == data['frames'][-1][0]
+    response = client.post(f"/api/games/{game_id}/next-round/?turns=64")
+    assert response.status_code == 400
+    assert stats(client, game_id) == state
+
+
+def test_round_with_since_sends_the_changes(client):
+    game_id = start_game(client, 20, 100, seed=3)
+    states = {0: stats(client, game_id)}
+    for turns in (1, 3, 1, 5):
+        data = client.post(f"/api/games/{game_id}/next-round/?turns={turns}").json()
+        states[data['turn_number']] = game_state(data)
+
+    # From the state before the round, or from further back
+    for since in (10, 5, 4, 1, 0):
+        data = client.post(f"/api/games/{game_id}/next-round/?turns=4&since={since}").json()
+        assert data['since'] == since
+        assert 'agent_positions' not in data
+        states[data['turn_number']] = apply_delta(states[since], data)
+        assert states[data['turn_number']] == stats(client, game_id)
@@ -0,0 +1,55 @@
+import asyncio
+import json
+
+from walle.cache import game_cache
+from walle.streaming import DELTA, SNAPSHOT, stream_turns
+
+from .utils import apply_delta, game_state, start_game
+
+# Fast enough for a short test, above the rate clients may ask for
+TEST_TICK_RATE = 500
+
+
+def parse(message):
+    event, data = message.split('\n', 1)
+    assert event.startswith('event: ') and data.startswith('data: ') and data.endswith('\n\n')
+    return event[len('event: '):], json.loads(data[len('data: '):])
+
+
+async def subscribe(live, mode):
+    return [parse(message) async for message in stream_turns(live, TEST_TICK_RATE, mode)]
+
+
+def test_stream_sends_the_changes_of_each_turn(client):
+    game_id = start_game(client, 10, 20, seed=8)
+    live = game_cache.get(game_id)
+
+    async def both():
+        return await asyncio.gather(subscribe(live, DELTA), subscribe(live, SNAPSHOT))
+    deltas, snapshots = asyncio.run(both())
+
+    # Both subscribers share one loop, which plays the game to its end
+    final = client.get(f"/api/games/{game_id}/stats/").json()
+    assert final['waste_collected'] == 20
+    for events in (deltas, snapshots):
+        assert events[0][0] == 'state'
+        assert events[-1] == ('end', {'game_id': game_id})
+        # A subscriber joining while a turn is played gets the state after it
+        first = events[0][1]['turn_number']
+        assert [data['turn_number'] for _, data in events[:-1]] == list(range(first, final['turn_number'] + 1))
+    snapshots = {data['turn_number']: data for _, data in snapshots[:-1]}
+
+    assert deltas[0][1]['turn_number'] == 0
+    assert {event for event, _ in deltas[1:-1]} == {'delta'}
+    state = game_state(deltas[0][1])
+    for _, delta in deltas[1:-1]:
+        assert delta['since'] == state[0]
+        state = apply_delta(state, delta)
+        if state[0] in snapshots:
+            assert state == game_state(snapshots[state[0]])
+    assert state == game_state(final)
+
+    # A finished game is streamed as its state alone
+    assert asyncio.run(subscribe(game_cache.get(game_id), DELTA)) == [
+        ('state', snapshots[final['turn_number']]), ('end', {'game_id': game_id})
+    ]
@@ -0,0 +1,28 @@
+from walle.assignment import GREEDY, PER_TURN
+from walle.movement import RESERVED, SEQUENTIAL
+from walle.placement import CLUSTERED, UNIFORM
+from walle.planner import PLANNER
+from walle.sweep import run_sweep, summarize, sweep_configurations
+
+
+def without_times(results):
+    return [{key: value for key, value in result.items() if key != 'seconds'} for result in results]
+
+
+def test_sweep_gives_the_same_results_for_any_number_of_workers():
+    configurations = sweep_configurations(
+        [5, 12], [20], [(15, 15)], range(3),
+        assignments=(PER_TURN, GREEDY), pathings=(PLANNER,), movements=(SEQUENTIAL, RESERVED),
+        grid_sizes=((24, 20),), placements=(UNIFORM, CLUSTERED),
+    )
+    alone = list(run_sweep(configurations, max_turns=2000, workers=1))
+    assert [tuple(result[field] for field in ('num_agents', 'assignment', 'movement', 'placement', 'seed'))
+            for result in alone] == [
+        (agents, assignment, movement, placement, seed)
+        for agents, _, _, _, _, _, assignment, _, movement, placement, seed in configurations
+    ]
+
+    for workers, chunk_size in ((3, 1), (4, None)):
+        pooled = list(run_sweep(configurations, max_turns=2000, workers=workers, chunk_size=chunk_size))
+        assert without_times(pooled) == without_times(alone)
+        assert summarize(pooled) == summarize(alone)
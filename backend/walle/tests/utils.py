@@ -0,0 +1,35 @@
+def start_game(client, num_agents, num_wastes, seed=0, **options):
+    """
+    Start a game through the API and return its id
+    """
+    response = client.post('/api/games/', {
+        'num_agents': num_agents,
+        'num_wastes': num_wastes,
+        'base_position_x': 15,
+        'base_position_y': 15,
+        'seed': seed,
+        **options,
+    }, content_type='application/json')
+    assert response.status_code == 200, response.content
+    return response.json()['game_id']
+
+
+def game_state(data):
+    """
+    The state of a response body, wastes being listed in board order by live
+    games and sorted by replays
+    """
+    return data['turn_number'], data['waste_collected'], data['agent_positions'], sorted(data['waste_positions'])
+
+
+def apply_delta(state, delta):
+    """
+    The state reached by applying the changes of a delta response to a state
+    """
+    _, _, agents, wastes = state
+    agents = [list(agent) for agent in agents]
+    for index, x, y, w in delta['changed_agents']:
+        agents[index] = [x, y, w]
+    removed = set(map(tuple, delta['removed_wastes']))
+    wastes = [waste for waste in wastes if tuple(waste) not in removed]
+    return delta['turn_number'], delta['waste_collected'], agents, wastes
@@ -1,9 +1,32 @@
 from django.urls import path
-from .views import GameStatusView, GameNextRoundView, GameStartView, GameStopView
+from .views import (
+    GameBulkStartView, GameStatusView, GameNextRoundView, GameRunView, GameStartView, GameStopView, GameStreamView,
+    JobStatusView, JobSubmitView, MetricsView, ReplayTurnView, ReplayView
+)
 
 urlpatterns = [
+    # Games addressed by id
+    path('games/', GameStartView.as_view(), name='game-create'),
+    path('games/bulk/', GameBulkStartView.as_view(), name='game-bulk-create'),
+    path('games/<int:game_id>/stats/', GameStatusView.as_view(), name='game-stats-by-id'),
+    path('games/<int:game_id>/next-round/', GameNextRoundView.as_view(), name='game-next-round-by-id'),
+    path('games/<int:game_id>/run/', GameRunView.as_view(), name='game-run-by-id'),
+    path('games/<int:game_id>/stop/', GameStopView.as_view(), name='game-stop-by-id'),
+    path('games/<int:game_id>/stream/', GameStreamView.as_view(), name='game-stream'),
+    path('games/<int:game_id>/replay/', ReplayView.as_view(), name='game-replay'),
+    path('games/<int:game_id>/replay/<int:turn_number>/', ReplayTurnView.as_view(), name='game-replay-turn'),
+
+    # Headless games run by background workers
+    path('jobs/', JobSubmitView.as_view(), name='job-submit'),
+    path('jobs/<int:job_id>/', JobStatusView.as_view(), name='job-status'),
+
+    # Prometheus scrape target
+    path('metrics/', MetricsView.as_view(), name='metrics'),
+
+    # Routes without an id act on the most recently started game
     path('stats/', GameStatusView.as_view(), name='game-stats'),
     path('next-round/', GameNextRoundView.as_view(), name='game-next-round'),
+    path('run/', GameRunView.as_view(), name='game-run'),
     path('start/', GameStartView.as_view(), name='game-start'),
     path('stop/', GameStopView.as_view(), name='game-stop'),
 ]
@@ -1,35 +1,140 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Configuration, Game
-from .serializers import ConfigurationSerializer, GameStateSerializer
-from .game_logic import rand_list, next_turn
+from rest_framework.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.views import View
+from asgiref.sync import sync_to_async
+from .models import Configuration, Game, Replay, SimulationJob
+from .serializers import (
+    BulkStartRequestSerializer, ConfigurationSerializer, RunRequestSerializer, DeltaRequestSerializer,
+    NextRoundRequestSerializer, JobRequestSerializer,
+    GameDeltaSerializer, StreamRequestSerializer, SimulationJobSerializer, ReplaySerializer
+)
+from .game_logic import game_rng
+from .placement import UNIFORM, place
+from .bulk import create_games, expand_product
+from .cache import StaleGame, game_cache
+from .jobs import submit_job
+from .metrics import render as render_metrics, timed
+from .negotiation import FirstRendererNegotiation
+from .renderers import GameJSONRenderer
+from .replay import KEYFRAME_EVERY, seek
+from .state import GameState
+from .streaming import stream_turns
 import json
+import random
 
-class GameStatusView(APIView):
+def get_live_game(game_id=None):
     """
-    Get the current game status
+    Fetch a game from the cache by id, or the most recently started one when no id is given
     """
-    def get(self, request):
+    if game_id is None:
+        with timed("db_load"):
+            game_id = Game.objects.order_by('-id').values_list('id', flat=True).first()
+        if game_id is None:
+            return None
+    return game_cache.get(game_id)
+
+# Times a request plays its turns, on a freshly loaded copy of the game
+# after the one it held turned stale
+PLAY_ATTEMPTS = 3
+
+def play_live_game(game_id, play):
+    """
+    Call play with a live game while holding its lock, starting over on a
+    reloaded copy when the game was evicted or saved by another process
+    before the turns played were saved
+    Returns what play returned, or None when the game does not exist
+    """
+    for _ in range(PLAY_ATTEMPTS):
+        live = get_live_game(game_id)
+        if not live:
+            return None
+        game_id = live.game_id
+        with live.lock:
+            if live.stale:
+                continue
+            try:
+                return play(live)
+            except StaleGame:
+                continue
+    raise StaleGame(f"Game {game_id} kept being played elsewhere, try again.")
+
+def configuration_error(data):
+    """
+    Check validated configuration data against its board
+    Returns the error message, or None when the game can be placed
+    """
+    width = data.get('grid_width', 32)
+    height = data.get('grid_height', 32)
+    if data['num_agents'] < 0 or data['num_wastes'] < 0:
+        return "Numbers of agents and wastes cannot be negative."
+    if data['num_agents'] >= (width * height) or data['num_wastes'] >= (width * height):
+        return "Too many agents or wastes for the board size."
+    if not (0 <= data['base_position_x'] < width and 0 <= data['base_position_y'] < height):
+        return "Base position is outside of the board."
+    return None
+
+def serialized(serializer_class, instance):
+    """
+    Serialize an instance for a response, timed as the serialize phase
+    """
+    with timed("serialize"):
+        return serializer_class(instance).data
+
+def state_data(live, since=None):
+    """
+    The state of a live game, or only its changes since a turn when they are
+    still in memory, shaped as the response body
+    Must be called while holding the live game's lock
+    """
+    if since is not None:
+        delta = live.delta_since(since)
+        if delta is not None:
+            return delta
+    return live.state().as_dict()
+
+class GameAPIView(APIView):
+    """
+    Endpoints playing and sending the state of a game, called every turn by
+    the clients
+
+    Their bodies are built in the shape of the response rather than walked
+    by a serializer, and rendered by GameJSONRenderer whatever the client
+    accepts. The API has no users, so requests skip authentication.
+    """
+    authentication_classes = []
+    content_negotiation_class = FirstRendererNegotiation
+    renderer_classes = [GameJSONRenderer]
+
+class GameStatusView(GameAPIView):
+    """
+    Get the status of a game
+    Query: 'since' (optional) to only get the changes since that turn
+    """
+    def get(self, request, game_id=None):
         try:
-            game = Game.objects.select_related('configuration').first()
-            if not game:
+            delta_request = DeltaRequestSerializer(data=request.query_params)
+            if not delta_request.is_valid():
+                return Response(
+                    delta_request.errors,
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            live = get_live_game(game_id)
+            if not live:
                 return Response(
                     {"error": "No game found. Start a new game first."},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            game_state = {
-                "waste_collected": game.waste_collected,
-                "total_wastes": game.configuration.num_wastes,
-                "agent_positions": game.agent_positions,
-                "waste_positions": game.waste_positions,
-                "base_position": [game.configuration.base_position_x, game.configuration.base_position_y],
-                "turn_number": game.turn_number
-            }
+            with live.lock:
+                data = state_data(live, delta_request.validated_data.get('since'))
             
-            serializer = GameStateSerializer(game_state)
-            return Response(serializer.data)
+            return Response(data)
             
         except Exception as e:
             return Response(
@@ -37,72 +142,115 @@ class GameStatusView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class GameNextRoundView(APIView):
+class GameNextRoundView(GameAPIView):
     """
-    Play the next round of the game
+    Play the next round of a game
+    Query: 'since' (optional) to only get the changes since that turn,
+    'turns' (optional) to play several turns at once, stopping when the game
+    is over, 'frames' (optional) to also get the changes of each of them
     """
-    def post(self, request):
+    def post(self, request, game_id=None):
         try:
-            game = Game.objects.select_related('configuration').first()
-            if not game:
+            round_request = NextRoundRequestSerializer(data=request.query_params)
+            if not round_request.is_valid():
+                return Response(
+                    round_request.errors,
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            def play_round(live):
+                if not live.is_active:
+                    return Response(
+                        {"error": "Game is not active. Start a new game first."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                
+                # Run next turn logic on the cached board
+                frames = [] if round_request.validated_data['frames'] else None
+                played = live.play_turns(round_request.validated_data['turns'], frames)
+                
+                # Saved every few turns, or right away depending on the cache
+                # durability, once for all the turns of the round
+                game_cache.played(live, played)
+                data = state_data(live, round_request.validated_data.get('since'))
+                if frames is not None:
+                    data["frames"] = frames
+                return Response(data)
+
+            # Played holding the game lock so parallel clients cannot play the same turn twice
+            response = play_live_game(game_id, play_round)
+            if response is None:
                 return Response(
                     {"error": "No game found. Start a new game first."},
                     status=status.HTTP_404_NOT_FOUND
                 )
+            return response
             
-            if not game.is_active:
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class GameRunView(GameAPIView):
+    """
+    Play a game in memory until it is over or the turn cap is reached
+    POST Body: 'max_turns' (optional)
+    """
+    def post(self, request, game_id=None):
+        try:
+            request_serializer = RunRequestSerializer(data=request.data)
+            if not request_serializer.is_valid():
                 return Response(
-                    {"error": "Game is not active. Start a new game first."},
+                    request_serializer.errors,
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            base_position = [game.configuration.base_position_x, game.configuration.base_position_y]
-            
-            # Run next turn logic
-            waste_positions, agent_positions, known_waste_positions, waste_collected = next_turn(
-                game.waste_positions,
-                game.agent_positions,
-                base_position,
-                game.known_waste_positions,
-                game.waste_collected
-            )
-            
-            # Update game state
-            game.waste_positions = waste_positions
-            game.agent_positions = agent_positions
-            game.known_waste_positions = known_waste_positions
-            game.waste_collected = waste_collected
-            game.turn_number += 1
-            
-            # Check if game is over
-            if game.waste_collected >= game.configuration.num_wastes:
-                game.is_active = False
-            
-            game.save()
-            
-            # Prepare response
-            game_state = {
-                "waste_collected": game.waste_collected,
-                "total_wastes": game.configuration.num_wastes,
-                "agent_positions": game.agent_positions,
-                "waste_positions": game.waste_positions,
-                "base_position": base_position,
-                "turn_number": game.turn_number
-            }
-            
-            serializer = GameStateSerializer(game_state)
-            return Response(serializer.data)
-            
+
+            def run(live):
+                if not live.is_active:
+                    return Response(
+                        {"error": "Game is not active. Start a new game first."},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                # Run every turn in memory, the state is saved at the end and
+                # along the way when the run is long
+                summary = live.run(request_serializer.validated_data['max_turns'])
+
+                game_cache.played(live, summary["turns"])
+                live.flush()
+
+                # Prepare response
+                return Response({
+                    "game_id": live.game_id,
+                    "turns": summary["turns"],
+                    "completed": summary["completed"],
+                    "waste_collected": live.waste_collected,
+                    "total_wastes": live.total_wastes,
+                    "turn_number": live.turn_number,
+                    "agent_distances": summary["agent_distances"],
+                    "wastes_delivered": summary["wastes_delivered"]
+                })
+
+            response = play_live_game(game_id, run)
+            if response is None:
+                return Response(
+                    {"error": "No game found. Start a new game first."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            return response
+
         except Exception as e:
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class GameStartView(APIView):
+class GameStartView(GameAPIView):
     """
-    Start a new game
-    POST Body: 'num_agents', 'num_wastes', 'base_position_x', 'base_position_y'
+    Start a new game, alongside the games already running
+    POST Body: 'num_agents', 'num_wastes', 'base_position_x', 'base_position_y',
+    optionally 'grid_width', 'grid_height', 'placement'
     """
     def post(self, request):
         try:
@@ -114,53 +262,51 @@ class GameStartView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Check if game already exists and delete it
-            if Game.objects.exists():
-                Game.objects.all().delete()
-            if Configuration.objects.exists():
-                Configuration.objects.all().delete()
-            
-            # Create new configuration
-            config = serializer.save()
-            
-            # Check if number of agents and wastes are valid
-            if config.num_agents >= (32 * 32) or config.num_wastes >= (32 * 32):
-                config.delete()
+            # Check that the agents, the wastes and the base fit on the board
+            error = configuration_error(serializer.validated_data)
+            if error:
                 return Response(
-                    {"error": "Too many agents or wastes for the board size."},
+                    {"error": error},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+            num_agents = serializer.validated_data['num_agents']
+            num_wastes = serializer.validated_data['num_wastes']
+            width = serializer.validated_data.get('grid_width', 32)
+            height = serializer.validated_data.get('grid_height', 32)
             
-            # Initialize game state
-            agent_positions = rand_list(config.num_agents, third_arg=True)
-            agent_positions_list = [[i, j, w] for i, j, w in agent_positions]
+            # Draw a seed when none is given, so that every game can be replayed
+            seed = serializer.validated_data.get('seed')
+            if seed is None:
+                seed = random.getrandbits(32)
+            rng = game_rng(seed, 0)
             
-            waste_positions = rand_list(config.num_wastes, agent_positions=agent_positions, wastes=True)
+            # Initialize game state, agents and wastes being placed together
+            agent_positions, waste_positions = place(
+                num_agents, num_wastes, rng, width, height,
+                serializer.validated_data.get('placement', UNIFORM)
+            )
+            agent_positions_list = [[i, j, w] for i, j, w in agent_positions]
             waste_positions_list = [[i, j] for i, j in waste_positions]
             
-            # Create game
-            game = Game.objects.create(
-                configuration=config,
-                waste_collected=0,
-                is_active=True,
-                turn_number=0,
-                waste_positions=waste_positions_list,
-                agent_positions=agent_positions_list,
-                known_waste_positions=[]
-            )
+            # Create configuration and game together
+            with timed("save"), transaction.atomic():
+                config = serializer.save(seed=seed)
+                game = Game.objects.create(
+                    configuration=config,
+                    waste_collected=0,
+                    is_active=True,
+                    turn_number=0,
+                    waste_positions=waste_positions_list,
+                    agent_positions=agent_positions_list,
+                    known_waste_positions=[]
+                )
             
-            # Prepare response
-            game_state = {
-                "waste_collected": 0,
-                "total_wastes": config.num_wastes,
-                "agent_positions": game.agent_positions,
-                "waste_positions": game.waste_positions,
-                "base_position": [config.base_position_x, config.base_position_y],
-                "turn_number": 0
-            }
+            # The first rounds are usually requested right away
+            live = game_cache.add(game)
+            with live.lock:
+                state = live.state()
             
-            response_serializer = GameStateSerializer(game_state)
-            return Response(response_serializer.data)
+            return Response(state.as_dict())
             
         except Exception as e:
             return Response(
@@ -168,44 +314,291 @@ class GameStartView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-class GameStopView(APIView):
+class GameBulkStartView(APIView):
     """
-    Stop the current game
+    Create many games at once, to be played later by id, without loading them
+    POST Body: 'games', a list of configurations as for starting a game, or
+    'product', mapping configuration fields to a value or a list of values
+    to create a game for each combination, and 'repeat' (optional) to create
+    each game that many times
     """
     def post(self, request):
         try:
-            game = Game.objects.select_related('configuration').first()
-            if not game:
+            bulk_request = BulkStartRequestSerializer(data=request.data)
+            if not bulk_request.is_valid():
+                return Response(
+                    bulk_request.errors,
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            data = bulk_request.validated_data
+            configurations = data['games'] if 'games' in data else expand_product(data['product'])
+
+            # One serializer validates every configuration, as with many=True,
+            # so that its fields are only built once. Repeated configurations
+            # are only validated once
+            serializer = ConfigurationSerializer()
+            keys = [json.dumps(configuration, sort_keys=True) for configuration in configurations]
+            validated = {}
+            for index, (key, configuration) in enumerate(zip(keys, configurations)):
+                if key in validated:
+                    continue
+                try:
+                    validated_data = serializer.run_validation(configuration)
+                except ValidationError as e:
+                    return Response(
+                        {"error": f"Configuration {index} is invalid.", "details": e.detail},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                error = configuration_error(validated_data)
+                if error:
+                    return Response(
+                        {"error": f"Configuration {index}: {error}"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                validated[key] = validated_data
+
+            game_ids = create_games([validated[key] for key in keys for _ in range(data['repeat'])])
+            return Response({"game_ids": game_ids}, status=status.HTTP_201_CREATED)
+
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class GameStopView(GameAPIView):
+    """
+    Stop a game and delete it, finished games included, returning its last state
+    """
+    def post(self, request, game_id=None):
+        try:
+            live = get_live_game(game_id)
+            if not live:
                 return Response(
                     {"error": "No game found."},
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            if not game.is_active:
+            with live.lock:
+                # Prepare response
+                state = live.state()
+
+                # Stop the game: the row is deleted, so pending turns are dropped
+                # instead of flushed. Deleting the configuration deletes the game too
+                game_cache.pop(live.game_id)
+                with timed("save"):
+                    Configuration.objects.filter(pk=live.configuration_id).delete()
+            
+            return Response(state.as_dict())
+            
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class GameStreamView(View):
+    """
+    Play a game at a fixed tick rate and stream its turns as Server-Sent Events
+    Query: 'tick' (turns per second, optional), 'mode' ('delta' or 'snapshot', optional)
+    Only works when the API is served by an ASGI server
+    """
+    async def get(self, request, game_id):
+        stream_request = StreamRequestSerializer(data=request.GET)
+        if not stream_request.is_valid():
+            return JsonResponse(stream_request.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        live = await sync_to_async(game_cache.get)(game_id)
+        if not live:
+            return JsonResponse(
+                {"error": "No game found. Start a new game first."},
+                status=status.HTTP_404_NOT_FOUND
+            )
+
+        response = StreamingHttpResponse(
+            stream_turns(live, stream_request.validated_data['tick'], stream_request.validated_data['mode']),
+            content_type='text/event-stream'
+        )
+        response['Cache-Control'] = 'no-cache'
+        # Keep proxies such as nginx from buffering the stream
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+class JobSubmitView(APIView):
+    """
+    Queue a headless game played to completion by the workers of the
+    runworkers command, instead of in the request
+    POST Body: the configuration of a game as for starting one, 'max_turns' (optional)
+    """
+    def post(self, request):
+        try:
+            serializer = ConfigurationSerializer(data=request.data)
+            request_serializer = JobRequestSerializer(data=request.data)
+            # Validate both, so that every error is reported at once
+            valid = serializer.is_valid()
+            valid = request_serializer.is_valid() and valid
+            if not valid:
                 return Response(
-                    {"error": "Game is already stopped."},
+                    {**serializer.errors, **request_serializer.errors},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            
-            # Prepare response
-            game_state = {
-                "waste_collected": game.waste_collected,
-                "total_wastes": game.configuration.num_wastes,
-                "agent_positions": game.agent_positions,
-                "waste_positions": game.waste_positions,
-                "base_position": [game.configuration.base_position_x, game.configuration.base_position_y],
-                "turn_number": game.turn_number
-            }
-
-            # Stop the game
-            Game.objects.all().delete()
-            Configuration.objects.all().delete()
-            
-            serializer = GameStateSerializer(game_state)
-            return Response(serializer.data)
-            
+
+            error = configuration_error(serializer.validated_data)
+            if error:
+                return Response(
+                    {"error": error},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            # Drawn now so that the job can be replayed as a game
+            seed = serializer.validated_data.get('seed')
+            if seed is None:
+                seed = random.getrandbits(32)
+
+            with timed("save"), transaction.atomic():
+                config = serializer.save(seed=seed)
+                job = submit_job(config, request_serializer.validated_data['max_turns'])
+
+            return Response(serialized(SimulationJobSerializer, job), status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class JobStatusView(APIView):
+    """
+    Get the status of a simulation job, its progress while it runs and its
+    result once done
+    """
+    def get(self, request, job_id):
+        try:
+            with timed("db_load"):
+                job = SimulationJob.objects.select_related('configuration').filter(id=job_id).first()
+            if not job:
+                return Response(
+                    {"error": "No job found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            return Response(serialized(SimulationJobSerializer, job))
+
         except Exception as e:
             return Response(
                 {"error": str(e)},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
+
+class ReplayView(APIView):
+    """
+    Get the range of turns recorded in the replay log of a game, which is
+    kept after the game is stopped
+    """
+    def get(self, request, game_id):
+        try:
+            # The turns of a running game reach the log when it is flushed
+            game_cache.flush_game(game_id)
+
+            with timed("db_load"):
+                replay = Replay.objects.filter(game_id=game_id).first()
+            if not replay:
+                return Response(
+                    {"error": "No replay found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            with timed("db_load"):
+                keyframes = replay.keyframes.aggregate(first=Min('turn_number'), last=Max('turn_number'))
+                last_events = replay.events.aggregate(last=Max('last_turn'))['last']
+            last_turn = keyframes['last']
+            if last_events is not None:
+                last_turn = max(last_turn, last_events)
+            return Response(serialized(ReplaySerializer, {
+                "game_id": game_id,
+                "first_turn": keyframes['first'],
+                "last_turn": last_turn,
+                "keyframe_every": KEYFRAME_EVERY,
+                "total_wastes": replay.total_wastes,
+                "base_position": [replay.base_position_x, replay.base_position_y],
+                "grid_size": [replay.grid_width, replay.grid_height],
+                "seed": replay.seed,
+            }))
+
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class ReplayTurnView(APIView):
+    """
+    Get a game as it was at a turn, rebuilt from its replay log
+    Query: 'since' (optional) to only get the changes since that turn, for
+    scrubbing forward
+    """
+    def get(self, request, game_id, turn_number):
+        try:
+            delta_request = DeltaRequestSerializer(data=request.query_params)
+            if not delta_request.is_valid():
+                return Response(
+                    delta_request.errors,
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            game_cache.flush_game(game_id)
+            with timed("db_load"):
+                replay = Replay.objects.filter(game_id=game_id).first()
+            if not replay:
+                return Response(
+                    {"error": "No replay found."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            # Changes going back in time or spanning more than a keyframe
+            # interval are sent as a full state, cheaper to rebuild
+            since = delta_request.validated_data.get('since')
+            if since is not None and not 0 <= turn_number - since <= KEYFRAME_EVERY:
+                since = None
+            # Reads the keyframe and the events from the database and applies them
+            with timed("seek"):
+                state = seek(replay, turn_number, since)
+                if state is None and since is not None:
+                    since = None
+                    state = seek(replay, turn_number)
+            if state is None:
+                return Response(
+                    {"error": "Turn not recorded."},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+
+            if since is not None:
+                return Response(serialized(GameDeltaSerializer, {
+                    "game_id": game_id,
+                    "since": since,
+                    "waste_collected": state.waste_collected,
+                    "total_wastes": replay.total_wastes,
+                    "changed_agents": [[index, x, y, w] for index, (x, y, w) in sorted(state.changed_agents.items())],
+                    "removed_wastes": state.removed_wastes,
+                    "turn_number": state.turn_number
+                }))
+
+            return Response(GameState(
+                game_id, state.waste_collected, replay.total_wastes, state.agents, sorted(state.wastes),
+                [replay.base_position_x, replay.base_position_y], [replay.grid_width, replay.grid_height],
+                state.turn_number
+            ).as_dict())
+
+        except Exception as e:
+            return Response(
+                {"error": str(e)},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class MetricsView(View):
+    """
+    Get the counters and histograms of the requests and turns served by this
+    process, in the Prometheus text format
+    """
+    def get(self, request):
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -3,7 +3,7 @@ import Grid from './components/Grid';
 import ControlPanel from './components/ControlPanel';
 import StatsPanel from './components/StatsPanel';
 import { GameConfig, GameState } from './types';
-import { startGame, getGameStatus, nextRound, stopGame } from './services/api';
+import { startGame, getGameStatus, nextRound, nextRounds, stopGame } from './services/api';
 import './App.css';
 
 const App: React.FC = () => {
@@ -12,7 +12,18 @@ const App: React.FC = () => {
   const [isPaused, setIsPaused] = useState(false);
   const [isAutoRunning, setIsAutoRunning] = useState(false);
   const autoRunIntervalRef = useRef<NodeJS.Timeout | null>(null);
+  // Latest state, read by the auto-run interval to only fetch what changed since
+  const gameStateRef = useRef<GameState | null>(null);
+  // Turns fetched ahead by the auto run and not shown yet
+  const pendingStatesRef = useRef<GameState[]>([]);
+  const fetchingRef = useRef(false);
   const roundInterval = 300; // 300ms
+  // Turns the auto run fetches per request, shown one every roundInterval
+  const turnsPerRequest = 10;
+
+  useEffect(() => {
+    gameStateRef.current = gameState;
+  }, [gameState]);
 
   // Check for existing game on component mount
   useEffect(() => {
@@ -57,19 +68,40 @@ const App: React.FC = () => {
     setIsAutoRunning(false);
   };
 
+  // Show the next turn, fetching the next few ones once those already fetched were shown
+  // Returns null while they are being fetched
+  const advance = async (gameId: number): Promise<GameState | null> => {
+    if (!pendingStatesRef.current.length) {
+      if (fetchingRef.current) return null;
+      fetchingRef.current = true;
+      try {
+        pendingStatesRef.current = await nextRounds(gameId, turnsPerRequest, gameStateRef.current ?? undefined);
+      } finally {
+        fetchingRef.current = false;
+      }
+    }
+
+    const state = pendingStatesRef.current.shift() ?? null;
+    if (state) {
+      gameStateRef.current = state;
+      setGameState(state);
+    }
+    return state;
+  };
+
   const startAutoRun = () => {
     if (!gameState || gameState.waste_collected === gameState.total_wastes) return;
     
     setIsPaused(false);
     setIsAutoRunning(true);
     
+    const gameId = gameState.game_id;
     autoRunIntervalRef.current = setInterval(async () => {
       try {
-        const newGameState = await nextRound();
-        setGameState(newGameState);
+        const newGameState = await advance(gameId);
         
         // Check if game is complete
-        if (newGameState.waste_collected === newGameState.total_wastes) {
+        if (newGameState && newGameState.waste_collected === newGameState.total_wastes) {
           stopAutoRun();
         }
       } catch (err) {
@@ -86,6 +118,8 @@ const App: React.FC = () => {
       if (!gameState || isGameComplete) {
         setError(null);
         const newGameState = await startGame(config);
+        pendingStatesRef.current = [];
+        gameStateRef.current = newGameState;
         setGameState(newGameState);
         
         // Use the received game state directly instead of relying on the updated state beacuase React is not guaranteed to update immediately
@@ -96,11 +130,10 @@ const App: React.FC = () => {
             
             autoRunIntervalRef.current = setInterval(async () => {
               try {
-                const updatedState = await nextRound();
-                setGameState(updatedState);
+                const updatedState = await advance(newGameState.game_id);
                 
                 // Check if game is complete
-                if (updatedState.waste_collected === updatedState.total_wastes) {
+                if (updatedState && updatedState.waste_collected === updatedState.total_wastes) {
                   stopAutoRun();
                 }
               } catch (err) {
@@ -131,12 +164,15 @@ const App: React.FC = () => {
   };
 
   const handleStop = async () => {
+    if (!gameState) return;
+
     try {
       // First stop the auto run
       stopAutoRun();
       
       setError(null);
-      await stopGame();
+      await stopGame(gameState.game_id);
+      pendingStatesRef.current = [];
       setGameState(null);
       setIsPaused(false);
     } catch (err) {
@@ -145,11 +181,13 @@ const App: React.FC = () => {
   };
 
   const handleNextRound = async () => {
-    if (!isPaused) return;
+    if (!isPaused || !gameState) return;
     
     try {
       setError(null);
-      const newGameState = await nextRound();
+      // Turns already fetched by the auto run come first
+      const newGameState = pendingStatesRef.current.shift() ?? await nextRound(gameState.game_id, gameState);
+      gameStateRef.current = newGameState;
       setGameState(newGameState);
     } catch (err) {
       setError(`Failed to advance to next round: ${err instanceof Error ? err.message : String(err)}`);
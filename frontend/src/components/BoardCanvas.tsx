@@ -0,0 +1,52 @@
+import React, { useEffect, useRef } from 'react';
+import { GameState } from '../types';
+
+interface BoardCanvasProps {
+  gameState: GameState;
+  width: number; // Pixels
+  height: number; // Pixels
+}
+
+// Same colors as the cells of the grid
+const BACKGROUND_COLOR = '#f5f5f5';
+const BASE_COLOR = '#4caf50';
+const WASTE_COLOR = '#8d6e63';
+const AGENT_COLOR = '#2196f3';
+
+// Boards too large for an element per cell are drawn on a canvas, every
+// agent and waste being at least one pixel wide
+const BoardCanvas: React.FC<BoardCanvasProps> = ({ gameState, width, height }) => {
+  const canvasRef = useRef<HTMLCanvasElement | null>(null);
+
+  useEffect(() => {
+    const context = canvasRef.current?.getContext('2d');
+    if (!context) return;
+
+    const [gridWidth, gridHeight] = gameState.grid_size;
+    const cellWidth = width / gridWidth;
+    const cellHeight = height / gridHeight;
+    const drawCell = (x: number, y: number, color: string) => {
+      context.fillStyle = color;
+      context.fillRect(x * cellWidth, y * cellHeight, Math.max(1, cellWidth), Math.max(1, cellHeight));
+    };
+
+    context.fillStyle = BACKGROUND_COLOR;
+    context.fillRect(0, 0, width, height);
+    drawCell(gameState.base_position[0], gameState.base_position[1], BASE_COLOR);
+    for (const [x, y] of gameState.waste_positions) {
+      drawCell(x, y, WASTE_COLOR);
+    }
+    for (const [x, y, hasWaste] of gameState.agent_positions) {
+      drawCell(x, y, hasWaste ? WASTE_COLOR : AGENT_COLOR);
+      if (hasWaste && cellWidth > 2 && cellHeight > 2) {
+        // Carriers are agents with a waste colored border, when there is room for one
+        context.fillStyle = AGENT_COLOR;
+        context.fillRect(x * cellWidth + 1, y * cellHeight + 1, cellWidth - 2, cellHeight - 2);
+      }
+    }
+  }, [gameState, width, height]);
+
+  return <canvas ref={canvasRef} width={width} height={height} className="grid-canvas" />;
+};
+
+export default BoardCanvas;
@@ -26,7 +26,11 @@ const ControlPanel: React.FC<ControlPanelProps> = ({
     num_wastes: 20,
     base_position_x: 15,
     base_position_y: 15,
+    grid_width: 32,
+    grid_height: 32,
   });
+  const gridWidth = config.grid_width ?? 32;
+  const gridHeight = config.grid_height ?? 32;
 
   const handleChange = (e: React.ChangeEvent<HTMLInputElement>) => {
     const { name, value } = e.target;
@@ -65,7 +69,7 @@ const ControlPanel: React.FC<ControlPanelProps> = ({
             id="num_agents"
             name="num_agents"
             min="1"
-            max="1000"
+            max={gridWidth * gridHeight - 1}
             value={config.num_agents}
             onChange={handleChange}
             disabled={isGameActive && !isGameComplete}
@@ -79,13 +83,41 @@ const ControlPanel: React.FC<ControlPanelProps> = ({
             id="num_wastes"
             name="num_wastes"
             min="1"
-            max="1000"
+            max={gridWidth * gridHeight - 1}
             value={config.num_wastes}
             onChange={handleChange}
             disabled={isGameActive && !isGameComplete}
           />
         </div>
         
+        <div className="form-group">
+          <label htmlFor="grid_width">Board Width:</label>
+          <input
+            type="number"
+            id="grid_width"
+            name="grid_width"
+            min="4"
+            max="4096"
+            value={gridWidth}
+            onChange={handleChange}
+            disabled={isGameActive && !isGameComplete}
+          />
+        </div>
+        
+        <div className="form-group">
+          <label htmlFor="grid_height">Board Height:</label>
+          <input
+            type="number"
+            id="grid_height"
+            name="grid_height"
+            min="4"
+            max="4096"
+            value={gridHeight}
+            onChange={handleChange}
+            disabled={isGameActive && !isGameComplete}
+          />
+        </div>
+        
         <div className="form-group">
           <label htmlFor="base_position_x">Base Position X:</label>
           <input
@@ -93,7 +125,7 @@ const ControlPanel: React.FC<ControlPanelProps> = ({
             id="base_position_x"
             name="base_position_x"
             min="0"
-            max="31"
+            max={gridWidth - 1}
             value={config.base_position_x}
             onChange={handleChange}
             disabled={isGameActive && !isGameComplete}
@@ -107,7 +139,7 @@ const ControlPanel: React.FC<ControlPanelProps> = ({
             id="base_position_y"
             name="base_position_y"
             min="0"
-            max="31"
+            max={gridHeight - 1}
             value={config.base_position_y}
             onChange={handleChange}
             disabled={isGameActive && !isGameComplete}
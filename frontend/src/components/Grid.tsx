@@ -1,7 +1,14 @@
 import React from 'react';
 import { GameState } from '../types';
+import BoardCanvas from './BoardCanvas';
 import './Grid.css';
 
+// Length in pixels of the longest side of the board
+const BOARD_PIXELS = 640;
+
+// Boards with more cells on a side are drawn on a canvas instead of an element per cell
+const MAX_ELEMENT_GRID_SIZE = 64;
+
 interface GridProps {
   gameState: GameState | null;
 }
@@ -14,15 +21,25 @@ const Grid: React.FC<GridProps> = ({ gameState }) => {
   // Check if the game is complete (all waste collected)
   const isGameComplete = gameState.waste_collected === gameState.total_wastes;
 
-  // Generate a 32x32 grid
-  const grid = Array.from({ length: 32 }, (_, y) =>
-    Array.from({ length: 32 }, (_, x) => {
-      // Check if this cell has an agent
-      const agent = gameState.agent_positions.find(pos => pos[0] === x && pos[1] === y);
+  // Keep the cells square whatever the shape of the board
+  const [width, height] = gameState.grid_size;
+  const scale = BOARD_PIXELS / Math.max(width, height);
+  const boardStyle = { width: Math.round(width * scale), height: Math.round(height * scale) };
+  const useCanvas = width > MAX_ELEMENT_GRID_SIZE || height > MAX_ELEMENT_GRID_SIZE;
+
+  // Index agents and wastes by cell once, instead of searching them for every cell
+  const agentsByCell = new Map<string, boolean>();
+  for (const [x, y, hasWaste] of gameState.agent_positions) {
+    agentsByCell.set(`${x},${y}`, hasWaste);
+  }
+  const wasteCells = new Set(gameState.waste_positions.map(([x, y]) => `${x},${y}`));
+
+  // Generate the grid, row by row
+  const grid: string[][] = useCanvas ? [] : Array.from({ length: height }, (_, y) =>
+    Array.from({ length: width }, (_, x) => {
+      const key = `${x},${y}`;
       // Check if this cell is the base
       const isBase = gameState.base_position[0] === x && gameState.base_position[1] === y;
-      // Check if this cell has waste
-      const hasWaste = gameState.waste_positions.some(pos => pos[0] === x && pos[1] === y);
       
       // Classes to apply to this cell
       const classes = [];
@@ -31,12 +48,12 @@ const Grid: React.FC<GridProps> = ({ gameState }) => {
         classes.push('base');
       }
       
-      if (hasWaste) {
+      if (wasteCells.has(key)) {
         classes.push('waste');
       }
       
-      if (agent) {
-        classes.push(agent[2] ? 'agentWithWaste' : 'agent');
+      if (agentsByCell.has(key)) {
+        classes.push(agentsByCell.get(key) ? 'agentWithWaste' : 'agent');
       }
       
       return classes.join(' ');
@@ -44,7 +61,8 @@ const Grid: React.FC<GridProps> = ({ gameState }) => {
   );
 
   return (
-    <div className="grid-container">
+    <div className="grid-container" style={boardStyle}>
+      {useCanvas && <BoardCanvas gameState={gameState} width={boardStyle.width} height={boardStyle.height} />}
       {grid.map((row, y) => (
         <div key={y} className="grid-row">
           {row.map((cellClasses, x) => (
@@ -1,9 +1,9 @@
-import { GameConfig, GameState } from '../types';
+import { GameConfig, GameDelta, GameFrame, GameState } from '../types';
 
 const BASE_URL = '/api';
 
 export async function startGame(config: GameConfig): Promise<GameState> {
-  const response = await fetch(`${BASE_URL}/start/`, {
+  const response = await fetch(`${BASE_URL}/games/`, {
     method: 'POST',
     headers: {
       'Content-Type': 'application/json',
@@ -19,8 +19,10 @@ export async function startGame(config: GameConfig): Promise<GameState> {
   return response.json();
 }
 
-export async function getGameStatus(): Promise<GameState> {
-  const response = await fetch(`${BASE_URL}/stats/`);
+// Without an id, the backend returns the most recently started game
+export async function getGameStatus(gameId?: number): Promise<GameState> {
+  const path = gameId === undefined ? '/stats/' : `/games/${gameId}/stats/`;
+  const response = await fetch(`${BASE_URL}${path}`);
 
   if (!response.ok) {
     const errorData = await response.json();
@@ -30,8 +32,31 @@ export async function getGameStatus(): Promise<GameState> {
   return response.json();
 }
 
-export async function nextRound(): Promise<GameState> {
-  const response = await fetch(`${BASE_URL}/next-round/`, {
+function applyDelta(state: GameState, delta: GameDelta): GameState {
+  const agentPositions = state.agent_positions.slice();
+  for (const [index, x, y, hasWaste] of delta.changed_agents) {
+    agentPositions[index] = [x, y, hasWaste];
+  }
+
+  const removed = new Set(delta.removed_wastes.map(([x, y]) => `${x},${y}`));
+  const wastePositions = removed.size
+    ? state.waste_positions.filter(([x, y]) => !removed.has(`${x},${y}`))
+    : state.waste_positions;
+
+  return {
+    ...state,
+    waste_collected: delta.waste_collected,
+    total_wastes: delta.total_wastes,
+    agent_positions: agentPositions,
+    waste_positions: wastePositions,
+    turn_number: delta.turn_number,
+  };
+}
+
+// With the previous state, only the changes are downloaded and applied to it
+export async function nextRound(gameId: number, previous?: GameState): Promise<GameState> {
+  const query = previous && previous.game_id === gameId ? `?since=${previous.turn_number}` : '';
+  const response = await fetch(`${BASE_URL}/games/${gameId}/next-round/${query}`, {
     method: 'POST',
   });
 
@@ -40,11 +65,58 @@ export async function nextRound(): Promise<GameState> {
     throw new Error(errorData.error || 'Failed to advance to next round');
   }
 
-  return response.json();
+  const data: GameState | GameDelta = await response.json();
+  if (previous && 'changed_agents' in data) {
+    return applyDelta(previous, data);
+  }
+  return data as GameState;
+}
+
+function applyFrame(state: GameState, [turnNumber, wasteCollected, changedAgents, removedWastes]: GameFrame): GameState {
+  return applyDelta(state, {
+    game_id: state.game_id,
+    since: state.turn_number,
+    waste_collected: wasteCollected,
+    total_wastes: state.total_wastes,
+    changed_agents: changedAgents,
+    removed_wastes: removedWastes,
+    turn_number: turnNumber,
+  });
+}
+
+// Plays several turns in one request and returns the state after each of them,
+// to be shown one by one. Only the last state can be returned when the previous
+// one is unknown, or when other clients played turns in between
+export async function nextRounds(gameId: number, turns: number, previous?: GameState): Promise<GameState[]> {
+  const known = previous && previous.game_id === gameId ? previous : undefined;
+  const query = known ? `?turns=${turns}&frames=true&since=${known.turn_number}` : `?turns=${turns}`;
+  const response = await fetch(`${BASE_URL}/games/${gameId}/next-round/${query}`, {
+    method: 'POST',
+  });
+
+  if (!response.ok) {
+    const errorData = await response.json();
+    throw new Error(errorData.error || 'Failed to advance to next round');
+  }
+
+  const data: (GameState | GameDelta) & { frames?: GameFrame[] } = await response.json();
+  if (known && data.frames && data.frames.length && data.frames[0][0] === known.turn_number + 1) {
+    const states: GameState[] = [];
+    let state = known;
+    for (const frame of data.frames) {
+      state = applyFrame(state, frame);
+      states.push(state);
+    }
+    return states;
+  }
+  if (known && 'changed_agents' in data) {
+    return [applyDelta(known, data)];
+  }
+  return [data as GameState];
 }
 
-export async function stopGame(): Promise<GameState> {
-  const response = await fetch(`${BASE_URL}/stop/`, {
+export async function stopGame(gameId: number): Promise<GameState> {
+  const response = await fetch(`${BASE_URL}/games/${gameId}/stop/`, {
     method: 'POST',
   });
 
@@ -3,17 +3,40 @@ export interface GameConfig {
   num_wastes: number;
   base_position_x: number;
   base_position_y: number;
+  grid_width?: number;
+  grid_height?: number;
 }
 
 export interface GameState {
+  game_id: number;
   waste_collected: number;
   total_wastes: number;
   agent_positions: [number, number, boolean][]; // [x, y, hasWaste]
   waste_positions: [number, number][]; // [x, y]
   base_position: [number, number]; // [x, y]
+  grid_size: [number, number]; // [width, height]
   turn_number: number;
 }
 
+// Changes since a turn, returned instead of a GameState when `since` is sent
+export interface GameDelta {
+  game_id: number;
+  since: number;
+  waste_collected: number;
+  total_wastes: number;
+  changed_agents: [number, number, number, boolean][]; // [index, x, y, hasWaste]
+  removed_wastes: [number, number][]; // [x, y]
+  turn_number: number;
+}
+
+// Changes of one turn, sent for each turn of a round when `frames` is asked for
+export type GameFrame = [
+  number, // turn_number
+  number, // waste_collected
+  [number, number, number, boolean][], // changed_agents: [index, x, y, hasWaste]
+  [number, number][], // removed_wastes: [x, y]
+];
+
 export interface Cell {
   x: number;
   y: number;